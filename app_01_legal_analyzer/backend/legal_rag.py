@@ -4,15 +4,83 @@ Legal RAG Technique - Retrieval-Augmented Generation with Citation Tracking
 
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from cag_engine.base import CAGTechnique, CAGRequest, ContextChunk, LLMClient, VectorStore
+from cag_engine.query_cache import QueryCache
+from cag_engine.runtime_metrics import retrieval_metrics
+from cag_engine.similarity import top_k_indices
 from typing import List, Tuple, Dict, Any
+import functools
+import hashlib
 import re
+import time
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Precompiled legal text patterns
+_SECTION_SPLIT_RE = re.compile(r'\n(?:Section|Article|Chapter|§)\s+\d+[:\.]?\s*')
+_CASE_RE = re.compile(r'\b[A-Z][a-z]+\s+v\.?\s+[A-Z][a-z]+\b')
+_STATUTE_RE = re.compile(r'\b\d+\s+U\.S\.C\.?\s+§?\s*\d+\b')
+_SECTION_RE = re.compile(r'§\s*\d+(?:\.\d+)*')
+# Citation formats combined into one alternation so validation is a single scan
+_CITATION_RE = re.compile('|'.join(f'(?:{p})' for p in (
+    r'\d+\s+U\.S\.?\s+\d+',  # U.S. Reports
+    r'\d+\s+F\.\d+d?\s+\d+',  # Federal Reporter
+    r'\d+\s+S\.Ct\.\s+\d+',  # Supreme Court Reporter
+    r'[A-Z][a-z]+\s+v\.?\s+[A-Z][a-z]+',  # Case name
+)))
+
+# Invariant prompt prefix. Sent as the system prompt so the model can reuse its
+# KV cache for it across requests; only context and query vary per call.
+_SYSTEM_PROMPT = """You are an expert legal analyst. Provide accurate, well-cited legal analysis based on the provided context. Always cite your sources using the provided citation numbers.
+
+## Instructions:
+1. Provide a comprehensive legal analysis based on the context provided
+2. Cite sources using the citation numbers [1], [2], etc. when referencing specific information
+3. If the context doesn't fully answer the query, acknowledge the limitations
+4. Use precise legal terminology
+5. Structure your response clearly with relevant sections"""
+
+
+def extract_pdf_pages(path: str, start: int, stop: int) -> List[str]:
+    """
+    Extract text for pages [start, stop) of a PDF.
+    
+    Module-level so it can run in a process pool worker.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def extract_pdf_head(path: str, max_pages: int) -> Tuple[int, List[str]]:
+    """
+    Count the pages of a PDF and extract text for up to its first `max_pages`.
+    
+    Lets one parse both size the remaining work and cover short documents.
+    """
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    num_pages = len(reader.pages)
+    return num_pages, [reader.pages[i].extract_text() or "" for i in range(min(max_pages, num_pages))]
+
+
+@functools.lru_cache(maxsize=1)
+def _load_spacy_model(model_name: str):
+    """Load a spaCy pipeline once per process; None if spaCy or the model is unavailable."""
+    try:
+        import spacy
+        return spacy.load(model_name)
+    except (ImportError, OSError) as e:
+        logger.warning(f"spaCy model {model_name} unavailable, using regex entities: {str(e)}")
+        return None
+
 
 class LegalRAGTechnique(CAGTechnique):
     """
@@ -23,7 +91,8 @@ class LegalRAGTechnique(CAGTechnique):
         self,
         llm_client: LLMClient,
         vector_store: VectorStore,
-        config: Dict[str, Any] = None
+        config: Dict[str, Any] = None,
+        lazy_nlp: bool = True
     ):
         super().__init__("LegalRAG", config or {})
         self.llm_client = llm_client
@@ -32,6 +101,21 @@ class LegalRAGTechnique(CAGTechnique):
         # Legal-specific configuration
         self.citation_format = config.get("citation_format", "inline") if config else "inline"
         self.min_relevance_threshold = config.get("min_relevance", 0.6) if config else 0.6
+        # When lazy, spaCy runs only on short query text; ingest always uses regex
+        self.lazy_nlp = lazy_nlp
+        self.spacy_model = self.config.get("spacy_model", "en_core_web_sm")
+
+        # Retrieval cache for repeated queries
+        self._cache = QueryCache(
+            max_size=self.config.get("cache_size", 2000),
+            ttl=self.config.get("cache_ttl", 300)
+        )
+        # Generation cache for exact-repeat prompts (greedy decoding only)
+        self._response_cache = QueryCache(
+            max_size=self.config.get("response_cache_size", 256),
+            ttl=self.config.get("response_cache_ttl", 1800)
+        )
+        self.keep_alive = self.config.get("keep_alive", "30m")
 
     async def retrieve_context(self, request: CAGRequest) -> List[ContextChunk]:
         """
@@ -44,36 +128,92 @@ class LegalRAGTechnique(CAGTechnique):
             List of context chunks with legal citations
         """
         try:
+            cache_key = self._cache_key(request)
+            cached = self._cache.get(cache_key)
+            retrieval_metrics.record_cache(hit=cached is not None)
+            if cached is not None:
+                logger.info(f"Cache hit: {len(cached)} legal contexts")
+                return list(cached)
+
             # Search vector store
+            search_start = time.perf_counter()
             results = await self.vector_store.search(
                 query=request.query,
                 limit=request.context_limit
             )
+            retrieval_metrics.record_search((time.perf_counter() - search_start) * 1000)
             
-            # Convert to ContextChunk objects
-            context_chunks = []
-            for doc, score, metadata in results:
-                # Only include if above relevance threshold
-                if score >= self.min_relevance_threshold:
-                    chunk = ContextChunk(
-                        content=doc,
-                        source=metadata.get("title", "Unknown Document"),
-                        relevance_score=score,
-                        metadata={
-                            **metadata,
-                            "chunk_index": metadata.get("chunk_index", 0),
-                            "citation_id": f"[{len(context_chunks) + 1}]"
-                        }
-                    )
-                    context_chunks.append(chunk)
-            
+            context_chunks = self._build_context_chunks(results, request.context_limit)
+            self._cache.put(cache_key, context_chunks)
             logger.info(f"Retrieved {len(context_chunks)} relevant legal contexts")
-            return context_chunks
+            return list(context_chunks)
             
         except Exception as e:
             logger.error(f"Error retrieving context: {str(e)}")
             raise
 
+    async def prefetch_context(self, requests: List[CAGRequest]):
+        """
+        Warm the query cache for a batch of requests with a single vector search.
+        
+        Requests already in the cache are skipped; the rest are searched together
+        so that subsequent `retrieve_context` calls are cache hits.
+        
+        Args:
+            requests: CAG requests that are about to be processed
+        """
+        misses = {}
+        for request in requests:
+            cache_key = self._cache_key(request)
+            if cache_key not in misses and self._cache.get(cache_key) is None:
+                misses[cache_key] = request
+        
+        if not misses:
+            return
+        
+        pending = list(misses.values())
+        batch_results = await self.vector_store.batch_search(
+            queries=[r.query for r in pending],
+            limit=max(r.context_limit for r in pending)
+        )
+        
+        for request, results in zip(pending, batch_results):
+            context_chunks = self._build_context_chunks(results, request.context_limit)
+            self._cache.put(self._cache_key(request), context_chunks)
+        
+        logger.info(f"Prefetched legal context for {len(pending)} queries")
+
+    @staticmethod
+    def _cache_key(request: CAGRequest) -> Tuple[str, int]:
+        return (request.query.strip().lower(), request.context_limit)
+
+    def _build_context_chunks(
+        self,
+        results: List[Tuple[str, float, Dict[str, Any]]],
+        context_limit: int
+    ) -> List[ContextChunk]:
+        """Turn raw search results into cited context chunks above the relevance threshold."""
+        # Select chunks above the relevance threshold before materializing
+        scores = np.fromiter((score for _, score, _ in results), dtype=np.float32, count=len(results))
+        keep = top_k_indices(scores, context_limit, self.min_relevance_threshold)
+
+        # Convert to ContextChunk objects
+        context_chunks = []
+        for rank, i in enumerate(keep, 1):
+            doc, score, metadata = results[i]
+            chunk = ContextChunk(
+                content=doc,
+                source=metadata.get("title", "Unknown Document"),
+                relevance_score=float(score),
+                metadata={
+                    **metadata,
+                    "chunk_index": metadata.get("chunk_index", 0),
+                    "citation_id": f"[{rank}]"
+                }
+            )
+            context_chunks.append(chunk)
+        return context_chunks
+
     async def augment_context(
         self,
         request: CAGRequest,
@@ -90,31 +230,21 @@ class LegalRAGTechnique(CAGTechnique):
             Augmented prompt with legal context
         """
         # Build context section with citations
-        context_text = "## Relevant Legal Context:\n\n"
-        
-        for i, chunk in enumerate(context_chunks, 1):
-            citation_id = f"[{i}]"
-            source = chunk.source
-            content = chunk.content
-            
-            context_text += f"{citation_id} **{source}**\n"
-            context_text += f"{content}\n\n"
+        parts = ["## Relevant Legal Context:\n\n"]
+        parts.extend(
+            f"[{i}] **{chunk.source}**\n{chunk.content}\n\n"
+            for i, chunk in enumerate(context_chunks, 1)
+        )
+        context_text = "".join(parts)
         
         # Build augmented prompt
-        augmented_prompt = f"""You are a legal analysis assistant. Analyze the following query using the provided legal context.
+        augmented_prompt = f"""Analyze the following query using the provided legal context.
 
 {context_text}
 
 ## Query:
 {request.query}
 
-## Instructions:
-1. Provide a comprehensive legal analysis based on the context provided
-2. Cite sources using the citation numbers [1], [2], etc. when referencing specific information
-3. If the context doesn't fully answer the query, acknowledge the limitations
-4. Use precise legal terminology
-5. Structure your response clearly with relevant sections
-
 ## Analysis:"""
 
         return augmented_prompt
@@ -134,15 +264,28 @@ class LegalRAGTechnique(CAGTechnique):
         Returns:
             Tuple of (generated_text, token_usage)
         """
-        system_prompt = """You are an expert legal analyst. Provide accurate, well-cited legal analysis based on the provided context. Always cite your sources using the provided citation numbers."""
+        # Sampled output is only replayable at temperature 0
+        cache_key = None
+        if request.temperature == 0:
+            prompt_hash = hashlib.sha1(augmented_prompt.encode("utf-8")).hexdigest()
+            cache_key = (prompt_hash, request.max_tokens)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit")
+                response, token_usage = cached
+                # Nothing was generated for this request
+                return response, {key: 0 for key in token_usage}
         
         response, token_usage = await self.llm_client.generate(
             prompt=augmented_prompt,
             temperature=request.temperature,
             max_tokens=request.max_tokens,
-            system_prompt=system_prompt
+            system_prompt=_SYSTEM_PROMPT,
+            keep_alive=self.keep_alive
         )
         
+        if cache_key is not None:
+            self._response_cache.put(cache_key, (response, token_usage))
         return response, token_usage
 
     def chunk_document(
@@ -168,50 +311,64 @@ class LegalRAGTechnique(CAGTechnique):
         Returns:
             List of document chunks
         """
-        # Try to split on section markers
-        section_pattern = r'\n(?:Section|Article|Chapter|§)\s+\d+[:\.]?\s*'
-        sections = re.split(section_pattern, document)
-        
         chunks = []
-        current_chunk = ""
+        # Paragraphs of the chunk being built; joined once when the chunk is emitted
+        current_parts: List[str] = []
+        current_len = 0
         
-        for section in sections:
-            # Split section into paragraphs
-            paragraphs = section.split('\n\n')
+        # Section boundaries from a single scan; sections are slices of the document
+        section_start = 0
+        boundaries = [(m.start(), m.end()) for m in _SECTION_SPLIT_RE.finditer(document)]
+        boundaries.append((len(document), len(document)))
+        
+        for section_end, next_start in boundaries:
+            section = document[section_start:section_end]
+            section_start = next_start
             
-            for para in paragraphs:
+            # Split section into paragraphs
+            for para in section.split('\n\n'):
                 para = para.strip()
                 if not para:
                     continue
                 
                 # If adding this paragraph exceeds chunk size
-                if len(current_chunk) + len(para) > chunk_size and current_chunk:
+                if current_len + len(para) > chunk_size and current_parts:
+                    current_chunk = "\n\n".join(current_parts)
                     chunks.append(current_chunk.strip())
                     # Start new chunk with overlap
                     if overlap > 0:
-                        current_chunk = current_chunk[-overlap:] + " " + para
-                    else:
-                        current_chunk = para
+                        para = current_chunk[-overlap:] + " " + para
+                    current_parts = [para]
+                    current_len = len(para)
                 else:
-                    current_chunk += "\n\n" + para if current_chunk else para
+                    current_len += len(para) + (2 if current_parts else 0)
+                    current_parts.append(para)
         
         # Add final chunk
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_parts:
+            chunks.append("\n\n".join(current_parts).strip())
         
         logger.info(f"Split document into {len(chunks)} chunks")
         return chunks
 
-    def extract_legal_entities(self, text: str) -> Dict[str, List[str]]:
+    def extract_legal_entities(self, text: str, use_nlp: bool = False) -> Dict[str, List[str]]:
         """
         Extract legal entities from text (cases, statutes, parties, etc.).
         
         Args:
             text: Legal text
+            use_nlp: Run the spaCy pipeline (for short query text). Ignored when
+                lazy_nlp is disabled, in which case spaCy always runs.
             
         Returns:
             Dictionary of entity types and extracted entities
         """
+        if use_nlp or not self.lazy_nlp:
+            return self._extract_spacy(text)
+        return self._extract_regex(text)
+
+    def _extract_regex(self, text: str) -> Dict[str, List[str]]:
+        """Fast pattern-based extraction, used on ingest."""
         entities = {
             "cases": [],
             "statutes": [],
@@ -220,16 +377,26 @@ class LegalRAGTechnique(CAGTechnique):
         }
         
         # Extract case citations (simplified pattern)
-        case_pattern = r'\b[A-Z][a-z]+\s+v\.?\s+[A-Z][a-z]+\b'
-        entities["cases"] = re.findall(case_pattern, text)
+        entities["cases"] = _CASE_RE.findall(text)
         
         # Extract statute references
-        statute_pattern = r'\b\d+\s+U\.S\.C\.?\s+§?\s*\d+\b'
-        entities["statutes"] = re.findall(statute_pattern, text)
+        entities["statutes"] = _STATUTE_RE.findall(text)
         
         # Extract section references
-        section_pattern = r'§\s*\d+(?:\.\d+)*'
-        entities["sections"] = re.findall(section_pattern, text)
+        entities["sections"] = _SECTION_RE.findall(text)
+        
+        return entities
+
+    def _extract_spacy(self, text: str) -> Dict[str, List[str]]:
+        """Regex extraction plus spaCy named entities as parties."""
+        entities = self._extract_regex(text)
+        
+        nlp = _load_spacy_model(self.spacy_model)
+        if nlp is not None:
+            entities["parties"] = [
+                ent.text for ent in nlp(text).ents
+                if ent.label_ in ("PERSON", "ORG", "GPE")
+            ]
         
         return entities
 
@@ -243,16 +410,4 @@ class LegalRAGTechnique(CAGTechnique):
         Returns:
             True if valid citation format
         """
-        # Basic validation patterns
-        patterns = [
-            r'\d+\s+U\.S\.?\s+\d+',  # U.S. Reports
-            r'\d+\s+F\.\d+d?\s+\d+',  # Federal Reporter
-            r'\d+\s+S\.Ct\.\s+\d+',  # Supreme Court Reporter
-            r'[A-Z][a-z]+\s+v\.?\s+[A-Z][a-z]+',  # Case name
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, citation):
-                return True
-        
-        return False
+        return _CITATION_RE.search(citation) is not None
@@ -11,14 +11,23 @@ import sys
 import os
 
 # Add shared modules to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from cag_engine.base import CAGRequest, CAGResponse, ContextChunk
 from cag_engine.ollama_client import OllamaClient
 from cag_engine.chroma_store import ChromaVectorStore
-from legal_rag import LegalRAGTechnique
+from cag_engine.semantic_cache import SemanticCache
+from cag_engine.runtime_metrics import retrieval_metrics
+from cag_engine.similarity import kernel_info
+from legal_rag import LegalRAGTechnique, extract_pdf_head, extract_pdf_pages
+from concurrent.futures import ProcessPoolExecutor
+import asyncio
 import logging
 import json
+import tempfile
 from datetime import datetime
 
 # Configure logging
@@ -45,13 +54,63 @@ app.add_middleware(
 ollama_client = OllamaClient(model="llama3")
 vector_store = ChromaVectorStore(
     collection_name="legal_documents",
-    persist_directory="./legal_chroma_db"
+    persist_directory="./legal_chroma_db",
+    rerank_oversample=4,
+    int8_rerank=True,
+    coalesce_window_ms=5,
+    # Near-duplicate questions reuse retrieval results until the next ingest
+    semantic_cache=SemanticCache()
 )
 legal_rag = LegalRAGTechnique(
     llm_client=ollama_client,
     vector_store=vector_store
 )
 
+# PDF pages are parsed in worker processes (pypdf is CPU-bound and holds the GIL)
+PDF_PAGES_PER_WORKER_MIN = 4
+UPLOAD_READ_CHUNK = 1024 * 1024
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    if _pdf_pool is None:
+        _pdf_pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _pdf_pool
+
+async def _extract_pdf_text(path: str) -> str:
+    """Extract text from all pages of a PDF, splitting page ranges across workers."""
+    # The page count comes from a parse off the event loop that also extracts
+    # the first pages; short documents need nothing more
+    num_pages, pages = await asyncio.to_thread(extract_pdf_head, path, 2 * PDF_PAGES_PER_WORKER_MIN - 1)
+    
+    first = len(pages)
+    remaining = num_pages - first
+    if remaining > 0:
+        workers = min(os.cpu_count() or 1, max(1, remaining // PDF_PAGES_PER_WORKER_MIN))
+        loop = asyncio.get_running_loop()
+        pool = _get_pdf_pool()
+        step = -(-remaining // workers)
+        parts = await asyncio.gather(*[
+            loop.run_in_executor(pool, extract_pdf_pages, path, start, min(start + step, num_pages))
+            for start in range(first, num_pages, step)
+        ])
+        pages += [page for part in parts for page in part]
+    
+    return "".join(f"{page}\n" for page in pages)
+
+@app.on_event("startup")
+async def warmup_models():
+    """Load embedding and LLM models before the first request arrives."""
+    await asyncio.to_thread(vector_store.warmup)
+    await asyncio.to_thread(legal_rag.extract_legal_entities, "warmup", True)
+    await ollama_client.warmup(keep_alive=legal_rag.keep_alive)
+
+@app.on_event("shutdown")
+async def shutdown_resources():
+    if _pdf_pool is not None:
+        _pdf_pool.shutdown(wait=False)
+    await ollama_client.aclose()
+
 # Request/Response models
 class AnalyzeRequest(BaseModel):
     query: str
@@ -67,6 +126,7 @@ class AnalyzeResponse(BaseModel):
     latency_ms: float
     token_usage: Dict[str, int]
     process_visualization: Dict[str, Any]
+    query_entities: Dict[str, List[str]] = {}
 
 class DocumentUpload(BaseModel):
     title: str
@@ -130,6 +190,9 @@ async def analyze_legal_query(request: AnalyzeRequest):
         # Get process visualization
         process_viz = legal_rag.get_process_visualization()
         
+        # spaCy is CPU-bound; run it off the event loop
+        query_entities = await asyncio.to_thread(legal_rag.extract_legal_entities, request.query, True)
+        
         return AnalyzeResponse(
             answer=cag_response.answer,
             citations=citations,
@@ -137,13 +200,42 @@ async def analyze_legal_query(request: AnalyzeRequest):
             confidence_score=cag_response.confidence_score,
             latency_ms=cag_response.latency_ms,
             token_usage=cag_response.token_usage,
-            process_visualization=process_viz
+            process_visualization=process_viz,
+            query_entities=query_entities
         )
         
     except Exception as e:
         logger.error(f"Error analyzing query: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/analyze/batch", response_model=List[AnalyzeResponse])
+async def analyze_legal_queries_batch(requests: List[AnalyzeRequest]):
+    """
+    Analyze several legal queries in one call.
+    
+    Context for all uncached queries is fetched with a single batched vector
+    search; generation then runs per query.
+    
+    Args:
+        requests: Analysis requests
+        
+    Returns:
+        One analysis response per request, in order
+    """
+    try:
+        logger.info(f"Analyzing batch of {len(requests)} queries")
+        
+        await legal_rag.prefetch_context([
+            CAGRequest(query=r.query, context_limit=r.context_limit)
+            for r in requests
+        ])
+        
+    except Exception as e:
+        logger.error(f"Error prefetching batch context: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return [await analyze_legal_query(r) for r in requests]
+
 @app.post("/documents/upload")
 async def upload_document(document: DocumentUpload):
     """
@@ -165,20 +257,27 @@ async def upload_document(document: DocumentUpload):
             overlap=50
         )
         
+        # Regex-only entity pass; spaCy is reserved for query text
+        entities = legal_rag.extract_legal_entities(document.content)
+        
+        # One timestamp per upload, shared by all chunks
+        now = datetime.now()
+        upload_date = now.isoformat()
+        
         # Prepare metadata for each chunk
         metadatas = [
             {
                 "title": document.title,
                 "chunk_index": i,
                 "total_chunks": len(chunks),
-                "upload_date": datetime.now().isoformat(),
+                "upload_date": upload_date,
                 **(document.metadata or {})
             }
             for i in range(len(chunks))
         ]
         
         # Add to vector store
-        doc_id = f"doc_{datetime.now().timestamp()}"
+        doc_id = f"doc_{now.timestamp()}"
         ids = [f"{doc_id}_chunk_{i}" for i in range(len(chunks))]
         
         await vector_store.add_documents(
@@ -186,6 +285,7 @@ async def upload_document(document: DocumentUpload):
             metadatas=metadatas,
             ids=ids
         )
+        legal_rag._cache.invalidate()
         
         logger.info(f"Successfully uploaded document with {len(chunks)} chunks")
         
@@ -193,6 +293,7 @@ async def upload_document(document: DocumentUpload):
             "status": "success",
             "document_id": doc_id,
             "num_chunks": len(chunks),
+            "entity_counts": {kind: len(found) for kind, found in entities.items()},
             "message": f"Document '{document.title}' uploaded successfully"
         }
         
@@ -214,24 +315,19 @@ async def upload_document_file(file: UploadFile = File(...)):
     try:
         logger.info(f"Uploading file: {file.filename}")
         
-        # Read file content
-        content = await file.read()
-        
         # Extract text based on file type
         if file.filename.endswith('.txt'):
+            content = await file.read()
             text = content.decode('utf-8')
         elif file.filename.endswith('.pdf'):
-            import io
-            from pypdf import PdfReader
-            
-            # Create a PDF reader object
-            pdf_file = io.BytesIO(content)
-            reader = PdfReader(pdf_file)
-            
-            # Extract text from all pages
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            # Stream the upload to disk so worker processes can open it by path
+            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+                while chunk := await file.read(UPLOAD_READ_CHUNK):
+                    await asyncio.to_thread(tmp.write, chunk)
+            try:
+                text = await _extract_pdf_text(tmp.name)
+            finally:
+                os.unlink(tmp.name)
                 
             if not text.strip():
                 raise HTTPException(status_code=400, detail="Could not extract text from PDF (it might be empty or scanned)")
@@ -290,6 +386,7 @@ async def delete_document(document_id: str):
         
         # Get all chunks for this document
         # TODO: Implement proper document ID tracking
+        legal_rag._cache.invalidate()
         
         return {
             "status": "success",
@@ -313,6 +410,9 @@ async def get_stats():
         
         return {
             "collection": collection_stats,
+            "query_cache": legal_rag._cache.get_stats(),
+            "retrieval": retrieval_metrics.snapshot(),
+            "kernels": kernel_info(),
             "model": ollama_client.model,
             "timestamp": datetime.now().isoformat()
         }
@@ -9,7 +9,10 @@ from pydantic import BaseModel
 import sys
 import os
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from cag_engine.ollama_client import OllamaClient
 from medical_multihop import MedicalMultiHopCAG
@@ -35,6 +38,19 @@ medical_cag = MedicalMultiHopCAG(
 )
 
 
+@app.on_event("startup")
+async def warmup_models():
+    """Seed the knowledge graph and load the LLM before the first request arrives."""
+    await medical_cag.initialize()
+    await ollama_client.warmup()
+
+
+@app.on_event("shutdown")
+async def close_clients():
+    await medical_cag.close()
+    await ollama_client.aclose()
+
+
 class DiagnosisRequest(BaseModel):
     symptoms: str
     top_k: int = 5
@@ -63,7 +79,7 @@ async def diagnose(request: DiagnosisRequest):
     Diagnose based on symptoms using multi-hop reasoning
     """
     try:
-        result = medical_cag.process(request.symptoms, request.top_k)
+        result = await medical_cag.process(request.symptoms, request.top_k)
         
         return DiagnosisResponse(
             query=result["query"],
@@ -5,14 +5,49 @@ Uses Neo4j knowledge graph for medical reasoning
 
 import sys
 import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
+from types import MappingProxyType
 from typing import List, Dict, Any, Tuple
+import heapq
 from cag_engine.base import CAGTechnique
 from cag_engine.ollama_client import OllamaClient
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, READ_ACCESS, WRITE_ACCESS
 import json
 
+try:
+    import ahocorasick
+except ImportError:  # optional: single-pass multi-keyword matching
+    ahocorasick = None
+
+# Naming the database up front lets sessions skip the home-database lookup
+NEO4J_DATABASE = "neo4j"
+
+_SYMPTOM_KEYWORDS = MappingProxyType({
+    "fever": "Fever",
+    "cough": "Cough",
+    "tired": "Fatigue",
+    "fatigue": "Fatigue",
+    "headache": "Headache",
+    "sore throat": "Sore Throat",
+    "throat": "Sore Throat",
+    "breath": "Shortness of Breath",
+    "breathing": "Shortness of Breath",
+    "chest pain": "Chest Pain",
+    "runny nose": "Runny Nose",
+    "body aches": "Body Aches",
+    "aches": "Body Aches",
+    "taste": "Loss of Taste",
+})
+
+# (keyword, symptom) pairs for the fallback scan. Keywords match as
+# substrings anywhere in the query, overlaps included ("headaches" -> Headache
+# and Body Aches), the same as the Aho-Corasick automaton.
+_SYMPTOM_ITEMS = tuple(_SYMPTOM_KEYWORDS.items())
+
 
 class MedicalMultiHopCAG(CAGTechnique):
     """Multi-hop reasoning for medical diagnosis using knowledge graphs"""
@@ -24,228 +59,253 @@ class MedicalMultiHopCAG(CAGTechnique):
         }
         super().__init__("MedicalMultiHopCAG", config)
         self.ollama_client = ollama_client
-        self.driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
-        self._initialize_medical_knowledge()
+        self.driver = AsyncGraphDatabase.driver(
+            neo4j_uri,
+            auth=(neo4j_user, neo4j_password),
+            max_connection_pool_size=50,
+            connection_acquisition_timeout=30,
+            connection_timeout=15
+        )
+        self._symptom_automaton = self._build_symptom_automaton()
+    
+    def _build_symptom_automaton(self):
+        """Compile the symptom keywords into an Aho-Corasick automaton (None if unavailable)"""
+        if ahocorasick is None:
+            return None
+        automaton = ahocorasick.Automaton()
+        for keyword, symptom in _SYMPTOM_KEYWORDS.items():
+            automaton.add_word(keyword, symptom)
+        automaton.make_automaton()
+        return automaton
     
-    def _initialize_medical_knowledge(self):
+    async def initialize(self):
+        """Seed the knowledge graph (call once from the app's startup hook)"""
+        await self._initialize_medical_knowledge()
+    
+    async def _initialize_medical_knowledge(self):
         """Initialize medical knowledge graph with diseases, symptoms, and treatments"""
-        with self.driver.session() as session:
-            # Clear existing data
-            session.run("MATCH (n) DETACH DELETE n")
-            
-            # Create diseases
-            diseases = [
-                {"name": "Influenza", "severity": "moderate", "category": "viral"},
-                {"name": "Pneumonia", "severity": "severe", "category": "bacterial"},
-                {"name": "Common Cold", "severity": "mild", "category": "viral"},
-                {"name": "Bronchitis", "severity": "moderate", "category": "bacterial"},
-                {"name": "COVID-19", "severity": "severe", "category": "viral"},
-                {"name": "Strep Throat", "severity": "moderate", "category": "bacterial"},
-                {"name": "Migraine", "severity": "moderate", "category": "neurological"},
-                {"name": "Hypertension", "severity": "moderate", "category": "cardiovascular"},
-            ]
-            
-            # Create symptoms
-            symptoms = [
-                {"name": "Fever", "type": "systemic"},
-                {"name": "Cough", "type": "respiratory"},
-                {"name": "Fatigue", "type": "systemic"},
-                {"name": "Headache", "type": "neurological"},
-                {"name": "Sore Throat", "type": "respiratory"},
-                {"name": "Shortness of Breath", "type": "respiratory"},
-                {"name": "Chest Pain", "type": "respiratory"},
-                {"name": "Runny Nose", "type": "respiratory"},
-                {"name": "Body Aches", "type": "systemic"},
-                {"name": "Loss of Taste", "type": "sensory"},
-            ]
-            
-            # Create treatments
-            treatments = [
-                {"name": "Rest and Hydration", "type": "supportive"},
-                {"name": "Antibiotics", "type": "medication"},
-                {"name": "Antiviral Medication", "type": "medication"},
-                {"name": "Pain Relievers", "type": "medication"},
-                {"name": "Cough Suppressants", "type": "medication"},
-                {"name": "Oxygen Therapy", "type": "supportive"},
-            ]
-            
-            # Create nodes
-            for disease in diseases:
-                session.run(
-                    "CREATE (d:Disease {name: $name, severity: $severity, category: $category})",
-                    **disease
-                )
-            
-            for symptom in symptoms:
-                session.run(
-                    "CREATE (s:Symptom {name: $name, type: $type})",
-                    **symptom
-                )
-            
-            for treatment in treatments:
-                session.run(
-                    "CREATE (t:Treatment {name: $name, type: $type})",
-                    **treatment
-                )
-            
-            # Create relationships: Disease -> Symptom
-            relationships = [
-                ("Influenza", "Fever", 0.9),
-                ("Influenza", "Cough", 0.8),
-                ("Influenza", "Fatigue", 0.9),
-                ("Influenza", "Body Aches", 0.8),
-                ("Pneumonia", "Fever", 0.9),
-                ("Pneumonia", "Cough", 0.9),
-                ("Pneumonia", "Shortness of Breath", 0.8),
-                ("Pneumonia", "Chest Pain", 0.7),
-                ("Common Cold", "Runny Nose", 0.9),
-                ("Common Cold", "Sore Throat", 0.7),
-                ("Common Cold", "Cough", 0.6),
-                ("COVID-19", "Fever", 0.8),
-                ("COVID-19", "Cough", 0.8),
-                ("COVID-19", "Loss of Taste", 0.7),
-                ("COVID-19", "Fatigue", 0.9),
-                ("Strep Throat", "Sore Throat", 0.9),
-                ("Strep Throat", "Fever", 0.7),
-                ("Migraine", "Headache", 0.95),
-            ]
-            
-            for disease, symptom, probability in relationships:
-                session.run(
-                    """
-                    MATCH (d:Disease {name: $disease})
-                    MATCH (s:Symptom {name: $symptom})
-                    CREATE (d)-[:HAS_SYMPTOM {probability: $probability}]->(s)
-                    """,
-                    disease=disease, symptom=symptom, probability=probability
+        # Create diseases
+        diseases = [
+            {"name": "Influenza", "severity": "moderate", "category": "viral"},
+            {"name": "Pneumonia", "severity": "severe", "category": "bacterial"},
+            {"name": "Common Cold", "severity": "mild", "category": "viral"},
+            {"name": "Bronchitis", "severity": "moderate", "category": "bacterial"},
+            {"name": "COVID-19", "severity": "severe", "category": "viral"},
+            {"name": "Strep Throat", "severity": "moderate", "category": "bacterial"},
+            {"name": "Migraine", "severity": "moderate", "category": "neurological"},
+            {"name": "Hypertension", "severity": "moderate", "category": "cardiovascular"},
+        ]
+        
+        # Create symptoms
+        symptoms = [
+            {"name": "Fever", "type": "systemic"},
+            {"name": "Cough", "type": "respiratory"},
+            {"name": "Fatigue", "type": "systemic"},
+            {"name": "Headache", "type": "neurological"},
+            {"name": "Sore Throat", "type": "respiratory"},
+            {"name": "Shortness of Breath", "type": "respiratory"},
+            {"name": "Chest Pain", "type": "respiratory"},
+            {"name": "Runny Nose", "type": "respiratory"},
+            {"name": "Body Aches", "type": "systemic"},
+            {"name": "Loss of Taste", "type": "sensory"},
+        ]
+        
+        # Create treatments
+        treatments = [
+            {"name": "Rest and Hydration", "type": "supportive"},
+            {"name": "Antibiotics", "type": "medication"},
+            {"name": "Antiviral Medication", "type": "medication"},
+            {"name": "Pain Relievers", "type": "medication"},
+            {"name": "Cough Suppressants", "type": "medication"},
+            {"name": "Oxygen Therapy", "type": "supportive"},
+        ]
+        
+        # Create relationships: Disease -> Symptom
+        relationships = [
+            {"d": "Influenza", "s": "Fever", "p": 0.9},
+            {"d": "Influenza", "s": "Cough", "p": 0.8},
+            {"d": "Influenza", "s": "Fatigue", "p": 0.9},
+            {"d": "Influenza", "s": "Body Aches", "p": 0.8},
+            {"d": "Pneumonia", "s": "Fever", "p": 0.9},
+            {"d": "Pneumonia", "s": "Cough", "p": 0.9},
+            {"d": "Pneumonia", "s": "Shortness of Breath", "p": 0.8},
+            {"d": "Pneumonia", "s": "Chest Pain", "p": 0.7},
+            {"d": "Common Cold", "s": "Runny Nose", "p": 0.9},
+            {"d": "Common Cold", "s": "Sore Throat", "p": 0.7},
+            {"d": "Common Cold", "s": "Cough", "p": 0.6},
+            {"d": "COVID-19", "s": "Fever", "p": 0.8},
+            {"d": "COVID-19", "s": "Cough", "p": 0.8},
+            {"d": "COVID-19", "s": "Loss of Taste", "p": 0.7},
+            {"d": "COVID-19", "s": "Fatigue", "p": 0.9},
+            {"d": "Strep Throat", "s": "Sore Throat", "p": 0.9},
+            {"d": "Strep Throat", "s": "Fever", "p": 0.7},
+            {"d": "Migraine", "s": "Headache", "p": 0.95},
+        ]
+        
+        # Create relationships: Disease -> Treatment
+        treatment_rels = [
+            {"d": "Influenza", "t": "Rest and Hydration"},
+            {"d": "Influenza", "t": "Antiviral Medication"},
+            {"d": "Pneumonia", "t": "Antibiotics"},
+            {"d": "Pneumonia", "t": "Oxygen Therapy"},
+            {"d": "Common Cold", "t": "Rest and Hydration"},
+            {"d": "Common Cold", "t": "Cough Suppressants"},
+            {"d": "COVID-19", "t": "Rest and Hydration"},
+            {"d": "COVID-19", "t": "Oxygen Therapy"},
+            {"d": "Strep Throat", "t": "Antibiotics"},
+            {"d": "Migraine", "t": "Pain Relievers"},
+        ]
+        
+        async def seed(tx):
+            # Idempotent upserts: re-seeding unchanged data is a no-op, so the
+            # graph no longer has to be wiped on every startup.
+            # One UNWIND per label / relationship type instead of one query per row
+            await tx.run(
+                "UNWIND $rows AS r "
+                "MERGE (d:Disease {name: r.name}) SET d.severity = r.severity, d.category = r.category",
+                rows=diseases
+            )
+            await tx.run(
+                "UNWIND $rows AS r MERGE (s:Symptom {name: r.name}) SET s.type = r.type",
+                rows=symptoms
+            )
+            await tx.run(
+                "UNWIND $rows AS r MERGE (t:Treatment {name: r.name}) SET t.type = r.type",
+                rows=treatments
+            )
+            await tx.run(
+                """
+                UNWIND $rows AS r
+                MATCH (d:Disease {name: r.d})
+                MATCH (s:Symptom {name: r.s})
+                MERGE (d)-[rel:HAS_SYMPTOM]->(s)
+                SET rel.probability = r.p
+                """,
+                rows=relationships
+            )
+            await tx.run(
+                """
+                UNWIND $rows AS r
+                MATCH (d:Disease {name: r.d})
+                MATCH (t:Treatment {name: r.t})
+                MERGE (d)-[:TREATED_WITH]->(t)
+                """,
+                rows=treatment_rels
+            )
+        
+        async with self.driver.session(database=NEO4J_DATABASE, default_access_mode=WRITE_ACCESS) as session:
+            # Unique constraints (backed by indexes) so name lookups are index seeks.
+            # Schema changes can't share a transaction with data writes.
+            for label in ("Disease", "Symptom", "Treatment"):
+                await session.run(
+                    f"CREATE CONSTRAINT {label.lower()}_name IF NOT EXISTS "
+                    f"FOR (n:{label}) REQUIRE n.name IS UNIQUE"
                 )
             
-            # Create relationships: Disease -> Treatment
-            treatment_rels = [
-                ("Influenza", "Rest and Hydration"),
-                ("Influenza", "Antiviral Medication"),
-                ("Pneumonia", "Antibiotics"),
-                ("Pneumonia", "Oxygen Therapy"),
-                ("Common Cold", "Rest and Hydration"),
-                ("Common Cold", "Cough Suppressants"),
-                ("COVID-19", "Rest and Hydration"),
-                ("COVID-19", "Oxygen Therapy"),
-                ("Strep Throat", "Antibiotics"),
-                ("Migraine", "Pain Relievers"),
-            ]
-            
-            for disease, treatment in treatment_rels:
-                session.run(
-                    """
-                    MATCH (d:Disease {name: $disease})
-                    MATCH (t:Treatment {name: $treatment})
-                    CREATE (d)-[:TREATED_WITH]->(t)
-                    """,
-                    disease=disease, treatment=treatment
-                )
+            # Seed everything in a single write transaction
+            await session.execute_write(seed)
+    
+    # All three hops in one round trip. Hop 1 keeps the per-symptom order of
+    # $symptoms with probabilities descending; hops 2 and 3 are expanded for the
+    # three diseases with the highest summed hop-1 probability.
+    _MULTIHOP_QUERY = """
+        UNWIND range(0, size($symptoms) - 1) AS i
+        MATCH (d:Disease)-[r:HAS_SYMPTOM]->(:Symptom {name: $symptoms[i]})
+        WITH i, $symptoms[i] AS symptom, d, r
+        ORDER BY i, r.probability DESC
+        WITH collect({symptom: symptom, disease: d.name, severity: d.severity,
+                      category: d.category, probability: r.probability}) AS hop1
+        CALL {
+            WITH hop1
+            UNWIND hop1 AS row
+            WITH row.disease AS name, sum(row.probability) AS score
+            ORDER BY score DESC, name
+            LIMIT 3
+            MATCH (d:Disease {name: name})
+            RETURN collect(d) AS top
+        }
+        RETURN hop1,
+               [d IN top | {disease: d.name, symptoms:
+                   [(d)-[r:HAS_SYMPTOM]->(s:Symptom) |
+                    {symptom: s.name, type: s.type, probability: r.probability}]}] AS hop2,
+               [d IN top | {disease: d.name, treatments:
+                   [(d)-[:TREATED_WITH]->(t:Treatment) | {treatment: t.name, type: t.type}]}] AS hop3
+    """
     
-    def retrieve_context(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    async def retrieve_context(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Extract symptoms and perform multi-hop reasoning"""
         # Step 1: Extract symptoms from query
         symptoms = self._extract_symptoms(query)
         
         # Step 2: Multi-hop reasoning through knowledge graph
+        async def fetch(tx):
+            result = await tx.run(self._MULTIHOP_QUERY, symptoms=symptoms)
+            return await result.single()
+        
+        # Managed read transaction: routed to any cluster member, retried on transient errors
+        async with self.driver.session(database=NEO4J_DATABASE, default_access_mode=READ_ACCESS) as session:
+            record = await session.execute_read(fetch)
+        
         context_items = []
         
-        with self.driver.session() as session:
-            # Hop 1: Find diseases matching symptoms
-            for symptom in symptoms:
-                result = session.run(
-                    """
-                    MATCH (d:Disease)-[r:HAS_SYMPTOM]->(s:Symptom {name: $symptom})
-                    RETURN d.name as disease, d.severity as severity, 
-                           d.category as category, r.probability as probability
-                    ORDER BY r.probability DESC
-                    """,
-                    symptom=symptom
-                )
-                
-                for record in result:
-                    context_items.append({
-                        "type": "disease_symptom",
-                        "symptom": symptom,
-                        "disease": record["disease"],
-                        "severity": record["severity"],
-                        "category": record["category"],
-                        "probability": record["probability"],
-                        "hop": 1
-                    })
-            
-            # Hop 2: Get all symptoms for top diseases
-            top_diseases = list(set([item["disease"] for item in context_items[:3]]))
-            for disease in top_diseases:
-                result = session.run(
-                    """
-                    MATCH (d:Disease {name: $disease})-[r:HAS_SYMPTOM]->(s:Symptom)
-                    RETURN s.name as symptom, s.type as type, r.probability as probability
-                    ORDER BY r.probability DESC
-                    """,
-                    disease=disease
-                )
-                
-                for record in result:
-                    context_items.append({
-                        "type": "disease_all_symptoms",
-                        "disease": disease,
-                        "symptom": record["symptom"],
-                        "symptom_type": record["type"],
-                        "probability": record["probability"],
-                        "hop": 2
-                    })
-            
-            # Hop 3: Get treatments for top diseases
-            for disease in top_diseases:
-                result = session.run(
-                    """
-                    MATCH (d:Disease {name: $disease})-[:TREATED_WITH]->(t:Treatment)
-                    RETURN t.name as treatment, t.type as type
-                    """,
-                    disease=disease
-                )
-                
-                for record in result:
-                    context_items.append({
-                        "type": "treatment",
-                        "disease": disease,
-                        "treatment": record["treatment"],
-                        "treatment_type": record["type"],
-                        "hop": 3
-                    })
+        # Hop 1: Diseases matching symptoms
+        for row in record["hop1"]:
+            context_items.append({
+                "type": "disease_symptom",
+                "symptom": row["symptom"],
+                "disease": row["disease"],
+                "severity": row["severity"],
+                "category": row["category"],
+                "probability": row["probability"],
+                "hop": 1
+            })
+        
+        # Hop 2: All symptoms for top diseases
+        for profile in record["hop2"]:
+            for row in sorted(profile["symptoms"], key=lambda r: r["probability"], reverse=True):
+                context_items.append({
+                    "type": "disease_all_symptoms",
+                    "disease": profile["disease"],
+                    "symptom": row["symptom"],
+                    "symptom_type": row["type"],
+                    "probability": row["probability"],
+                    "hop": 2
+                })
+        
+        # Hop 3: Treatments for top diseases
+        for profile in record["hop3"]:
+            for row in profile["treatments"]:
+                context_items.append({
+                    "type": "treatment",
+                    "disease": profile["disease"],
+                    "treatment": row["treatment"],
+                    "treatment_type": row["type"],
+                    "hop": 3
+                })
         
-        return context_items[:top_k * 3]  # Return more items for multi-hop
+        # Drop repeated facts, then keep the best items: earlier hops first, then by probability
+        seen = set()
+        unique_items = []
+        for item in context_items:
+            key = (item["type"], item.get("disease"), item.get("symptom"), item.get("treatment"))
+            if key not in seen:
+                seen.add(key)
+                unique_items.append(item)
+        
+        return heapq.nlargest(  # Return more items for multi-hop
+            top_k * 3,
+            unique_items,
+            key=lambda x: (-x["hop"], x.get("probability") or 0)
+        )
     
     def _extract_symptoms(self, query: str) -> List[str]:
         """Extract symptoms from natural language query"""
-        symptom_keywords = {
-            "fever": "Fever",
-            "cough": "Cough",
-            "tired": "Fatigue",
-            "fatigue": "Fatigue",
-            "headache": "Headache",
-            "sore throat": "Sore Throat",
-            "throat": "Sore Throat",
-            "breath": "Shortness of Breath",
-            "breathing": "Shortness of Breath",
-            "chest pain": "Chest Pain",
-            "runny nose": "Runny Nose",
-            "body aches": "Body Aches",
-            "aches": "Body Aches",
-            "taste": "Loss of Taste",
-        }
+        # One linear pass over the query finds every keyword occurrence
+        if self._symptom_automaton is not None:
+            return list({symptom for _, symptom in self._symptom_automaton.iter(query.lower())})
         
         query_lower = query.lower()
-        symptoms = []
-        
-        for keyword, symptom in symptom_keywords.items():
-            if keyword in query_lower:
-                symptoms.append(symptom)
-        
-        return list(set(symptoms))
+        return list({symptom for keyword, symptom in _SYMPTOM_ITEMS if keyword in query_lower})
     
     def augment_context(self, query: str, context: List[Dict[str, Any]]) -> str:
         """Create multi-hop reasoning prompt"""
@@ -303,15 +363,12 @@ Remember: This is for educational purposes only. Always recommend consulting a h
         
         return prompt
     
-    def generate_response(self, augmented_prompt: str) -> Tuple[str, Dict[str, Any]]:
+    async def generate_response(self, augmented_prompt: str) -> Tuple[str, Dict[str, Any]]:
         """Generate diagnosis with metadata"""
-        response = self.ollama_client.generate(
-            prompt=augmented_prompt,
-            model="llama3"
-        )
+        response, _ = await self.ollama_client.generate(prompt=augmented_prompt)
         
         metadata = {
-            "model": "llama3",
+            "model": self.ollama_client.model,
             "technique": "multi_hop_reasoning",
             "knowledge_source": "neo4j_medical_graph",
             "hops": 3
@@ -319,16 +376,16 @@ Remember: This is for educational purposes only. Always recommend consulting a h
         
         return response, metadata
     
-    def process(self, query: str, top_k: int = 5) -> Dict[str, Any]:
+    async def process(self, query: str, top_k: int = 5) -> Dict[str, Any]:
         """Process medical query with multi-hop reasoning"""
         # Retrieve context through multi-hop reasoning
-        context = self.retrieve_context(query, top_k)
+        context = await self.retrieve_context(query, top_k)
         
         # Augment with reasoning path
         augmented_prompt = self.augment_context(query, context)
         
         # Generate diagnosis
-        response, metadata = self.generate_response(augmented_prompt)
+        response, metadata = await self.generate_response(augmented_prompt)
         
         return {
             "query": query,
@@ -344,6 +401,6 @@ Remember: This is for educational purposes only. Always recommend consulting a h
             ]
         }
     
-    def close(self):
+    async def close(self):
         """Close Neo4j connection"""
-        self.driver.close()
+        await self.driver.close()
@@ -7,10 +7,14 @@ from pydantic import BaseModel
 import sys
 import os
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from cag_engine.ollama_client import OllamaClient
 from cag_engine.base import CAGRequest
+from cag_engine.response_cache import ResponseCache
 from code_review_rag import CodeReviewCAG
 
 app = FastAPI(title="Code Review Bot API")
@@ -25,6 +29,9 @@ app.add_middleware(
 
 ollama_client = OllamaClient(host="http://localhost:11434")
 reviewer = CodeReviewCAG(ollama_client)
+response_cache = ResponseCache(
+    path=os.path.join(os.path.dirname(__file__), "response_cache.json")
+)
 
 
 class QueryRequest(BaseModel):
@@ -40,6 +47,11 @@ class QueryResponse(BaseModel):
     process_steps: list
 
 
+@app.on_event("shutdown")
+async def save_cache():
+    await response_cache.asave()
+
+
 @app.get("/")
 async def root():
     return {
@@ -52,7 +64,7 @@ async def root():
 @app.post("/process", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """Review code using AST-aware Code Quality CAG"""
-    try:
+    async def review():
         cag_request = CAGRequest(query=request.query, context_limit=request.top_k)
         result = await reviewer.process(cag_request)
         
@@ -70,7 +82,11 @@ async def process_query(request: QueryRequest):
                 "description": s.description,
                 "duration": s.duration_ms
             } for s in reviewer.process_steps]
-        )
+        ).model_dump()
+
+    try:
+        cached = await response_cache.get_or_compute(f"{request.top_k}:{request.query}", review)
+        return QueryResponse(**cached)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3,7 +3,10 @@ Financial Report Analyzer - CAG Technique: Structured Data CAG
 """
 import sys, os
 from typing import List, Dict, Any, Tuple
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 from cag_engine.base import CAGTechnique, CAGRequest, ContextChunk
 from cag_engine.ollama_client import OllamaClient
 
@@ -5,9 +5,13 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import sys, os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 from cag_engine.ollama_client import OllamaClient
 from cag_engine.base import CAGRequest
+from cag_engine.response_cache import ResponseCache
 from tutor_rag import EducationalTutorCAG
 
 app = FastAPI(title="Educational Tutor API")
@@ -15,6 +19,7 @@ app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
 
 ollama_client = OllamaClient(host="http://localhost:11434")
 tutor = EducationalTutorCAG(ollama_client)
+response_cache = ResponseCache(path=os.path.join(os.path.dirname(__file__), "response_cache.json"))
 
 class QueryRequest(BaseModel):
     query: str
@@ -27,6 +32,10 @@ class QueryResponse(BaseModel):
     metadata: dict
     process_steps: list
 
+@app.on_event("shutdown")
+async def save_cache():
+    await response_cache.asave()
+
 @app.get("/")
 async def root():
     return {"app": "Educational Tutor", "technique": "Adaptive Difficulty CAG", "status": "running"}
@@ -34,7 +43,7 @@ async def root():
 @app.post("/process", response_model=QueryResponse)
 async def process_query(request: QueryRequest):
     """Tutor using Adaptive Difficulty CAG"""
-    try:
+    async def tutor_answer():
         cag_request = CAGRequest(query=request.query, context_limit=request.top_k)
         result = await tutor.process(cag_request)
         return QueryResponse(
@@ -42,7 +51,10 @@ async def process_query(request: QueryRequest):
             context=[{"content": c.content, "relevance": c.relevance_score, "source": c.source} for c in result.context_chunks],
             metadata=result.metadata,
             process_steps=[{"step": s.step_name, "description": s.description, "duration": s.duration_ms} for s in tutor.process_steps]
-        )
+        ).model_dump()
+    try:
+        cached = await response_cache.get_or_compute(f"{request.top_k}:{request.query}", tutor_answer)
+        return QueryResponse(**cached)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1,18 +1,31 @@
 
 import sys
 import os
+import re
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    import orjson
+except ImportError:  # optional: faster parsing of the model's JSON replies
+    orjson = None
+
 # Add shared path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 from cag_engine.ollama_client import OllamaClient
+from cag_engine.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 class AgentState(Enum):
     PLANNING = "planning"
     RETRIEVING = "retrieving"
@@ -29,9 +42,13 @@ class ReasoningStep:
     result: str
     status: str = "pending"
 
+_DEFAULT_PLAN = {"steps": ["Analyze query keywords", "Retrieve general context", "Synthesize specific answer"]}
+
 class AgenticCAG:
-    def __init__(self, ollama_client: OllamaClient):
+    def __init__(self, ollama_client: OllamaClient, plan_cache: Optional[ResponseCache] = None):
         self.client = ollama_client
+        # Plans keyed on the normalized query
+        self.plan_cache = plan_cache if plan_cache is not None else ResponseCache(max_size=2048)
         self.steps: List[ReasoningStep] = []
         self.current_state = AgentState.PLANNING
 
@@ -43,21 +60,17 @@ class AgenticCAG:
         plan = await self._plan(query)
         
         # 2. Execution (Retrieval + Reasoning)
-        context = []
-        for step in plan['steps']:
-            step_result = await self._execute_step(step, query, context)
-            context.append(step_result)
+        context = await self._execute_plan(plan, query)
             
         # 3. Final Answer Generation
         answer = await self._generate_answer(query, context)
         
-        # 4. Reflection / Self-Critique
-        critique = await self._reflect(query, answer)
+        # 4-5. Reflection / Self-Critique and Refinement (if needed) in one generation
+        critique, improved_answer = await self._reflect_and_refine(query, answer)
         
-        # 5. Refinement (if needed, simplified to 1 pass here)
         final_answer = answer
-        if critique['needs_improvement']:
-            final_answer = await self._refine_answer(query, answer, critique)
+        if critique['needs_improvement'] and improved_answer:
+            final_answer = improved_answer
 
         return {
             "query": query,
@@ -68,21 +81,45 @@ class AgenticCAG:
             "context_used": context
         }
 
-    async def _plan(self, query: str) -> Dict[str, Any]:
-        """Decompose query into actionable steps."""
-        prompt = f"""You are a research planner. Break down this query into 3-4 distinct research steps.
-Query: {query}
-Return ONLY JSON format: {{ "steps": [ "step 1", "step 2", ... ] }}"""
+    async def run_stream(self, query: str) -> AsyncIterator[Dict[str, Any]]:
+        """Run the agentic loop, yielding progress events and streaming the answer tokens."""
+        self.steps = []
         
-        response, _ = await self.client.generate(prompt)
+        plan = await self._plan(query)
+        yield {"event": "plan", "steps": plan['steps']}
         
-        # Simple parsing (robustness would use strict JSON mode or repair)
+        context = await self._execute_plan(plan, query)
+        yield {"event": "context", "steps": [s.__dict__ for s in self.steps]}
+        
+        # Only the answer is streamed; plan and critique need complete JSON
+        chunks = []
+        async for token in self.client.stream_generate(self._answer_prompt(query, context)):
+            chunks.append(token)
+            yield {"event": "token", "content": token}
+        answer = "".join(chunks)
+        
+        critique, improved_answer = await self._reflect_and_refine(query, answer)
+        final_answer = answer
+        if critique['needs_improvement'] and improved_answer:
+            final_answer = improved_answer
+        
+        yield {
+            "event": "done",
+            "query": query,
+            "answer": final_answer,
+            "original_answer": answer,
+            "critique": critique,
+            "steps": [s.__dict__ for s in self.steps]
+        }
+
+    async def _plan(self, query: str) -> Dict[str, Any]:
+        """Decompose query into actionable steps."""
+        normalized = re.sub(r"\s+", " ", query.lower()).strip()
         try:
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            plan = json.loads(response[start:end])
-        except:
-            plan = {"steps": ["Analyze query keywords", "Retrieve general context", "Synthesize specific answer"]}
+            # Unparseable plans raise, so the default plan is never cached
+            plan = await self.plan_cache.get_or_compute(normalized, lambda: self._generate_plan(query))
+        except ValueError:
+            plan = _DEFAULT_PLAN
             
         self.steps.append(ReasoningStep(
             step_id=1, name="Planning", description="Decompose query",
@@ -91,60 +128,75 @@ Return ONLY JSON format: {{ "steps": [ "step 1", "step 2", ... ] }}"""
         ))
         return plan
 
-    async def _execute_step(self, step_name: str, query: str, context: List[str]) -> str:
-        """Execute a single planned step."""
-        context_str = "\n".join(context)
+    async def _generate_plan(self, query: str) -> Dict[str, Any]:
+        prompt = f"""You are a research planner. Break down this query into 3-4 distinct research steps.
+Query: {query}
+Return ONLY JSON format: {{ "steps": [ "step 1", "step 2", ... ] }}"""
+        
+        # JSON mode constrains decoding to a valid JSON object
+        response, _ = await self.client.generate(prompt, format="json")
+        plan = _json_loads(response)
+        if not isinstance(plan, dict) or not isinstance(plan.get('steps'), list):
+            raise ValueError("Plan JSON has no 'steps' list")
+        return plan
+
+    async def _execute_plan(self, plan: Dict[str, Any], query: str) -> List[str]:
+        """Run the planned sub-tasks concurrently (they are independent) and return their results in plan order."""
+        context = list(await asyncio.gather(*(
+            self._execute_step(step, query, step_id=i + 2)
+            for i, step in enumerate(plan['steps'])
+        )))
+        self.steps.sort(key=lambda s: s.step_id)
+        return context
+
+    async def _execute_step(self, step_name: str, query: str, step_id: int) -> str:
+        """Execute a single planned step (independently of the other steps)."""
         prompt = f"""Perform this research step: {step_name}
-Context so far: {context_str}
 Goal for this step: Retrieve or derive information relevant to the main query: {query}."""
         
         response, _ = await self.client.generate(prompt)
         
         self.steps.append(ReasoningStep(
-            step_id=len(self.steps) + 1, name="Execution", description=step_name,
+            step_id=step_id, name="Execution", description=step_name,
             thought_process=f"Executing sub-task: {step_name}",
             result=response[:200] + "...", status="completed"
         ))
         return response
 
-    async def _generate_answer(self, query: str, context: List[str]) -> str:
-        """Synthesize final answer."""
+    def _answer_prompt(self, query: str, context: List[str]) -> str:
         context_str = "\n\n".join(context)
-        prompt = f"""Synthesize a comprehensive answer for: "{query}"
+        return f"""Synthesize a comprehensive answer for: "{query}"
 Based on these findings:
 {context_str}"""
-        
-        response, _ = await self.client.generate(prompt)
+
+    async def _generate_answer(self, query: str, context: List[str]) -> str:
+        """Synthesize final answer."""
+        response, _ = await self.client.generate(self._answer_prompt(query, context))
         return response
 
-    async def _reflect(self, query: str, answer: str) -> Dict[str, Any]:
-        """Critique the answer."""
+    async def _reflect_and_refine(self, query: str, answer: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Critique the answer and, if it falls short, return an improved one."""
         prompt = f"""Critique this answer for accuracy, completeness, and clarity.
+If the score is below 7, also write an improved answer that fixes the issues.
 Query: {query}
 Answer: {answer}
-Return ONLY JSON: {{ "score": <0-10>, "critique": "...", "needs_improvement": <bool> }}"""
+Return ONLY JSON: {{ "score": <0-10>, "critique": "...", "needs_improvement": <bool>, "improved_answer": "..." or null }}"""
         
-        response, _ = await self.client.generate(prompt)
+        response, _ = await self.client.generate(prompt, format="json")
         try:
-            start = response.find('{')
-            end = response.rfind('}') + 1
-            critique = json.loads(response[start:end])
-        except:
+            critique = _json_loads(response)
+            if not isinstance(critique, dict):
+                raise ValueError("Critique JSON is not an object")
+        except ValueError:
             critique = {"score": 5, "critique": "Could not parse critique.", "needs_improvement": False}
+        
+        improved_answer = critique.pop("improved_answer", None)
+        if not isinstance(improved_answer, str):
+            improved_answer = None
             
         self.steps.append(ReasoningStep(
             step_id=len(self.steps) + 1, name="Reflection", description="Self-Critique",
             thought_process="Evaluating answer quality.",
             result=f"Score: {critique['score']}, Issues: {critique.get('critique', 'None')}", status="completed"
         ))
-        return critique
-
-    async def _refine_answer(self, query: str, answer: str, critique: Dict[str, Any]) -> str:
-        prompt = f"""Refine this answer based on the critique.
-Query: {query}
-Original Answer: {answer}
-Critique: {critique.get('critique')}
-Improved Answer:"""
-        
-        response, _ = await self.client.generate(prompt)
-        return response
+        return critique, improved_answer
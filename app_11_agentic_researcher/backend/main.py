@@ -1,13 +1,24 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 import sys
 import os
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: faster response serialization
+    orjson = None
 
 # Add shared path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 from cag_engine.ollama_client import OllamaClient
+from cag_engine.response_cache import ResponseCache
 from agent_engine import AgenticCAG
 
 
@@ -32,7 +43,10 @@ def select_best_model(ollama_client):
         return "llama3"
 
 
-app = FastAPI(title="Agentic Research Assistant API")
+app = FastAPI(
+    title="Agentic Research Assistant API",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,7 +61,20 @@ ollama_client = OllamaClient(host="http://localhost:11434")
 selected_model = select_best_model(ollama_client)
 ollama_client.model = selected_model
 print(f"Agentic Researcher selected model: {selected_model}")
-agent = AgenticCAG(ollama_client)
+agent = AgenticCAG(
+    ollama_client,
+    plan_cache=ResponseCache(
+        embed=ollama_client.embed,
+        max_size=2048,
+        threshold=0.9,
+        path=os.path.join(os.path.dirname(__file__), "plan_cache.json")
+    )
+)
+# Exact + embedding-similarity cache over finished research runs
+response_cache = ResponseCache(
+    embed=ollama_client.embed,
+    path=os.path.join(os.path.dirname(__file__), "response_cache.json")
+)
 
 class QueryRequest(BaseModel):
     query: str
@@ -58,6 +85,11 @@ class QueryResponse(BaseModel):
     steps: list
     critique: dict
 
+@app.on_event("shutdown")
+async def save_cache():
+    await response_cache.asave()
+    await agent.plan_cache.asave()
+
 @app.get("/")
 async def root():
     return {"app": "Agentic Research Assistant", "status": "running"}
@@ -65,7 +97,9 @@ async def root():
 @app.post("/research", response_model=QueryResponse)
 async def research(request: QueryRequest):
     try:
-        result = await agent.run(request.query)
+        result = await response_cache.get_or_compute(
+            request.query, lambda: agent.run(request.query)
+        )
         return QueryResponse(
             query=request.query,
             answer=result["answer"],
@@ -75,6 +109,18 @@ async def research(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/research/stream")
+async def research_stream(request: QueryRequest):
+    """Server-sent events: plan/context progress, answer tokens, then a final 'done' event."""
+    async def events():
+        try:
+            async for event in agent.run_stream(request.query):
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'event': 'error', 'detail': str(e)})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8011)
@@ -1,46 +1,109 @@
 
+import array
 import json
-import networkx as nx
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
+
+try:
+    import orjson
+except ImportError:  # optional: faster parsing of the model's JSON replies
+    orjson = None
 
 from cag_engine.ollama_client import OllamaClient
+from cag_engine.response_cache import ResponseCache
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+_json_dumps = orjson.dumps if orjson is not None else (lambda obj: json.dumps(obj).encode("utf-8"))
+
+_TRIPLE_KEYS = ("subject", "predicate", "object")
 
 class GraphEngine:
-    def __init__(self, ollama_client: OllamaClient):
+    def __init__(self, ollama_client: OllamaClient, cache: Optional[ResponseCache] = None):
         self.client = ollama_client
-        self.graph = nx.DiGraph()
+        # Struct-of-arrays graph: node ids plus parallel edge columns
+        self._ids: List[str] = []
+        self._id2idx: Dict[str, int] = {}
+        self._src = array.array('i')
+        self._dst = array.array('i')
+        self._rel: List[str] = []
+        # (src, dst) -> edge position; like DiGraph, a repeated edge keeps its slot and takes the new relation
+        self._edge_pos: Dict[Tuple[int, int], int] = {}
+        # D3 payload (dict and encoded bytes), rebuilt only after the graph changes
+        self._cached_data: Optional[Dict[str, Any]] = None
+        self._cached_payload: Optional[bytes] = None
+        # Extracted triples keyed on the exact input text
+        self.cache = cache if cache is not None else ResponseCache()
 
     async def extract_knowledge(self, text: str) -> Dict[str, Any]:
         """Extract entities and relations from text using LLM."""
         prompt = f"""Extract knowledge graph triples from this text.
 Text: "{text}"
-Return ONLY a JSON list of objects: [{{ "subject": "Entity1", "predicate": "relation", "object": "Entity2" }}, ...]
+Return ONLY a JSON object: {{ "triples": [{{ "subject": "Entity1", "predicate": "relation", "object": "Entity2" }}, ...] }}
 Do not include explanation."""
         
-        response, _ = await self.client.generate(prompt)
-        
+        raw = {}
+
+        async def extract():
+            # JSON mode constrains decoding to a valid JSON object
+            response, _ = await self.client.generate(prompt, format="json")
+            raw["response"] = response
+            parsed = _json_loads(response)
+            triples = parsed.get("triples") if isinstance(parsed, dict) else parsed
+            if not isinstance(triples, list):
+                raise ValueError("Response has no 'triples' list")
+            for t in triples:
+                if not (isinstance(t, dict) and all(isinstance(t.get(k), str) for k in _TRIPLE_KEYS)):
+                    raise ValueError(f"Malformed triple: {t!r}")
+            return triples
+
         try:
-            # Clean response (remove markdown code blocks if any)
-            clean_resp = response.replace("```json", "").replace("```", "").strip()
-            triples = json.loads(clean_resp)
+            # Parse failures raise inside extract(), so they are never cached
+            triples = await self.cache.get_or_compute(text, extract)
             self._add_triples(triples)
             return {"triples": triples, "graph_stats": self.get_stats()}
-        except Exception as e:
-            return {"error": str(e), "raw_response": response}
+        except (ValueError, KeyError, TypeError) as e:
+            return {"error": str(e), "raw_response": raw.get("response")}
+
+    def _node_index(self, node: str) -> int:
+        idx = self._id2idx.get(node)
+        if idx is None:
+            idx = self._id2idx[node] = len(self._ids)
+            self._ids.append(node)
+        return idx
 
     def _add_triples(self, triples: List[Dict]):
-        for t in triples:
-            self.graph.add_edge(t['subject'], t['object'], relation=t['predicate'])
+        # Read every triple before touching the graph, so a bad one changes nothing
+        new_edges = [(t['subject'], t['object'], t['predicate']) for t in triples]
+        self._cached_data = None
+        self._cached_payload = None
+        for subject, obj, relation in new_edges:
+            edge = (self._node_index(subject), self._node_index(obj))
+            pos = self._edge_pos.get(edge)
+            if pos is None:
+                self._edge_pos[edge] = len(self._rel)
+                self._src.append(edge[0])
+                self._dst.append(edge[1])
+                self._rel.append(relation)
+            else:
+                self._rel[pos] = relation
 
     def get_graph_data(self) -> Dict[str, Any]:
         """Return graph data in D3/force-graph format."""
-        nodes = [{"id": n, "label": n} for n in self.graph.nodes()]
-        links = [{"source": u, "target": v, "label": d.get('relation', '')} 
-                 for u, v, d in self.graph.edges(data=True)]
-        return {"nodes": nodes, "links": links}
+        if self._cached_data is None:
+            ids = self._ids
+            nodes = [{"id": n, "label": n} for n in ids]
+            links = [{"source": ids[s], "target": ids[d], "label": r}
+                     for s, d, r in zip(self._src, self._dst, self._rel)]
+            self._cached_data = {"nodes": nodes, "links": links}
+        return self._cached_data
+
+    def get_graph_data_bytes(self) -> bytes:
+        """Return the D3 payload pre-encoded as JSON."""
+        if self._cached_payload is None:
+            self._cached_payload = _json_dumps(self.get_graph_data())
+        return self._cached_payload
 
     def get_stats(self):
         return {
-            "num_nodes": self.graph.number_of_nodes(),
-            "num_edges": self.graph.number_of_edges()
+            "num_nodes": len(self._ids),
+            "num_edges": len(self._rel)
         }
@@ -1,13 +1,23 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from pydantic import BaseModel
 import sys
 import os
 
+try:
+    import orjson
+except ImportError:  # optional: faster response serialization
+    orjson = None
+
 # Add shared path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 from cag_engine.ollama_client import OllamaClient
+from cag_engine.response_cache import ResponseCache
 from graph_engine import GraphEngine
 
 
@@ -32,7 +42,10 @@ def select_best_model(ollama_client):
         return "llama3"
 
 
-app = FastAPI(title="GraphRAG Explorer API")
+app = FastAPI(
+    title="GraphRAG Explorer API",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -46,7 +59,10 @@ ollama_client = OllamaClient(host="http://localhost:11434")
 selected_model = select_best_model(ollama_client)
 ollama_client.model = selected_model
 print(f"GraphRAG Explorer selected model: {selected_model}")
-graph = GraphEngine(ollama_client)
+graph = GraphEngine(
+    ollama_client,
+    cache=ResponseCache(path=os.path.join(os.path.dirname(__file__), "response_cache.json"))
+)
 
 class TextQuery(BaseModel):
     text: str
@@ -55,6 +71,10 @@ class GraphResponse(BaseModel):
     triples: list
     message: str
 
+@app.on_event("shutdown")
+async def save_cache():
+    await graph.cache.asave()
+
 @app.get("/")
 async def root():
     return {"app": "GraphRAG Explorer", "version": "1.0.0"}
@@ -69,7 +89,8 @@ async def extract_graph(request: TextQuery):
 
 @app.get("/graph")
 async def get_graph():
-    return graph.get_graph_data()
+    # Served from the engine's cached encoding; re-encoded only after new triples
+    return Response(content=graph.get_graph_data_bytes(), media_type="application/json")
 
 @app.get("/health")
 async def health():
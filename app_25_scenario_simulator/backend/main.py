@@ -10,7 +10,10 @@ import os
 import re
 import sys
 
-sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", "..", "shared"))
 
 from cag_engine.ollama_client import OllamaClient
 
@@ -65,10 +65,14 @@ def create_backend_main(app):
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from functools import lru_cache
 import sys
 import os
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
 from cag_engine.ollama_client import OllamaClient
 
@@ -84,6 +88,30 @@ app.add_middleware(
 
 ollama_client = OllamaClient(base_url="http://ollama:11434")
 
+PROMPT_TMPL = """You are a {app["title"].lower()}. Process the following query:
+
+Query: {{query}}
+
+Context:
+{{ctx}}
+
+Provide a comprehensive response."""
+
+
+@lru_cache(maxsize=32)
+def _static_ctx(k: int) -> tuple:
+    """Placeholder context items for top_k=k, built once per k."""
+    return tuple(
+        {{"type": "context_item", "content": f"Context {{i+1}} for query", "relevance": round(0.9 - i*0.1, 4)}}
+        for i in range(k)
+    )
+
+
+@lru_cache(maxsize=32)
+def _static_ctx_text(k: int) -> str:
+    """Bullet list of the placeholder context for the prompt."""
+    return "\\n".join(f"- {{c['content']}}" for c in _static_ctx(k))
+
 
 class QueryRequest(BaseModel):
     query: str
@@ -112,19 +140,9 @@ async def process_query(request: QueryRequest):
     """Process query using {app["technique"]}"""
     try:
         # Simulate CAG processing
-        context = [
-            {{"type": "context_item", "content": f"Context {{i+1}} for query", "relevance": 0.9 - i*0.1}}
-            for i in range(request.top_k)
-        ]
+        context = list(_static_ctx(request.top_k))
         
-        prompt = f"""You are a {app["title"].lower()}. Process the following query:
-
-Query: {{request.query}}
-
-Context:
-{{chr(10).join([f"- {{c['content']}}" for c in context])}}
-
-Provide a comprehensive response."""
+        prompt = PROMPT_TMPL.format(query=request.query, ctx=_static_ctx_text(request.top_k))
         
         response = ollama_client.generate(prompt=prompt, model="{app["model"]}")
         
@@ -4,338 +4,283 @@ Script to generate remaining CAG applications (Apps 3-10)
 
 import os
 import json
+import hashlib
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache
+
+try:
+    import orjson
+except ImportError:  # optional: faster package.json serialization
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional: rendered-output cache falls back to zlib
+    zstandard = None
+
+
+@dataclass(frozen=True, slots=True)
+class AppConfig:
+    """Settings for one generated app"""
+    num: int
+    name: str
+    title: str
+    technique: str
+    port: int
+    model: str
+    icon: str
+
 
 # App configurations
 APPS = [
-    {
-        "num": 3,
-        "name": "code_reviewer",
-        "title": "Code Review Bot",
-        "technique": "AST-based Context Augmentation",
-        "port": 8003,
-        "model": "codellama",
-        "icon": "Code"
-    },
-    {
-        "num": 4,
-        "name": "support_agent",
-        "title": "Customer Support Agent",
-        "technique": "Conversational CAG with Memory",
-        "port": 8004,
-        "model": "llama3",
-        "icon": "SupportAgent"
-    },
-    {
-        "num": 5,
-        "name": "financial_analyzer",
-        "title": "Financial Report Analyzer",
-        "technique": "Structured Data CAG",
-        "port": 8005,
-        "model": "llama3",
-        "icon": "AccountBalance"
-    },
-    {
-        "num": 6,
-        "name": "paper_summarizer",
-        "title": "Research Paper Summarizer",
-        "technique": "Hierarchical CAG",
-        "port": 8006,
-        "model": "llama3",
-        "icon": "Description"
-    },
-    {
-        "num": 7,
-        "name": "product_recommender",
-        "title": "E-commerce Product Recommender",
-        "technique": "Hybrid CAG",
-        "port": 8007,
-        "model": "llama3",
-        "icon": "ShoppingCart"
-    },
-    {
-        "num": 8,
-        "name": "educational_tutor",
-        "title": "Educational Tutor",
-        "technique": "Adaptive CAG",
-        "port": 8008,
-        "model": "llama3",
-        "icon": "School"
-    },
-    {
-        "num": 9,
-        "name": "compliance_checker",
-        "title": "Contract Compliance Checker",
-        "technique": "Rule-based CAG",
-        "port": 8009,
-        "model": "llama3",
-        "icon": "Gavel"
-    },
-    {
-        "num": 10,
-        "name": "fact_checker",
-        "title": "News Fact Checker",
-        "technique": "Multi-source CAG",
-        "port": 8010,
-        "model": "llama3",
-        "icon": "FactCheck"
-    }
+    AppConfig(3, "code_reviewer", "Code Review Bot", "AST-based Context Augmentation", 8003, "codellama", "Code"),
+    AppConfig(4, "support_agent", "Customer Support Agent", "Conversational CAG with Memory", 8004, "llama3", "SupportAgent"),
+    AppConfig(5, "financial_analyzer", "Financial Report Analyzer", "Structured Data CAG", 8005, "llama3", "AccountBalance"),
+    AppConfig(6, "paper_summarizer", "Research Paper Summarizer", "Hierarchical CAG", 8006, "llama3", "Description"),
+    AppConfig(7, "product_recommender", "E-commerce Product Recommender", "Hybrid CAG", 8007, "llama3", "ShoppingCart"),
+    AppConfig(8, "educational_tutor", "Educational Tutor", "Adaptive CAG", 8008, "llama3", "School"),
+    AppConfig(9, "compliance_checker", "Contract Compliance Checker", "Rule-based CAG", 8009, "llama3", "Gavel"),
+    AppConfig(10, "fact_checker", "News Fact Checker", "Multi-source CAG", 8010, "llama3", "FactCheck")
 ]
 
 
-def create_backend_main(app):
-    """Generate backend main.py"""
-    return f'''"""
-{app["title"]} Backend
-{app["technique"]}
+# Backend main.py, identical for every app: the FastAPI app itself lives in
+# cag_engine.scaffold and the per-app settings in backend/config.json
+BACKEND_MAIN = '''"""
+Scaffolded CAG app backend (settings in config.json, app in cag_engine.scaffold)
 """
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
 import sys
 import os
 
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
-
-from cag_engine.ollama_client import OllamaClient
-
-app = FastAPI(title="{app["title"]} API")
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-ollama_client = OllamaClient(base_url="http://ollama:11434")
-
+try:
+    import cag_engine  # installed with `pip install -e shared`
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'shared'))
 
-class QueryRequest(BaseModel):
-    query: str
-    top_k: int = 5
+from cag_engine.scaffold import create_app, load_config
 
-
-class QueryResponse(BaseModel):
-    query: str
-    response: str
-    context: list
-    metadata: dict
-    process_steps: list
-
-
-@app.get("/")
-async def root():
-    return {{
-        "app": "{app["title"]}",
-        "technique": "{app["technique"]}",
-        "status": "running"
-    }}
-
-
-@app.post("/process", response_model=QueryResponse)
-async def process_query(request: QueryRequest):
-    """Process query using {app["technique"]}"""
-    try:
-        # Simulate CAG processing
-        context = [
-            {{"type": "context_item", "content": f"Context {{i+1}} for query", "relevance": 0.9 - i*0.1}}
-            for i in range(request.top_k)
-        ]
-        
-        prompt = f"""You are a {app["title"].lower()}. Process the following query:
-
-Query: {{request.query}}
-
-Context:
-{{chr(10).join([f"- {{c['content']}}" for c in context])}}
-
-Provide a comprehensive response."""
-        
-        response = ollama_client.generate(prompt=prompt, model="{app["model"]}")
-        
-        process_steps = [
-            {{"step": "context_retrieval", "description": "Retrieved relevant context"}},
-            {{"step": "augmentation", "description": "Augmented prompt with context"}},
-            {{"step": "generation", "description": "Generated response with LLM"}}
-        ]
-        
-        return QueryResponse(
-            query=request.query,
-            response=response,
-            context=context,
-            metadata={{"model": "{app["model"]}", "technique": "{app["technique"]}"}},
-            process_steps=process_steps
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-
-@app.get("/health")
-async def health():
-    return {{"status": "healthy"}}
+config = load_config(os.environ.get("APP_CONFIG", os.path.join(os.path.dirname(__file__), "config.json")))
+app = create_app(config)
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port={app["port"]})
+    uvicorn.run(app, host="0.0.0.0", port=config["port"])
 '''
 
-
-def create_frontend_app(app):
-    """Generate frontend App.js"""
-    return f'''import React, {{ useState }} from 'react';
-import {{
+# Frontend template. Jinja uses [[ ]] / [% %] delimiters because the generated
+# JSX is full of literal {{ ... }} style objects.
+FRONTEND_APP_TEMPLATE = '''import React, { useState } from 'react';
+import {
   Container, TextField, Button, Paper, Typography, Box,
   CircularProgress, Card, CardContent, Chip, Alert
-}} from '@mui/material';
-import {{ {app["icon"]} }} from '@mui/icons-material';
+} from '@mui/material';
+import { [[ app.icon ]] } from '@mui/icons-material';
 import axios from 'axios';
 
-const API_BASE_URL = 'http://localhost:{app["port"]}';
+const API_BASE_URL = 'http://localhost:[[ app.port ]]';
 
-function App() {{
+function App() {
   const [query, setQuery] = useState('');
   const [loading, setLoading] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState(null);
 
-  const handleSubmit = async () => {{
-    if (!query.trim()) {{
+  const handleSubmit = async () => {
+    if (!query.trim()) {
       setError('Please enter a query');
       return;
-    }}
+    }
 
     setLoading(true);
     setError(null);
     setResult(null);
 
-    try {{
-      const response = await axios.post(`${{API_BASE_URL}}/process`, {{
+    try {
+      const response = await axios.post(`${API_BASE_URL}/process`, {
         query: query,
         top_k: 5
-      }});
+      });
 
       setResult(response.data);
-    }} catch (err) {{
+    } catch (err) {
       setError(err.response?.data?.detail || 'Failed to process query');
-    }} finally {{
+    } finally {
       setLoading(false);
-    }}
-  }};
+    }
+  };
 
   return (
-    <Container maxWidth="lg" sx={{{{ py: 4 }}}}>
-      <Box sx={{{{ textAlign: 'center', mb: 4 }}}}>
-        <{app["icon"]} sx={{{{ fontSize: 60, color: 'primary.main', mb: 2 }}}} />
+    <Container maxWidth="lg" sx={{ py: 4 }}>
+      <Box sx={{ textAlign: 'center', mb: 4 }}>
+        <[[ app.icon ]] sx={{ fontSize: 60, color: 'primary.main', mb: 2 }} />
         <Typography variant="h3" component="h1" gutterBottom>
-          {app["title"]}
+          [[ app.title ]]
         </Typography>
         <Typography variant="subtitle1" color="text.secondary">
-          {app["technique"]}
+          [[ app.technique ]]
         </Typography>
-        <Chip label="CAG Application" color="primary" sx={{{{ mt: 1 }}}} />
+        <Chip label="CAG Application" color="primary" sx={{ mt: 1 }} />
       </Box>
 
-      <Paper elevation={3} sx={{{{ p: 4, mb: 3 }}}}>
+      <Paper elevation=3 sx={{ p: 4, mb: 3 }}>
         <TextField
           fullWidth
           multiline
-          rows={4}
+          rows=4
           label="Enter Your Query"
           placeholder="Type your question here..."
-          value={{query}}
-          onChange={{(e) => setQuery(e.target.value)}}
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
           variant="outlined"
-          sx={{{{ mb: 2 }}}}
+          sx={{ mb: 2 }}
         />
         <Button
           variant="contained"
           size="large"
-          onClick={{handleSubmit}}
-          disabled={{loading}}
+          onClick={handleSubmit}
+          disabled={loading}
           fullWidth
-          startIcon={{loading ? <CircularProgress size={{20}} /> : <{app["icon"]} />}}
+          startIcon={loading ? <CircularProgress size={20} /> : <[[ app.icon ]] />}
         >
-          {{loading ? 'Processing...' : 'Submit'}}
+          {loading ? 'Processing...' : 'Submit'}
         </Button>
       </Paper>
 
-      {{error && (
-        <Alert severity="error" sx={{{{ mb: 3 }}}}>
-          {{error}}
+      {error && (
+        <Alert severity="error" sx={{ mb: 3 }}>
+          {error}
         </Alert>
-      )}}
+      )}
 
-      {{result && (
+      {result && (
         <>
-          <Paper elevation={2} sx={{{{ p: 3, mb: 3 }}}}>
+          <Paper elevation=2 sx={{ p: 3, mb: 3 }}>
             <Typography variant="h6" gutterBottom>
               Response
             </Typography>
-            <Typography variant="body1" sx={{{{ whiteSpace: 'pre-wrap' }}}}>
-              {{result.response}}
+            <Typography variant="body1" sx={{ whiteSpace: 'pre-wrap' }}>
+              {result.response}
             </Typography>
           </Paper>
 
-          <Paper elevation={2} sx={{{{ p: 3, mb: 3 }}}}>
+          <Paper elevation=2 sx={{ p: 3, mb: 3 }}>
             <Typography variant="h6" gutterBottom>
               Context Used
             </Typography>
-            {{result.context.map((ctx, idx) => (
-              <Card key={{idx}} variant="outlined" sx={{{{ mb: 1 }}}}>
+            {result.context.map((ctx, idx) => (
+              <Card key={idx} variant="outlined" sx={{ mb: 1 }}>
                 <CardContent>
                   <Typography variant="body2">
-                    {{ctx.content}}
+                    {ctx.content}
                   </Typography>
                   <Chip
-                    label={{`Relevance: ${{(ctx.relevance * 100).toFixed(0)}}%`}}
+                    label={`Relevance: ${(ctx.relevance * 100).toFixed(0)}%`}
                     size="small"
-                    sx={{{{ mt: 1 }}}}
+                    sx={{ mt: 1 }}
                   />
                 </CardContent>
               </Card>
-            ))}}
+            ))}
           </Paper>
 
-          <Paper elevation={1} sx={{{{ p: 2, bgcolor: '#fafafa' }}}}>
+          <Paper elevation=1 sx={{ p: 2, bgcolor: '#fafafa' }}>
             <Typography variant="caption" color="text.secondary">
-              Model: {{result.metadata.model}} | Technique: {{result.metadata.technique}}
+              Model: {result.metadata.model} | Technique: {result.metadata.technique}
             </Typography>
           </Paper>
         </>
-      )}}
+      )}
     </Container>
   );
-}}
+}
 
 export default App;
 '''
 
+# Compiled templates (and rendered output, under rendered/) are cached on disk so
+# re-runs skip parsing, compiling and rendering
+_BYTECODE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "cag_codegen")
+
+
+@lru_cache(maxsize=None)
+def get_templates():
+    """Build the Jinja environment once per process (lazily, so workers never pickle it)"""
+    os.makedirs(_BYTECODE_CACHE_DIR, exist_ok=True)
+    env = Environment(
+        loader=DictLoader({
+            "frontend_app.js.j2": FRONTEND_APP_TEMPLATE,
+        }),
+        bytecode_cache=FileSystemBytecodeCache(_BYTECODE_CACHE_DIR),
+        auto_reload=False,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+        variable_start_string="[[",
+        variable_end_string="]]",
+        block_start_string="[%",
+        block_end_string="%]",
+        comment_start_string="[#",
+        comment_end_string="#]",
+    )
+    return {
+        "frontend_app": env.get_template("frontend_app.js.j2"),
+    }
+
+
+def create_backend_main():
+    """Generate backend main.py (the same for every app)"""
+    return BACKEND_MAIN
+
+
+def create_backend_config(app):
+    """Generate backend config.json (encoded bytes)"""
+    config = {"title": app.title, "technique": app.technique, "model": app.model, "port": app.port}
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, indent=2).encode("utf-8")
+
+
+def create_frontend_app(app):
+    """Generate frontend App.js"""
+    return get_templates()["frontend_app"].render(app=app)
+
+
+# package.json shared by every generated frontend; only "name" differs per app
+_PKG_TEMPLATE = {
+    "name": "",
+    "version": "1.0.0",
+    "private": True,
+    "dependencies": {
+        "@mui/material": "^5.14.18",
+        "@mui/icons-material": "^5.14.18",
+        "@emotion/react": "^11.11.1",
+        "@emotion/styled": "^11.11.0",
+        "axios": "^1.6.2",
+        "react": "^18.2.0",
+        "react-dom": "^18.2.0",
+        "react-scripts": "5.0.1"
+    },
+    "scripts": {
+        "start": "react-scripts start",
+        "build": "react-scripts build",
+        "test": "react-scripts test"
+    }
+}
+
 
 def create_package_json(app):
-    """Generate package.json"""
-    return json.dumps({
-        "name": app["name"].replace("_", "-"),
-        "version": "1.0.0",
-        "private": True,
-        "dependencies": {
-            "@mui/material": "^5.14.18",
-            "@mui/icons-material": "^5.14.18",
-            "@emotion/react": "^11.11.1",
-            "@emotion/styled": "^11.11.0",
-            "axios": "^1.6.2",
-            "react": "^18.2.0",
-            "react-dom": "^18.2.0",
-            "react-scripts": "5.0.1"
-        },
-        "scripts": {
-            "start": "react-scripts start",
-            "build": "react-scripts build",
-            "test": "react-scripts test"
-        }
-    }, indent=2)
+    """Generate package.json (encoded bytes)"""
+    package = {**_PKG_TEMPLATE, "name": app.name.replace("_", "-")}
+    if orjson is not None:
+        return orjson.dumps(package, option=orjson.OPT_INDENT_2)
+    return json.dumps(package, indent=2).encode("utf-8")
 
 
 def create_requirements_txt():
@@ -347,34 +292,133 @@ requests==2.31.0
 """
 
 
+_BACKEND_MAIN_BYTES = create_backend_main().encode("utf-8")
+
+# Output locations inside an app directory, joined once instead of per file
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_BACKEND_MAIN_PATH = os.path.join("backend", "main.py")
+_BACKEND_CONFIG_PATH = os.path.join("backend", "config.json")
+_BACKEND_REQUIREMENTS_PATH = os.path.join("backend", "requirements.txt")
+_FRONTEND_APP_PATH = os.path.join("frontend", "src", "App.js")
+_FRONTEND_PACKAGE_PATH = os.path.join("frontend", "package.json")
+
+
+def _render_app(app):
+    """(path relative to the repo root, encoded contents) for every file of one app"""
+    app_dir = f"app_{app.num:02d}_{app.name}{os.sep}"
+    
+    return [
+        # Backend files
+        (app_dir + _BACKEND_MAIN_PATH, _BACKEND_MAIN_BYTES),
+        (app_dir + _BACKEND_CONFIG_PATH, create_backend_config(app)),
+        (app_dir + _BACKEND_REQUIREMENTS_PATH, create_requirements_txt().encode("utf-8")),
+        # Frontend files
+        (app_dir + _FRONTEND_APP_PATH, create_frontend_app(app).encode("utf-8")),
+        (app_dir + _FRONTEND_PACKAGE_PATH, create_package_json(app)),
+    ]
+
+
+# A stale or corrupt cache entry is never fatal, it is just re-rendered
+_RENDER_CACHE_ERRORS = (OSError, ValueError, EOFError, pickle.UnpicklingError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+@lru_cache(maxsize=None)
+def _generator_digest():
+    """Hash of this script, so editing any template or setting invalidates rendered output"""
+    with open(__file__, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).digest()
+
+
+def _cached_render(app):
+    """Rendered files for one app, reused from the on-disk cache when the inputs are unchanged"""
+    key = hashlib.blake2b(_generator_digest() + repr(app).encode("utf-8"), digest_size=16).hexdigest()
+    cache_path = os.path.join(_BYTECODE_CACHE_DIR, "rendered", key + (".zst" if zstandard else ".zlib"))
+    
+    try:
+        with open(cache_path, "rb") as f:
+            blob = f.read()
+        if zstandard is not None:
+            return pickle.loads(zstandard.ZstdDecompressor().decompress(blob))
+        return pickle.loads(zlib.decompress(blob))
+    except _RENDER_CACHE_ERRORS:
+        pass  # missing or unreadable entry: render it again
+    
+    files = _render_app(app)
+    blob = pickle.dumps(files, protocol=pickle.HIGHEST_PROTOCOL)
+    blob = zstandard.ZstdCompressor(level=1).compress(blob) if zstandard else zlib.compress(blob, 1)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # caching is best-effort
+    return files
+
+
+def _app_files(app):
+    """(absolute path, encoded contents) for every file generated for one app"""
+    base = _BASE_DIR + os.sep
+    return [(base + path, data) for path, data in _cached_render(app)]
+
+
+def _unchanged(path, data):
+    """True if `path` already holds exactly `data` (size check first, then contents)"""
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except FileNotFoundError:
+        return False
+
+
+def _write_files(writes):
+    """
+    Write files with raw os.write calls, creating directories only on demand.
+    Files whose contents are unchanged are left alone so their mtimes (and any
+    Docker layer or watcher state keyed on them) survive a re-run.
+    Returns the number of files written.
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+    written = 0
+    for path, data in writes:
+        if _unchanged(path, data):
+            continue
+        written += 1
+        try:
+            fd = os.open(path, flags, 0o644)
+        except FileNotFoundError:
+            # First run: the app's directories don't exist yet
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, flags, 0o644)
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+    return written
+
+
+def _emit_app(app):
+    """Render and write one app (runs in a worker process); returns (app, files written)"""
+    return app, _write_files(_app_files(app))
+
+
 def main():
     """Generate all remaining apps"""
-    base_dir = os.path.dirname(os.path.abspath(__file__))
+    # Compile the templates once up front: forked workers inherit them and
+    # spawned workers load the bytecode cache instead of each compiling
+    get_templates()
     
-    for app in APPS:
-        app_dir = os.path.join(base_dir, f"app_{app['num']:02d}_{app['name']}")
-        backend_dir = os.path.join(app_dir, "backend")
-        frontend_dir = os.path.join(app_dir, "frontend", "src")
-        
-        # Create directories
-        os.makedirs(backend_dir, exist_ok=True)
-        os.makedirs(frontend_dir, exist_ok=True)
-        
-        # Create backend files
-        with open(os.path.join(backend_dir, "main.py"), "w") as f:
-            f.write(create_backend_main(app))
-        
-        with open(os.path.join(backend_dir, "requirements.txt"), "w") as f:
-            f.write(create_requirements_txt())
-        
-        # Create frontend files
-        with open(os.path.join(frontend_dir, "App.js"), "w") as f:
-            f.write(create_frontend_app(app))
-        
-        with open(os.path.join(app_dir, "frontend", "package.json"), "w") as f:
-            f.write(create_package_json(app))
-        
-        print(f"✓ Created App {app['num']}: {app['title']}")
+    # Apps write to disjoint directories, so they are generated in parallel
+    with ProcessPoolExecutor(max_workers=min(len(APPS), os.cpu_count() or 1)) as executor:
+        for app, written in executor.map(_emit_app, APPS):
+            print(f"✓ Created App {app.num}: {app.title}" + ("" if written else " (unchanged)"))
     
     print(f"\\n✅ Successfully generated {len(APPS)} applications!")
 
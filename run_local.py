@@ -1,46 +1,82 @@
 
+import asyncio
 import os
 import subprocess
 import sys
 import argparse
-import time
+import hashlib
+import shutil
 import signal
 import webbrowser
 from pathlib import Path
 
 # Configuration
+_APP_NAMES = (
+    "unified_dashboard",
+    "app_01_legal_analyzer",
+    "app_02_medical_assistant",
+    "app_03_code_reviewer",
+    "app_04_support_agent",
+    "app_05_financial_analyzer",
+    "app_06_paper_summarizer",
+    "app_07_product_recommender",
+    "app_08_educational_tutor",
+    "app_09_compliance_checker",
+    "app_10_fact_checker",
+    "app_11_agentic_researcher",
+    "app_12_graph_rag",
+    "app_15_multi_agent_debater",
+    "app_16_self_reflective_coder",
+    "app_17_tree_of_thoughts_solver",
+    "app_18_dynamic_few_shot_writer",
+    "app_19_temporal_rag_forecaster",
+)
+
+
+def _app_number(name):
+    """App number from the directory name (the dashboard is app 0)"""
+    return int(name.split("_")[1]) if name.startswith("app_") else 0
+
+
+# Ports follow the app number: backend 80NN, frontend 30NN
 APPS = {
-    "0": {
-        "name": "unified_dashboard",
-        "port_backend": 8000,
-        "port_frontend": 3000
-    },
-    "1": {
-        "name": "app_01_legal_analyzer",
-        "port_backend": 8001,
-        "port_frontend": 3001,
-        "env_vars": {
-             "CHROMA_PERSIST_DIRECTORY": "./chroma_data_local"
-        }
-    },
-    "2": { "name": "app_02_medical_assistant", "port_backend": 8002, "port_frontend": 3002 },
-    "3": { "name": "app_03_code_reviewer", "port_backend": 8003, "port_frontend": 3003 },
-    "4": { "name": "app_04_support_agent", "port_backend": 8004, "port_frontend": 3004 },
-    "5": { "name": "app_05_financial_analyzer", "port_backend": 8005, "port_frontend": 3005 },
-    "6": { "name": "app_06_paper_summarizer", "port_backend": 8006, "port_frontend": 3006 },
-    "7": { "name": "app_07_product_recommender", "port_backend": 8007, "port_frontend": 3007 },
-    "8": { "name": "app_08_educational_tutor", "port_backend": 8008, "port_frontend": 3008 },
-    "9": { "name": "app_09_compliance_checker", "port_backend": 8009, "port_frontend": 3009 },
-    "10": { "name": "app_10_fact_checker", "port_backend": 8010, "port_frontend": 3010 },
-    "11": { "name": "app_11_agentic_researcher", "port_backend": 8011, "port_frontend": 3011 },
-    "12": { "name": "app_12_graph_rag", "port_backend": 8012, "port_frontend": 3012 },
-    "15": { "name": "app_15_multi_agent_debater", "port_backend": 8015, "port_frontend": 3015 },
-    "16": { "name": "app_16_self_reflective_coder", "port_backend": 8016, "port_frontend": 3016 },
-    "17": { "name": "app_17_tree_of_thoughts_solver", "port_backend": 8017, "port_frontend": 3017 },
-    "18": { "name": "app_18_dynamic_few_shot_writer", "port_backend": 8018, "port_frontend": 3018 },
-    "19": { "name": "app_19_temporal_rag_forecaster", "port_backend": 8019, "port_frontend": 3019 }
+    str(num): {"name": name, "port_backend": 8000 + num, "port_frontend": 3000 + num}
+    for num, name in ((_app_number(name), name) for name in _APP_NAMES)
+}
+APPS["1"]["env_vars"] = {
+    "CHROMA_PERSIST_DIRECTORY": "./chroma_data_local"
 }
 
+# Markers recording what was last installed (hash of the inputs that drive each install)
+_PIP_MARKER = ".cag_deps_installed"
+_NPM_MARKER = Path("node_modules") / ".cag_deps_installed"
+
+
+def _deps_key(*paths):
+    """Hash of the given files (missing files count as empty) and the interpreter"""
+    h = hashlib.sha256(f"{sys.executable}\0{sys.version}".encode())
+    for path in paths:
+        h.update(b"\0")
+        if path.exists():
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _marker_matches(marker, key):
+    try:
+        return marker.read_text() == key
+    except OSError:
+        return False
+
+
+def _pip_install_cmd():
+    """`uv pip install` against this interpreter when uv is available, else pip"""
+    uv = shutil.which("uv")
+    if uv:
+        return [uv, "pip", "install", "--python", sys.executable]
+    return [sys.executable, "-m", "pip", "install"]
+
+
 def install_dependencies(app_id):
     """Install dependencies for the specified app."""
     app_info = APPS[app_id]
@@ -48,36 +84,103 @@ def install_dependencies(app_id):
     
     print(f"Installing dependencies for {app_info['name']}...")
     
-    # 1. Shared Requirements
+    # Frontend Dependencies: npm runs in the background while pip works
+    frontend_dir = app_dir / "frontend"
+    npm_proc = None
+    npm_marker = frontend_dir / _NPM_MARKER
+    npm_key = _deps_key(frontend_dir / "package.json", frontend_dir / "package-lock.json")
+    if frontend_dir.exists() and _marker_matches(npm_marker, npm_key):
+        print("Frontend dependencies up to date, skipping npm install.")
+    elif frontend_dir.exists():
+        print("Installing frontend dependencies (npm)...")
+        # npm is a .cmd shim on Windows, so it needs the shell there
+        npm_proc = subprocess.Popen(["npm", "install"], cwd=str(frontend_dir), shell=(os.name == "nt"))
+    
+    # 1-2. Shared + Backend Requirements and the shared CAG engine package, resolved once
     shared_req = Path("shared/requirements.txt")
-    if shared_req.exists():
-        try:
-            print("Installing shared requirements...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", str(shared_req)])
-        except subprocess.CalledProcessError as e:
-            print(f"Warning: Failed to install some shared requirements: {e}. Continuing...")
-
-    # 2. Backend Requirements
     backend_req = app_dir / "backend" / "requirements.txt"
-    if backend_req.exists():
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", "-r", str(backend_req)])
-        except subprocess.CalledProcessError as e:
-             print(f"Warning: Failed to install backend requirements: {e}")
+    pip_install = _pip_install_cmd()
+    pip_cmd = list(pip_install)
+    for req in (shared_req, backend_req):
+        if req.exists():
+            pip_cmd += ["-r", str(req)]
+    pip_cmd += ["-e", "shared"]
+    pip_marker = app_dir / _PIP_MARKER
+    pip_key = _deps_key(shared_req, backend_req, Path("shared/pyproject.toml"))
+    pip_ok = True
+    
+    try:
+        if _marker_matches(pip_marker, pip_key):
+            print("Python dependencies up to date, skipping pip install.")
+            pip_key = None
+        else:
+            print("Installing shared and backend requirements...")
+            subprocess.check_call(pip_cmd)
+    except subprocess.CalledProcessError as e:
+        pip_ok = False
+        # Fall back to one install per source so a single bad pin doesn't block the rest
+        print(f"Warning: Combined install failed: {e}. Retrying each requirement source separately...")
+        for args, label in (
+            (["-r", str(shared_req)], "shared requirements"),
+            (["-e", "shared"], "the shared cag_engine package"),
+            (["-r", str(backend_req)], "backend requirements"),
+        ):
+            if args[0] == "-r" and not Path(args[1]).exists():
+                continue
+            try:
+                subprocess.check_call([*pip_install, *args])
+            except subprocess.CalledProcessError as e:
+                print(f"Warning: Failed to install {label}: {e}. Continuing...")
         
     # 3. Extra local requirements (not in docker-compose)
-    # Use only-binary for chromadb to avoid build issues on Windows
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "chromadb", "pypdf", "sentence-transformers", "--only-binary", ":all:"])
+    # Use only-binary for chromadb to avoid build issues on Windows (kept separate so
+    # the binary-only restriction doesn't apply to the requirements above)
+    try:
+        if pip_key is not None:
+            subprocess.check_call([*pip_install, "chromadb", "pypdf", "sentence-transformers", "--only-binary", ":all:"])
+            # Only a clean run is recorded, so a partial install is retried next time
+            if pip_ok:
+                pip_marker.write_text(pip_key)
+    finally:
+        # 4. Wait for the frontend install (even if pip failed, so npm isn't orphaned)
+        npm_returncode = npm_proc.wait() if npm_proc is not None else 0
     
-    # 4. Frontend Dependencies
-    frontend_dir = app_dir / "frontend"
-    if frontend_dir.exists():
-        print("Installing frontend dependencies (npm)...")
-        # Use shell=True for windows npm compatibility if needed
-        subprocess.check_call(["npm", "install"], cwd=str(frontend_dir), shell=True)
+    if npm_returncode != 0:
+        raise subprocess.CalledProcessError(npm_returncode, ["npm", "install"])
+    if npm_proc is not None:
+        npm_marker.write_text(npm_key)
+
+async def _wait_for_port(port, timeout=30, interval=0.1):
+    """Poll until something accepts TCP connections on localhost:`port`; False on timeout."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while loop.time() < deadline:
+        try:
+            _, writer = await asyncio.wait_for(asyncio.open_connection("127.0.0.1", port), interval)
+        except (OSError, asyncio.TimeoutError):
+            await asyncio.sleep(interval)
+            continue
+        writer.close()
+        return True
+    return False
+
+
+async def _stop_processes(processes, timeout=2):
+    """Terminate all children at once, then kill whatever outlives the timeout."""
+    running = [p for p in processes if p.returncode is None]
+    for p in running:
+        p.terminate()
+    try:
+        await asyncio.wait_for(asyncio.gather(*(p.wait() for p in running)), timeout)
+    except asyncio.TimeoutError:
+        for p in running:
+            if p.returncode is None:
+                p.kill()
+        await asyncio.gather(*(p.wait() for p in running))
+
 
-def run_app(app_id):
-    """Run the specified app (Backend + Frontend)."""
+async def run_app(app_id, prod=False):
+    """Run the specified app (Backend + Frontend); `prod` uses uvicorn workers instead of --reload."""
     app_info = APPS[app_id]
     app_dir = Path(app_info["name"])
     
@@ -91,6 +194,10 @@ def run_app(app_id):
     # Prevent browser auto-open
     env["BROWSER"] = "none"
     
+    # Treat SIGTERM like Ctrl+C so the children are stopped too (no signal handlers on Windows)
+    if os.name != "nt":
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    
     processes = []
     
     try:
@@ -101,23 +208,27 @@ def run_app(app_id):
             "main:app", 
             "--host", "0.0.0.0", 
             "--port", str(app_info['port_backend']),
-            "--reload"
         ]
-        backend_proc = subprocess.Popen(
-            backend_cmd, 
+        if prod:
+            # One worker per core and no per-request access logging; no file watcher
+            backend_cmd += ["--workers", str(os.cpu_count() or 1), "--no-access-log"]
+        else:
+            # Watch only the backend directory and ignore bytecode churn
+            backend_cmd += ["--reload", "--reload-dir", ".", "--reload-exclude", "*.pyc"]
+        backend_proc = await asyncio.create_subprocess_exec(
+            *backend_cmd, 
             cwd=str(app_dir / "backend"),
             env=env
         )
         processes.append(backend_proc)
         
-        # 2. Start Frontend
+        # 2. Start Frontend (resolved on PATH, so the npm.cmd shim also works on Windows)
         print(f"Starting Frontend for {app_info['name']}...")
-        frontend_cmd = ["npm", "start"]
-        frontend_proc = subprocess.Popen(
-            frontend_cmd, 
+        frontend_cmd = [shutil.which("npm") or "npm", "start"]
+        frontend_proc = await asyncio.create_subprocess_exec(
+            *frontend_cmd, 
             cwd=str(app_dir / "frontend"),
-            env=env,
-            shell=True
+            env=env
         )
         processes.append(frontend_proc)
         
@@ -126,29 +237,27 @@ def run_app(app_id):
         print(f"Frontend: http://localhost:{app_info['port_frontend']}")
         print("Press Ctrl+C to stop.")
         
-        # Open browser after a short delay
-        time.sleep(5)
-        webbrowser.open(f"http://localhost:{app_info['port_frontend']}")
+        # Open browser as soon as the dev server accepts connections
+        if await _wait_for_port(app_info['port_frontend']):
+            webbrowser.open(f"http://localhost:{app_info['port_frontend']}")
+        else:
+            print(f"Frontend not reachable on port {app_info['port_frontend']} yet; open it manually once it is up.")
         
-        # Keep alive
-        while True:
-            time.sleep(1)
+        # Keep alive until the services exit (or Ctrl+C): the event loop just waits on the children
+        await asyncio.gather(*(p.wait() for p in processes))
+        print("Services exited.")
             
-    except KeyboardInterrupt:
+    except asyncio.CancelledError:
+        # asyncio.run() cancels the main task on Ctrl+C
         print("\nStopping services...")
     finally:
-        for p in processes:
-            p.terminate()
-            # For Windows special handling if needed, but terminate usually works or user closes window
-            try:
-                p.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                p.kill()
+        await _stop_processes(processes)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run CAG apps locally without Docker")
     parser.add_argument("--app", type=str, default="1", help="App ID to run (default: 1)")
     parser.add_argument("--install", action="store_true", help="Install dependencies before running")
+    parser.add_argument("--prod", action="store_true", help="Run the backend with uvicorn workers instead of --reload")
     
     args = parser.parse_args()
     
@@ -159,4 +268,8 @@ if __name__ == "__main__":
     if args.install:
         install_dependencies(args.app)
         
-    run_app(args.app)
+    try:
+        asyncio.run(run_app(args.app, prod=args.prod))
+    except KeyboardInterrupt:
+        # Python < 3.11 raises Ctrl+C out of asyncio.run after the cleanup has run
+        pass
@@ -0,0 +1,6 @@
+"""
+Shared Context-Augmented Generation (CAG) engine.
+
+Install with `pip install -e shared` so apps import it from site-packages
+instead of extending sys.path.
+"""
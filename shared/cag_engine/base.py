@@ -7,23 +7,26 @@ from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+import asyncio
 import time
 import logging
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ContextChunk:
     """Represents a chunk of context retrieved for augmentation."""
     content: str
     source: str
     relevance_score: float
     metadata: Dict[str, Any] = field(default_factory=dict)
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: Optional[datetime] = None  # set by callers that need it
 
 
-@dataclass
+@dataclass(slots=True)
 class CAGRequest:
     """Request object for CAG processing."""
     query: str
@@ -35,7 +38,7 @@ class CAGRequest:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class CAGResponse:
     """Response object from CAG processing."""
     answer: str
@@ -47,23 +50,27 @@ class CAGResponse:
     metadata: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProcessStep:
     """Represents a step in the CAG process for visualization."""
     step_name: str
     description: str
-    start_time: float
-    end_time: Optional[float] = None
+    start_time: int  # time.perf_counter_ns()
+    end_time: Optional[int] = None
     status: str = "running"  # running, completed, failed
     details: Dict[str, Any] = field(default_factory=dict)
 
     @property
     def duration_ms(self) -> Optional[float]:
-        if self.end_time:
-            return (self.end_time - self.start_time) * 1000
+        if self.end_time is not None:
+            return (self.end_time - self.start_time) / 1e6
         return None
 
 
+# Returned by _start_step when step tracing is off; completing or failing it is a no-op
+_NULL_STEP = ProcessStep(step_name="", description="", start_time=0, end_time=0, status="skipped")
+
+
 class CAGTechnique(ABC):
     """Abstract base class for CAG techniques."""
 
@@ -71,31 +78,49 @@ class CAGTechnique(ABC):
         self.name = name
         self.config = config
         self.process_steps: List[ProcessStep] = []
+        # Step tracking feeds the process visualization; config {"trace_steps": False} skips it
+        self.trace_steps = config.get("trace_steps", True)
+        # get_process_visualization result, rebuilt only after a step changes
+        self._viz_cache: Optional[Dict[str, Any]] = None
+        self._total_duration_ms = 0.0
 
     def _start_step(self, step_name: str, description: str) -> ProcessStep:
         """Start tracking a process step."""
+        if not self.trace_steps:
+            return _NULL_STEP
         step = ProcessStep(
             step_name=step_name,
             description=description,
-            start_time=time.time()
+            start_time=time.perf_counter_ns()
         )
         self.process_steps.append(step)
-        logger.info(f"Started step: {step_name}")
+        self._viz_cache = None
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Started step: {step_name}")
         return step
 
     def _complete_step(self, step: ProcessStep, details: Optional[Dict[str, Any]] = None):
         """Mark a process step as completed."""
-        step.end_time = time.time()
+        if step is _NULL_STEP:
+            return
+        step.end_time = time.perf_counter_ns()
         step.status = "completed"
         if details:
             step.details.update(details)
-        logger.info(f"Completed step: {step.step_name} ({step.duration_ms:.2f}ms)")
+        self._total_duration_ms += step.duration_ms
+        self._viz_cache = None
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Completed step: {step.step_name} ({step.duration_ms:.2f}ms)")
 
     def _fail_step(self, step: ProcessStep, error: str):
         """Mark a process step as failed."""
-        step.end_time = time.time()
+        if step is _NULL_STEP:
+            return
+        step.end_time = time.perf_counter_ns()
         step.status = "failed"
         step.details["error"] = error
+        self._total_duration_ms += step.duration_ms
+        self._viz_cache = None
         logger.error(f"Failed step: {step.step_name} - {error}")
 
     @abstractmethod
@@ -157,17 +182,23 @@ class CAGTechnique(ABC):
         Returns:
             CAG response with answer and metadata
         """
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         self.process_steps = []  # Reset process steps
+        self._total_duration_ms = 0.0
+        self._viz_cache = None
         reasoning_steps = []
 
         try:
             # Step 1: Retrieve context
             step1 = self._start_step("retrieve_context", "Retrieving relevant context")
             context_chunks = await self.retrieve_context(request)
+            # Relevance scores gathered once for both the step metric and the confidence
+            relevance_scores = np.fromiter(
+                (c.relevance_score for c in context_chunks), dtype=np.float64, count=len(context_chunks)
+            )
             self._complete_step(step1, {
                 "num_chunks": len(context_chunks),
-                "avg_relevance": sum(c.relevance_score for c in context_chunks) / len(context_chunks) if context_chunks else 0
+                "avg_relevance": float(relevance_scores.mean()) if relevance_scores.size else 0
             })
             reasoning_steps.append(f"Retrieved {len(context_chunks)} relevant context chunks")
 
@@ -189,9 +220,9 @@ class CAGTechnique(ABC):
             reasoning_steps.append(f"Generated response using {token_usage.get('total', 0)} tokens")
 
             # Calculate confidence score (can be overridden by subclasses)
-            confidence_score = self._calculate_confidence(context_chunks, answer)
+            confidence_score = self._calculate_confidence(context_chunks, answer, relevance_scores)
 
-            latency_ms = (time.time() - start_time) * 1000
+            latency_ms = (time.perf_counter_ns() - start_time) / 1e6
 
             return CAGResponse(
                 answer=answer,
@@ -221,7 +252,8 @@ class CAGTechnique(ABC):
     def _calculate_confidence(
         self, 
         context_chunks: List[ContextChunk], 
-        answer: str
+        answer: str,
+        relevance_scores: Optional[np.ndarray] = None
     ) -> float:
         """
         Calculate confidence score for the response.
@@ -230,6 +262,7 @@ class CAGTechnique(ABC):
         Args:
             context_chunks: Retrieved context chunks
             answer: Generated answer
+            relevance_scores: The chunks' relevance scores, if already gathered
             
         Returns:
             Confidence score between 0 and 1
@@ -238,7 +271,11 @@ class CAGTechnique(ABC):
             return 0.3
         
         # Simple heuristic: average relevance of context chunks
-        avg_relevance = sum(c.relevance_score for c in context_chunks) / len(context_chunks)
+        if relevance_scores is None:
+            relevance_scores = np.fromiter(
+                (c.relevance_score for c in context_chunks), dtype=np.float64, count=len(context_chunks)
+            )
+        avg_relevance = float(relevance_scores.mean())
         
         # Adjust based on answer length (very short answers might be less confident)
         length_factor = min(len(answer) / 100, 1.0)
@@ -250,12 +287,16 @@ class CAGTechnique(ABC):
         Get visualization data for the CAG process.
         
         Returns:
-            Dictionary with process visualization data
+            Dictionary with process visualization data (shared between calls
+            until the next step change; treat it as read-only)
         """
-        return {
+        if self._viz_cache is not None:
+            return self._viz_cache
+
+        self._viz_cache = {
             "technique": self.name,
             "total_steps": len(self.process_steps),
-            "total_duration_ms": sum(s.duration_ms or 0 for s in self.process_steps),
+            "total_duration_ms": self._total_duration_ms,
             "steps": [
                 {
                     "name": s.step_name,
@@ -267,6 +308,7 @@ class CAGTechnique(ABC):
                 for s in self.process_steps
             ]
         }
+        return self._viz_cache
 
 
 class VectorStore(ABC):
@@ -287,7 +329,8 @@ class VectorStore(ABC):
         self, 
         query: str, 
         limit: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """
         Search for similar documents.
@@ -297,6 +340,28 @@ class VectorStore(ABC):
         """
         pass
 
+    async def batch_search(
+        self,
+        queries: List[str],
+        limit: int = 5,
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """
+        Search for several queries at once.
+
+        Stores that can answer many queries in one round trip should override this.
+
+        Returns:
+            List of result lists, one per query
+        """
+        if query_embeddings is None:
+            query_embeddings = [None] * len(queries)
+        return list(await asyncio.gather(
+            *(self.search(query, limit, filter_dict, embedding)
+              for query, embedding in zip(queries, query_embeddings))
+        ))
+
     @abstractmethod
     async def delete(self, ids: List[str]):
         """Delete documents by IDs."""
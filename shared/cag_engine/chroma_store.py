@@ -4,14 +4,102 @@ ChromaDB vector store implementation.
 
 import chromadb
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional, Tuple
+from chromadb.utils import embedding_functions
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable, Union
+import asyncio
+import inspect
+import json
 import logging
-import uuid
+import os
+import secrets
+from urllib.parse import urlparse
+import numpy as np
 from .base import VectorStore
+from .int8_store import Int8EmbeddingTable
+from .query_cache import QueryCache
+from .semantic_cache import SemanticCache
+from .similarity import (
+    dot_similarity,
+    int8_cosine_similarity,
+    normalize_rows,
+    quantize_int8,
+    top_k_indices,
+)
 
 logger = logging.getLogger(__name__)
 
 
+# HNSW build/search parameters applied when a collection is first created.
+# Chroma's defaults (M=16, search_ef=10) trade too much recall for large corpora.
+DEFAULT_HNSW_CONFIG = {
+    "hnsw:M": 32,
+    "hnsw:construction_ef": 200,
+    "hnsw:search_ef": 64,
+}
+
+# Collection metadata key set once every stored embedding is unit-length
+NORMALIZED_FLAG = "embeddings_normalized"
+
+
+# Model behind Chroma's DefaultEmbeddingFunction (ONNX); the sentence-transformers
+# build of it is used when embeddings run on a GPU
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+
+# One HTTP client per Chroma server, shared by every store (and collection) in the process
+_http_clients: Dict[Tuple[str, int, bool], Any] = {}
+
+
+def _get_http_client(url: str):
+    """Client for a Chroma server given as "http(s)://host:port" (or just "host")."""
+    parsed = urlparse(url if "://" in url else f"http://{url}")
+    ssl = parsed.scheme == "https"
+    key = (parsed.hostname, parsed.port or (443 if ssl else 8000), ssl)
+    client = _http_clients.get(key)
+    if client is None:
+        client = _http_clients[key] = chromadb.HttpClient(
+            host=key[0],
+            port=key[1],
+            ssl=ssl,
+            settings=Settings(anonymized_telemetry=False)
+        )
+    return client
+
+
+def _default_embedding_function(device: Optional[str] = None):
+    """
+    Chroma's default embedder, optionally on an accelerator.
+
+    Args:
+        device: Torch device such as "cuda" or "mps"; None keeps Chroma's CPU ONNX runtime
+
+    Returns:
+        Embedding function producing all-MiniLM-L6-v2 vectors either way, so
+        existing collections stay searchable when the device changes
+    """
+    if not device:
+        return embedding_functions.DefaultEmbeddingFunction()
+    return embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=DEFAULT_EMBEDDING_MODEL,
+        device=device,
+        normalize_embeddings=True
+    )
+
+
+def _filter_key(filter_dict: Optional[Dict[str, Any]]) -> str:
+    """Hashable, order-independent form of a metadata filter."""
+    return json.dumps(filter_dict, sort_keys=True, default=str)
+
+
+def _similarities(distances: List[List[float]]) -> List[List[float]]:
+    """Cosine distances from a query result converted to similarities, row by row."""
+    try:
+        return (1.0 - np.asarray(distances, dtype=np.float64)).tolist()
+    except ValueError:
+        # Ragged rows (queries that matched different numbers of documents)
+        return [(1.0 - np.asarray(row, dtype=np.float64)).tolist() for row in distances]
+
+
 class ChromaVectorStore(VectorStore):
     """ChromaDB implementation of vector store."""
 
@@ -19,29 +107,125 @@ class ChromaVectorStore(VectorStore):
         self,
         collection_name: str,
         persist_directory: str = "./chroma_db",
-        embedding_function=None
+        embedding_function=None,
+        rerank_oversample: int = 1,
+        hnsw_config: Optional[Dict[str, Any]] = None,
+        int8_rerank: bool = False,
+        coalesce_window_ms: float = 0.0,
+        semantic_cache: Optional[SemanticCache] = None,
+        exact_cache: Optional[QueryCache] = None,
+        chroma_host: Optional[str] = None,
+        embedding_device: Optional[str] = None
     ):
         self.collection_name = collection_name
         self.persist_directory = persist_directory
+        self.embedding_function = embedding_function or _default_embedding_function(
+            embedding_device or os.getenv("EMBEDDING_DEVICE")
+        )
+        # Fetch limit * rerank_oversample candidates and re-score them locally
+        self.rerank_oversample = max(1, rerank_oversample)
+        # Searches arriving within this window share one collection.query call (0 = off)
+        self.coalesce_window = coalesce_window_ms / 1000.0
+        self._pending: List[Tuple[str, int, Optional[Dict[str, Any]], Optional[List[float]], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+        # Results of near-duplicate queries are served from here (invalidated on writes)
+        self.semantic_cache = semantic_cache
+        # Exact repeats of a query text, checked before anything is embedded
+        self.exact_cache = exact_cache
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(
-            path=persist_directory,
-            settings=Settings(
-                anonymized_telemetry=False,
-                allow_reset=True
+        # Initialize ChromaDB client: a shared `chroma run` server when one is configured
+        # (one index in memory for every worker), otherwise an embedded on-disk store
+        chroma_host = chroma_host or os.getenv("CHROMA_HOST")
+        if chroma_host:
+            self.client = _get_http_client(chroma_host)
+        else:
+            self.client = chromadb.PersistentClient(
+                path=persist_directory,
+                settings=Settings(
+                    anonymized_telemetry=False,
+                    allow_reset=True
+                )
             )
-        )
         
-        # Get or create collection
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            embedding_function=embedding_function,
-            metadata={"hnsw:space": "cosine"}
-        )
+        # Get or create collection. Metadata is only passed on creation: chromadb
+        # 0.4's get_or_create overwrites an existing collection's metadata, which
+        # would drop the normalization flag on every start
+        try:
+            self.collection = self.client.get_collection(
+                name=collection_name,
+                embedding_function=self.embedding_function
+            )
+        except Exception:
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                embedding_function=self.embedding_function,
+                metadata={
+                    "hnsw:space": "cosine",
+                    **DEFAULT_HNSW_CONFIG,
+                    **(hnsw_config or {}),
+                    # Nothing stored yet, so nothing to migrate
+                    NORMALIZED_FLAG: True
+                }
+            )
         
+        # Stored embeddings are kept unit-length so re-ranking is a pure dot product;
+        # collections written before that are migrated once, then flagged
+        if not (self.collection.metadata or {}).get(NORMALIZED_FLAG):
+            self._normalize_stored_embeddings()
+            self._mark_normalized()
+
+        # Optional int8 copy of the embeddings, used by re-ranking instead of
+        # fetching float32 vectors back from Chroma
+        self.int8_table = None
+        if int8_rerank:
+            self.int8_table = Int8EmbeddingTable(
+                os.path.join(persist_directory, f"{collection_name}_int8.npz")
+            )
+
         logger.info(f"Initialized ChromaDB collection: {collection_name}")
 
+    def _normalize_stored_embeddings(self, batch_size: int = 1000):
+        """Re-normalize embeddings persisted before ingest-time normalization."""
+        total = self.collection.count()
+        updated = 0
+        for offset in range(0, total, batch_size):
+            batch = self.collection.get(
+                limit=batch_size,
+                offset=offset,
+                include=["embeddings"]
+            )
+            if batch['embeddings'] is None or len(batch['embeddings']) == 0:
+                continue
+
+            embeddings = np.asarray(batch['embeddings'], dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1)
+            stale = np.flatnonzero(np.abs(norms - 1.0) > 1e-3)
+            if stale.size == 0:
+                continue
+
+            self.collection.update(
+                ids=[batch['ids'][i] for i in stale],
+                embeddings=normalize_rows(embeddings[stale]).tolist()
+            )
+            updated += stale.size
+
+        if updated:
+            logger.info(f"Normalized {updated} stored embeddings in {self.collection_name}")
+
+    def _mark_normalized(self):
+        """Record in the collection metadata that every stored embedding is unit-length."""
+        # modify() replaces the metadata and rejects hnsw:space; the index keeps
+        # the parameters it was created with either way
+        metadata = {
+            key: value for key, value in (self.collection.metadata or {}).items()
+            if not key.startswith("hnsw:")
+        }
+        try:
+            self.collection.modify(metadata={**metadata, NORMALIZED_FLAG: True})
+        except Exception as e:
+            logger.warning(f"Could not flag {self.collection_name} as normalized: {str(e)}")
+
     async def add_documents(
         self,
         documents: List[str],
@@ -59,28 +243,28 @@ class ChromaVectorStore(VectorStore):
             embeddings: Optional pre-computed embeddings
         """
         try:
-            # Generate IDs if not provided
+            # Generate IDs if not provided (128 random bits, 22 URL-safe chars)
             if ids is None:
-                ids = [str(uuid.uuid4()) for _ in documents]
+                ids = [secrets.token_urlsafe(16) for _ in range(len(documents))]
 
             # Prepare metadatas
             if metadatas is None:
                 metadatas = [{} for _ in documents]
 
-            # Add to collection
-            if embeddings:
-                self.collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids,
-                    embeddings=embeddings
-                )
-            else:
-                self.collection.add(
-                    documents=documents,
-                    metadatas=metadatas,
-                    ids=ids
-                )
+            # Embed here (rather than in Chroma) so vectors are stored unit-length
+            if embeddings is None or len(embeddings) == 0:
+                embeddings = self.embedding_function(documents)
+
+            unit_embeddings = normalize_rows(embeddings)
+            self.collection.add(
+                documents=documents,
+                metadatas=metadatas,
+                ids=ids,
+                embeddings=unit_embeddings.tolist()
+            )
+            if self.int8_table is not None:
+                self.int8_table.add(ids, unit_embeddings)
+            self._invalidate_caches()
 
             logger.info(f"Added {len(documents)} documents to collection")
 
@@ -93,7 +277,9 @@ class ChromaVectorStore(VectorStore):
         query: str,
         limit: int = 5,
         filter_dict: Optional[Dict[str, Any]] = None,
-        query_embedding: Optional[List[float]] = None
+        query_embedding: Optional[List[float]] = None,
+        rerank: Optional[Callable[[str, List[str]], Union[List[float], Awaitable[List[float]]]]] = None,
+        rerank_k: int = 50
     ) -> List[Tuple[str, float, Dict[str, Any]]]:
         """
         Search for similar documents.
@@ -103,36 +289,102 @@ class ChromaVectorStore(VectorStore):
             limit: Maximum number of results
             filter_dict: Optional metadata filter
             query_embedding: Optional pre-computed query embedding
+            rerank: Optional scorer (e.g. a cross-encoder) called once with the query
+                and all candidate documents; may be sync or async
+            rerank_k: Number of candidates fetched from the index for `rerank`
 
         Returns:
-            List of tuples (document, score, metadata)
+            List of tuples (document, score, metadata); with `rerank`, ordered by
+            reranker score while keeping the cosine similarity as score
         """
+        fetch_limit = max(limit, rerank_k) if rerank is not None else limit
+
+        exact_key = None
+        results = None
+        if self.exact_cache is not None and query_embedding is None:
+            exact_key = (query, fetch_limit, _filter_key(filter_dict))
+            results = self.exact_cache.get(exact_key)
+
+        if results is not None:
+            results = list(results)
+        else:
+            results = await self._semantic_search(query, fetch_limit, filter_dict, query_embedding)
+            if exact_key is not None:
+                self.exact_cache.put(exact_key, results)
+
+        if rerank is None or not results:
+            return results
+        return await self._rerank(query, results, limit, rerank)
+
+    async def _semantic_search(
+        self,
+        query: str,
+        limit: int,
+        filter_dict: Optional[Dict[str, Any]],
+        query_embedding: Optional[List[float]]
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        if self.semantic_cache is None:
+            return await self._search(query, limit, filter_dict, query_embedding)
+
+        if query_embedding is None:
+            query_embedding = normalize_rows(self.embedding_function([query])[0]).tolist()
+        scope = (limit, _filter_key(filter_dict))
+        cached = self.semantic_cache.get(query_embedding, scope)
+        if cached is not None:
+            return list(cached)
+
+        results = await self._search(query, limit, filter_dict, query_embedding)
+        self.semantic_cache.put(query_embedding, results, scope)
+        return results
+
+    def _invalidate_caches(self):
+        """Drop cached search results after the collection changes."""
+        if self.exact_cache is not None:
+            self.exact_cache.invalidate()
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate()
+
+    @staticmethod
+    async def _rerank(
+        query: str,
+        candidates: List[Tuple[str, float, Dict[str, Any]]],
+        limit: int,
+        rerank: Callable[[str, List[str]], Union[List[float], Awaitable[List[float]]]]
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Reorder over-fetched candidates by one batched reranker call (cosine breaks ties)."""
+        scores = rerank(query, [doc for doc, _, _ in candidates])
+        if inspect.isawaitable(scores):
+            scores = await scores
+        similarities = np.fromiter((sim for _, sim, _ in candidates), dtype=np.float64, count=len(candidates))
+        order = np.lexsort((-similarities, -np.asarray(scores, dtype=np.float64)))[:limit]
+        return [candidates[i] for i in order]
+
+    async def _search(
+        self,
+        query: str,
+        limit: int,
+        filter_dict: Optional[Dict[str, Any]],
+        query_embedding: Optional[List[float]]
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        if self.coalesce_window > 0:
+            return await self._coalesced_search(query, limit, filter_dict, query_embedding)
+
         try:
+            if self.rerank_oversample > 1:
+                embeddings = [query_embedding] if query_embedding is not None else None
+                return self._search_reranked([query], limit, filter_dict, embeddings)[0]
+
             # Perform search
-            if query_embedding:
-                results = self.collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=limit,
-                    where=filter_dict
-                )
-            else:
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=limit,
-                    where=filter_dict
-                )
+            if query_embedding is None:
+                query_embedding = self.embedding_function([query])[0]
+            results = self._execute_batch(normalize_rows([query_embedding]), limit, filter_dict)
 
             # Format results
             formatted_results = []
             if results['documents'] and len(results['documents']) > 0:
-                documents = results['documents'][0]
-                distances = results['distances'][0]
-                metadatas = results['metadatas'][0]
-
-                for doc, dist, meta in zip(documents, distances, metadatas):
-                    # Convert distance to similarity score (1 - distance for cosine)
-                    similarity = 1 - dist
-                    formatted_results.append((doc, similarity, meta))
+                # Convert distance to similarity score (1 - distance for cosine)
+                similarities = _similarities(results['distances'][:1])[0]
+                formatted_results = list(zip(results['documents'][0], similarities, results['metadatas'][0]))
 
             logger.info(f"Found {len(formatted_results)} results for query")
             return formatted_results
@@ -141,6 +393,142 @@ class ChromaVectorStore(VectorStore):
             logger.error(f"Error searching documents: {str(e)}")
             raise
 
+    async def _coalesced_search(
+        self,
+        query: str,
+        limit: int,
+        filter_dict: Optional[Dict[str, Any]],
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Tuple[str, float, Dict[str, Any]]]:
+        """Queue a search for the next batched flush and wait for its rows."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, limit, filter_dict, query_embedding, future))
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.coalesce_window, self._start_flush)
+        return await future
+
+    def _start_flush(self):
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: List[Tuple[str, int, Optional[Dict[str, Any]], Optional[List[float]], asyncio.Future]]):
+        """Run queued searches as one batch_search per distinct filter, then hand rows back."""
+        groups: Dict[str, list] = {}
+        for item in batch:
+            groups.setdefault(_filter_key(item[2]), []).append(item)
+
+        for items in groups.values():
+            limit = max(item[1] for item in items)
+            queries = [item[0] for item in items]
+            try:
+                # Queries embedded upstream (e.g. for the semantic cache) keep their
+                # vectors; the rest are embedded together in one call
+                embeddings = [item[3] for item in items]
+                missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+                if missing:
+                    for i, embedding in zip(missing, self.embedding_function([queries[i] for i in missing])):
+                        embeddings[i] = embedding
+                results = await self.batch_search(queries, limit, items[0][2], embeddings)
+            except Exception as e:
+                for *_, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, item_limit, _, _, future), rows in zip(items, results):
+                if not future.done():
+                    future.set_result(rows[:item_limit])
+
+        if len(batch) > 1:
+            logger.info(f"Coalesced {len(batch)} searches into {len(groups)} batch queries")
+
+    def _search_reranked(
+        self,
+        queries: List[str],
+        limit: int,
+        filter_dict: Optional[Dict[str, Any]],
+        query_embeddings: Optional[List[List[float]]] = None
+    ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
+        """Over-fetch candidates from the index and re-score them exactly."""
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(queries)
+        query_units = normalize_rows(query_embeddings)
+
+        include = ["documents", "metadatas"]
+        if self.int8_table is None:
+            include.append("embeddings")
+
+        results = self._execute_batch(query_units, limit * self.rerank_oversample, filter_dict, include)
+
+        all_results = []
+        for i, query_unit in enumerate(query_units):
+            if not results['documents'] or len(results['documents']) <= i or not results['documents'][i]:
+                all_results.append([])
+                continue
+
+            documents = results['documents'][i]
+            metadatas = results['metadatas'][i]
+            scores = self._rerank_scores(query_unit, results, i)
+
+            order = top_k_indices(scores, limit)
+            all_results.append([
+                (documents[j], float(scores[j]), metadatas[j])
+                for j in order
+            ])
+
+        logger.info(f"Re-ranked candidates for {len(queries)} queries")
+        return all_results
+
+    def _execute_batch(
+        self,
+        query_units: np.ndarray,
+        n_results: int,
+        where: Optional[Dict[str, Any]],
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Run one index query for a (n, d) block of unit-length query embeddings."""
+        query_units = np.ascontiguousarray(query_units, dtype=np.float32)
+        params = {"include": include} if include is not None else {}
+        return self.collection.query(
+            query_embeddings=query_units.tolist(),
+            n_results=n_results,
+            where=where,
+            **params
+        )
+
+    def _rerank_scores(self, query_unit: np.ndarray, results: Dict[str, Any], i: int) -> np.ndarray:
+        """Score the candidates of query i, preferring the int8 table when it covers them."""
+        if self.int8_table is None:
+            return dot_similarity(query_unit, results['embeddings'][i])
+
+        candidate_ids = results['ids'][i]
+        vectors = self.int8_table.lookup(candidate_ids)
+        if vectors is not None:
+            return int8_cosine_similarity(quantize_int8(query_unit), vectors)
+
+        # Candidates ingested before quantization was enabled
+        stored = self.collection.get(ids=candidate_ids, include=["embeddings"])
+        by_id = dict(zip(stored['ids'], stored['embeddings']))
+        return dot_similarity(query_unit, [by_id[doc_id] for doc_id in candidate_ids])
+
+    def warmup(self):
+        """Load the embedding model and touch the index so the first search is not cold."""
+        try:
+            query_embedding = self.embedding_function(["warmup"])[0]
+            if self.collection.count() > 0:
+                self.collection.query(
+                    query_embeddings=[normalize_rows(query_embedding).tolist()],
+                    n_results=1,
+                    include=[]
+                )
+            logger.info(f"Warmed up vector store: {self.collection_name}")
+        except Exception as e:
+            logger.warning(f"Vector store warmup failed: {str(e)}")
+
     async def delete(self, ids: List[str]):
         """
         Delete documents by IDs.
@@ -150,6 +538,9 @@ class ChromaVectorStore(VectorStore):
         """
         try:
             self.collection.delete(ids=ids)
+            if self.int8_table is not None:
+                self.int8_table.remove(ids)
+            self._invalidate_caches()
             logger.info(f"Deleted {len(ids)} documents")
         except Exception as e:
             logger.error(f"Error deleting documents: {str(e)}")
@@ -175,6 +566,9 @@ class ChromaVectorStore(VectorStore):
             results = self.collection.get()
             if results['ids']:
                 self.collection.delete(ids=results['ids'])
+            if self.int8_table is not None:
+                self.int8_table.clear()
+            self._invalidate_caches()
             logger.info(f"Cleared collection: {self.collection_name}")
         except Exception as e:
             logger.error(f"Error clearing collection: {str(e)}")
@@ -203,10 +597,16 @@ class ChromaVectorStore(VectorStore):
                 update_params["documents"] = [document]
             if metadata:
                 update_params["metadatas"] = [metadata]
-            if embedding:
-                update_params["embeddings"] = [embedding]
+            if document and embedding is None:
+                embedding = self.embedding_function([document])[0]
+            if embedding is not None:
+                unit_embedding = normalize_rows([embedding])
+                update_params["embeddings"] = unit_embedding.tolist()
+                if self.int8_table is not None:
+                    self.int8_table.add([doc_id], unit_embedding)
 
             self.collection.update(**update_params)
+            self._invalidate_caches()
             logger.info(f"Updated document: {doc_id}")
 
         except Exception as e:
@@ -243,7 +643,8 @@ class ChromaVectorStore(VectorStore):
         self,
         queries: List[str],
         limit: int = 5,
-        filter_dict: Optional[Dict[str, Any]] = None
+        filter_dict: Optional[Dict[str, Any]] = None,
+        query_embeddings: Optional[List[List[float]]] = None
     ) -> List[List[Tuple[str, float, Dict[str, Any]]]]:
         """
         Perform batch search for multiple queries.
@@ -252,31 +653,34 @@ class ChromaVectorStore(VectorStore):
             queries: List of query texts
             limit: Maximum number of results per query
             filter_dict: Optional metadata filter
+            query_embeddings: Optional pre-computed query embeddings, one per query
 
         Returns:
             List of result lists, one per query
         """
-        try:
-            results = self.collection.query(
-                query_texts=queries,
-                n_results=limit,
-                where=filter_dict
-            )
-
-            # Format results for each query
-            all_results = []
-            for i in range(len(queries)):
-                query_results = []
-                if results['documents'] and len(results['documents']) > i:
-                    documents = results['documents'][i]
-                    distances = results['distances'][i]
-                    metadatas = results['metadatas'][i]
+        if not queries:
+            return []
 
-                    for doc, dist, meta in zip(documents, distances, metadatas):
-                        similarity = 1 - dist
-                        query_results.append((doc, similarity, meta))
-
-                all_results.append(query_results)
+        try:
+            # One embedding call for the whole batch, sent as vectors so the
+            # server never embeds query text itself
+            if query_embeddings is None:
+                query_embeddings = self.embedding_function(queries)
+
+            if self.rerank_oversample > 1:
+                return self._search_reranked(queries, limit, filter_dict, query_embeddings)
+
+            results = self._execute_batch(normalize_rows(query_embeddings), limit, filter_dict)
+
+            # Format results for each query (similarities converted for the whole batch at once)
+            similarities = _similarities(results['distances']) if results['documents'] else []
+            all_results = [
+                list(zip(documents, row_similarities, metadatas))
+                for documents, row_similarities, metadatas
+                in zip(results['documents'] or [], similarities, results['metadatas'] or [])
+            ]
+            # Queries the server returned no row for
+            all_results.extend([] for _ in range(len(queries) - len(all_results)))
 
             return all_results
 
@@ -0,0 +1,150 @@
+"""
+In-process int8 copy of collection embeddings for fast re-ranking.
+"""
+
+from typing import Dict, List, Optional
+import atexit
+import os
+import threading
+import logging
+
+import numpy as np
+
+from .similarity import empty_aligned, quantize_int8
+
+logger = logging.getLogger(__name__)
+
+
+class Int8EmbeddingTable:
+    """
+    Int8-quantized embeddings keyed by document ID, persisted as a .npz file.
+
+    Changes are written back `save_delay` seconds after the first unsaved one
+    (and at interpreter exit), so a run of ingest batches costs one rewrite.
+
+    Embeddings are expected to be unit-normalized, so a fixed scale of 127
+    covers the full value range without per-collection calibration.
+    """
+
+    def __init__(self, path: str, save_delay: float = 5.0):
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty = False
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.empty((0, 0), dtype=np.int8)
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            data = np.load(self.path, allow_pickle=False)
+            self._ids = [str(i) for i in data["ids"]]
+            self._vectors = np.ascontiguousarray(data["vectors"], dtype=np.int8)
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            logger.info(f"Loaded {len(self._ids)} int8 embeddings from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading int8 embeddings: {str(e)}")
+
+    def _schedule_save(self):
+        self._dirty = True
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write pending changes to disk now."""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                self._dirty = False
+                # Snapshot under the lock (add() overwrites rows in place); write outside it
+                ids = np.array(self._ids, dtype=str)
+                vectors = self._vectors.copy()
+            try:
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, ids=ids, vectors=vectors)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                self._dirty = True
+                logger.error(f"Error saving int8 embeddings: {str(e)}")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids: List[str], unit_embeddings: np.ndarray):
+        """
+        Insert or overwrite quantized embeddings.
+
+        Args:
+            ids: Document IDs
+            unit_embeddings: Unit-normalized float embeddings, one row per ID
+        """
+        quantized = quantize_int8(unit_embeddings)
+        with self._lock:
+            if self._vectors.size == 0:
+                self._vectors = np.empty((0, quantized.shape[1]), dtype=np.int8)
+
+            stored = len(self._vectors)
+            new_rows = []
+            for doc_id, vector in zip(ids, quantized):
+                row = self._rows.get(doc_id)
+                if row is None:
+                    self._rows[doc_id] = len(self._ids)
+                    self._ids.append(doc_id)
+                    new_rows.append(vector)
+                elif row < stored:
+                    self._vectors[row] = vector
+                else:
+                    new_rows[row - stored] = vector
+
+            if new_rows:
+                self._vectors = np.concatenate([self._vectors, np.stack(new_rows)])
+            self._schedule_save()
+
+    def remove(self, ids: List[str]):
+        """Drop embeddings for the given IDs."""
+        with self._lock:
+            drop = {self._rows[doc_id] for doc_id in ids if doc_id in self._rows}
+            if not drop:
+                return
+            keep = [row for row in range(len(self._ids)) if row not in drop]
+            self._ids = [self._ids[row] for row in keep]
+            self._vectors = np.ascontiguousarray(self._vectors[keep])
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            self._schedule_save()
+
+    def clear(self):
+        """Drop all embeddings."""
+        with self._lock:
+            self._ids = []
+            self._rows = {}
+            self._vectors = np.empty((0, 0), dtype=np.int8)
+            self._schedule_save()
+
+    def lookup(self, ids: List[str]) -> Optional[np.ndarray]:
+        """
+        Gather quantized embeddings for the given IDs.
+
+        Returns:
+            64-byte aligned int8 matrix with one row per ID, or None if any ID is missing
+        """
+        with self._lock:
+            try:
+                rows = [self._rows[doc_id] for doc_id in ids]
+            except KeyError:
+                return None
+            # Gathered straight into an aligned buffer for the SimSIMD kernels
+            out = empty_aligned((len(rows), self._vectors.shape[1]), np.int8)
+            return np.take(self._vectors, rows, axis=0, out=out)
@@ -2,13 +2,48 @@
 Ollama client implementation for LLM operations.
 """
 
+import httpx
 import ollama
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional, Union
+import asyncio
 import logging
+import os
 from .base import LLMClient
 
+try:
+    import h2
+except ImportError:  # optional: HTTP/2 for Ollama behind an https endpoint
+    h2 = None
+
 logger = logging.getLogger(__name__)
 
+# Keep-alive pool sized for concurrent generation/embedding requests
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=64, max_connections=128, keepalive_expiry=60)
+
+# One pooled async client per Ollama host, shared by every OllamaClient in the process
+_async_clients: Dict[str, ollama.AsyncClient] = {}
+_async_client_refs: Dict[str, int] = {}
+
+
+def _acquire_async_client(host: str) -> ollama.AsyncClient:
+    client = _async_clients.get(host)
+    if client is None:
+        # httpx only negotiates HTTP/2 through TLS ALPN, so plain-http hosts stay on HTTP/1.1
+        http2 = h2 is not None and host.startswith("https://")
+        client = _async_clients[host] = ollama.AsyncClient(host=host, limits=_POOL_LIMITS, http2=http2)
+        _async_client_refs[host] = 0
+    _async_client_refs[host] += 1
+    return client
+
+
+def _release_async_client(host: str) -> Optional[ollama.AsyncClient]:
+    """Drop one reference; returns the client once nothing uses it any more."""
+    _async_client_refs[host] -= 1
+    if _async_client_refs[host] > 0:
+        return None
+    del _async_client_refs[host]
+    return _async_clients.pop(host)
+
 
 class OllamaClient(LLMClient):
     """Client for interacting with Ollama models."""
@@ -17,12 +52,22 @@ class OllamaClient(LLMClient):
         self,
         model: str = "llama3",
         embedding_model: str = "nomic-embed-text",
-        host: str = "http://localhost:11434"
+        host: str = "http://localhost:11434",
+        embed_parallel: Optional[int] = None,
+        keep_alive: Optional[Union[str, float]] = None
     ):
         self.model = model
         self.embedding_model = embedding_model
         self.host = host
+        # Sent with every request so Ollama keeps the models loaded between calls
+        self.keep_alive = keep_alive if keep_alive is not None else os.getenv("OLLAMA_KEEP_ALIVE", "1h")
+        # Cap on in-flight embedding requests; match the server's OLLAMA_NUM_PARALLEL
+        self.embed_parallel = embed_parallel or int(os.getenv("OLLAMA_EMBED_PARALLEL", "8"))
+        self._embed_semaphore: Optional[asyncio.Semaphore] = None
+        # Sync client for model management; a process-wide async client (pooled
+        # keep-alive connections) for generation and embeddings
         self.client = ollama.Client(host=host)
+        self.async_client = _acquire_async_client(host)
         logger.info(f"Initialized Ollama client with model: {model}")
 
     async def generate(
@@ -31,6 +76,8 @@ class OllamaClient(LLMClient):
         temperature: float = 0.7,
         max_tokens: int = 1000,
         system_prompt: str = None,
+        keep_alive: Optional[str] = None,
+        format: str = "",
         **kwargs
     ) -> Tuple[str, Dict[str, int]]:
         """
@@ -41,6 +88,9 @@ class OllamaClient(LLMClient):
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
             system_prompt: Optional system prompt
+            keep_alive: How long Ollama keeps the model (and its KV cache) loaded
+                (defaults to the client's keep_alive)
+            format: "json" to constrain decoding to valid JSON, "" for free text
             **kwargs: Additional Ollama parameters
 
         Returns:
@@ -58,14 +108,16 @@ class OllamaClient(LLMClient):
                 "content": prompt
             })
 
-            response = self.client.chat(
+            response = await self.async_client.chat(
                 model=self.model,
                 messages=messages,
+                format=format,
                 options={
                     "temperature": temperature,
                     "num_predict": max_tokens,
                     **kwargs
-                }
+                },
+                keep_alive=self.keep_alive if keep_alive is None else keep_alive
             )
 
             generated_text = response['message']['content']
@@ -95,9 +147,10 @@ class OllamaClient(LLMClient):
             Embedding vector
         """
         try:
-            response = self.client.embeddings(
+            response = await self.async_client.embeddings(
                 model=self.embedding_model,
-                prompt=text
+                prompt=text,
+                keep_alive=self.keep_alive
             )
             return response['embedding']
 
@@ -113,13 +166,45 @@ class OllamaClient(LLMClient):
             texts: List of input texts
 
         Returns:
-            List of embedding vectors
+            List of embedding vectors, in the order of `texts`
+        """
+        if self._embed_semaphore is None:
+            self._embed_semaphore = asyncio.Semaphore(self.embed_parallel)
+        semaphore = self._embed_semaphore
+
+        async def embed_one(text: str) -> List[float]:
+            async with semaphore:
+                return await self.embed(text)
+
+        return list(await asyncio.gather(*(embed_one(text) for text in texts)))
+
+    async def warmup(self, keep_alive: Optional[str] = None):
+        """
+        Load the chat and embedding models so the first real request skips model load.
+
+        Args:
+            keep_alive: How long Ollama should keep the models loaded (-1 pins them;
+                defaults to the client's keep_alive)
         """
-        embeddings = []
-        for text in texts:
-            embedding = await self.embed(text)
-            embeddings.append(embedding)
-        return embeddings
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        try:
+            # An empty prompt only loads the model, without generating anything
+            await asyncio.gather(
+                self.async_client.generate(model=self.model, prompt="", keep_alive=keep_alive),
+                self.async_client.embeddings(model=self.embedding_model, prompt="warmup", keep_alive=keep_alive)
+            )
+            logger.info(f"Warmed up Ollama models: {self.model}, {self.embedding_model}")
+        except Exception as e:
+            logger.warning(f"Ollama warmup failed: {str(e)}")
+
+    async def aclose(self):
+        """Release the shared async HTTP connection pool (closed with its last user)."""
+        if self.async_client is None:
+            return
+        self.async_client = None
+        client = _release_async_client(self.host)
+        if client is not None:
+            await client._client.aclose()
 
     def list_models(self) -> List[str]:
         """List available Ollama models."""
@@ -173,7 +258,7 @@ class OllamaClient(LLMClient):
                 "content": prompt
             })
 
-            stream = self.client.chat(
+            stream = await self.async_client.chat(
                 model=self.model,
                 messages=messages,
                 stream=True,
@@ -181,10 +266,11 @@ class OllamaClient(LLMClient):
                     "temperature": temperature,
                     "num_predict": max_tokens,
                     **kwargs
-                }
+                },
+                keep_alive=self.keep_alive
             )
 
-            for chunk in stream:
+            async for chunk in stream:
                 if 'message' in chunk and 'content' in chunk['message']:
                     yield chunk['message']['content']
 
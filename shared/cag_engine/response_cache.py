@@ -0,0 +1,196 @@
+"""
+Two-tier response cache for LLM pipelines: exact match on the query hash,
+then an optional embedding-similarity lookup for near-duplicate queries.
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from .similarity import dot_similarity, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    TTL/LRU cache of finished responses, optionally persisted to a JSON file.
+
+    When `embed` is given, misses on the exact key fall back to the most similar
+    cached query whose cosine similarity reaches `threshold`.
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+        max_size: int = 1000,
+        ttl: float = 3600,
+        threshold: float = 0.92,
+        path: Optional[str] = None
+    ):
+        self.embed = embed
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self.path = path
+        # key -> {"query", "expires_at", "embedding", "value"}
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._index_keys: List[str] = []
+        self._index: Optional[np.ndarray] = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        if path and os.path.exists(path):
+            self.load()
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+    def _evict_expired(self, now: float):
+        expired = [k for k, e in self._entries.items() if e["expires_at"] <= now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._index = None
+
+    def _semantic_lookup(self, embedding: np.ndarray) -> Optional[str]:
+        if self._index is None:
+            self._index_keys = [k for k, e in self._entries.items() if e["embedding"] is not None]
+            self._index = normalize_rows(
+                [self._entries[k]["embedding"] for k in self._index_keys]
+            ) if self._index_keys else np.empty((0, embedding.shape[0]), dtype=np.float32)
+
+        if len(self._index_keys) == 0 or self._index.shape[1] != embedding.shape[0]:
+            return None
+
+        scores = dot_similarity(embedding, self._index)
+        best = int(scores.argmax())
+        return self._index_keys[best] if scores[best] >= self.threshold else None
+
+    async def get_or_compute(self, query: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached response for a query, or compute and cache it.
+
+        Args:
+            query: Cache key text (also what gets embedded for the semantic tier)
+            compute: Coroutine factory producing the response on a miss
+
+        Returns:
+            Cached or freshly computed response
+        """
+        key = self._key(query)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] > now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry["value"]
+
+        embedding = None
+        if self.embed is not None:
+            try:
+                embedding = normalize_rows(await self.embed(query))
+            except Exception as e:
+                logger.warning(f"Response cache embedding failed: {str(e)}")
+
+        if embedding is not None:
+            with self._lock:
+                self._evict_expired(now)
+                match = self._semantic_lookup(embedding)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.semantic_hits += 1
+                    return self._entries[match]["value"]
+
+        with self._lock:
+            self.misses += 1
+
+        value = await compute()
+
+        with self._lock:
+            self._entries[key] = {
+                "query": query,
+                "expires_at": time.time() + self.ttl,
+                "embedding": embedding.tolist() if embedding is not None else None,
+                "value": value
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._index = None
+
+        return value
+
+    def invalidate(self):
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self._index = None
+        logger.info("Response cache invalidated")
+
+    def load(self):
+        """Load unexpired entries from `path`."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load response cache from {self.path}: {str(e)}")
+            return
+
+        now = time.time()
+        with self._lock:
+            for key, entry in entries.items():
+                if entry.get("expires_at", 0) > now:
+                    self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+            self._index = None
+        logger.info(f"Loaded {len(self._entries)} cached responses from {self.path}")
+
+    def save(self):
+        """Write the cache to `path` (no-op when no path is configured)."""
+        if not self.path:
+            return
+        with self._lock:
+            self._evict_expired(time.time())
+            snapshot = dict(self._entries)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except (OSError, TypeError) as e:
+            logger.error(f"Could not save response cache to {self.path}: {str(e)}")
+
+    async def asave(self):
+        """Write the cache to disk without blocking the event loop."""
+        await asyncio.to_thread(self.save)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            hits = self.exact_hits + self.semantic_hits
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "semantic": self.embed is not None,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0
+            }
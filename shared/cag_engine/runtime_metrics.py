@@ -0,0 +1,59 @@
+"""
+In-process counters for retrieval performance, surfaced on /stats.
+"""
+
+from collections import deque
+from typing import Any, Dict
+import bisect
+import threading
+
+
+class RetrievalMetrics:
+    """Cache hit/miss counters and a rolling window of search latencies."""
+
+    def __init__(self, window: int = 1024):
+        self._lock = threading.RLock()
+        self._window = window
+        self._samples: deque = deque()
+        self._sorted: list = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def record_cache(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def record_search(self, duration_ms: float):
+        """Add a search latency sample, evicting the oldest once the window is full."""
+        with self._lock:
+            if len(self._samples) == self._window:
+                oldest = self._samples.popleft()
+                del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+            self._samples.append(duration_ms)
+            bisect.insort(self._sorted, duration_ms)
+
+    def _percentile(self, q: float) -> float:
+        if not self._sorted:
+            return 0.0
+        index = min(len(self._sorted) - 1, int(q * len(self._sorted)))
+        return self._sorted[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get current counter values and latency percentiles."""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "search_samples": len(self._samples),
+                "search_ms_p50": self._percentile(0.50),
+                "search_ms_p99": self._percentile(0.99)
+            }
+
+
+# Process-wide instance shared by techniques and API handlers
+retrieval_metrics = RetrievalMetrics()
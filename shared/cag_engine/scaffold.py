@@ -0,0 +1,187 @@
+"""
+Generic FastAPI backend for apps scaffolded by generate_remaining_apps.py.
+
+Everything app-specific (title, technique, model, port) comes from a small
+JSON config, so every generated backend shares this module instead of
+carrying a near-identical copy of it.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict
+import json
+import logging
+import os
+
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+
+try:
+    import msgspec
+except ImportError:  # optional: pydantic validates and FastAPI serializes otherwise
+    msgspec = None
+
+from .ollama_client import OllamaClient
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_CONFIG_KEYS = ("title", "technique", "model", "port")
+
+
+class QueryRequest(BaseModel):
+    query: str
+    top_k: int = 5
+
+
+class QueryResponse(BaseModel):
+    query: str
+    response: str
+    context: list
+    metadata: dict
+    process_steps: list
+
+
+if msgspec is not None:
+    class QueryRequestStruct(msgspec.Struct):
+        """msgspec twin of QueryRequest, decoded straight from the request body"""
+        query: str
+        top_k: int = 5
+
+    _decode_query_request = msgspec.json.Decoder(QueryRequestStruct).decode
+    _encode_json = msgspec.json.Encoder().encode
+
+
+PROCESS_STEPS = [
+    {"step": "context_retrieval", "description": "Retrieved relevant context"},
+    {"step": "augmentation", "description": "Augmented prompt with context"},
+    {"step": "generation", "description": "Generated response with LLM"}
+]
+
+
+@lru_cache(maxsize=32)
+def _static_ctx(k: int) -> tuple:
+    """Placeholder context items for top_k=k, built once per k."""
+    return tuple(
+        {"type": "context_item", "content": f"Context {i+1} for query", "relevance": round(0.9 - i*0.1, 4)}
+        for i in range(k)
+    )
+
+
+@lru_cache(maxsize=32)
+def _static_ctx_text(k: int) -> str:
+    """Bullet list of the placeholder context for the prompt."""
+    return "\n".join(f"- {c['content']}" for c in _static_ctx(k))
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """
+    Load and validate an app's scaffold config.
+
+    Args:
+        path: Path to the app's config.json
+
+    Returns:
+        Config dict with at least title, technique, model and port
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    missing = [key for key in REQUIRED_CONFIG_KEYS if key not in config]
+    if missing:
+        raise ValueError(f"{path} is missing required keys: {', '.join(missing)}")
+    return config
+
+
+def create_app(config: Dict[str, Any]) -> FastAPI:
+    """
+    Build the FastAPI app for one scaffolded CAG app.
+
+    Args:
+        config: Config as returned by load_config
+
+    Returns:
+        FastAPI application exposing /, /process and /health
+    """
+    title = config["title"]
+    technique = config["technique"]
+    model = config["model"]
+
+    app = FastAPI(title=f"{title} API")
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    ollama_client = OllamaClient(
+        model=model,
+        host=os.getenv("OLLAMA_HOST", "http://ollama:11434")
+    )
+    role = title.lower()
+    root_info = {"app": title, "technique": technique, "status": "running"}
+    metadata = {"model": model, "technique": technique}
+
+    @app.on_event("shutdown")
+    async def close_client():
+        await ollama_client.aclose()
+
+    @app.get("/")
+    async def root():
+        return root_info
+
+    async def run_query(query: str, top_k: int) -> Dict[str, Any]:
+        # Simulate CAG processing
+        context = list(_static_ctx(top_k))
+
+        prompt = f"""You are a {role}. Process the following query:
+
+Query: {query}
+
+Context:
+{_static_ctx_text(top_k)}
+
+Provide a comprehensive response."""
+
+        response, _ = await ollama_client.generate(prompt=prompt)
+
+        return {
+            "query": query,
+            "response": response,
+            "context": context,
+            "metadata": metadata,
+            "process_steps": PROCESS_STEPS
+        }
+
+    if msgspec is not None:
+        # One-pass decode/encode with msgspec, bypassing pydantic on the hot path
+        @app.post("/process", responses={200: {"model": QueryResponse}})
+        async def process_query(request: Request):
+            """Process query using the app's CAG technique"""
+            try:
+                body = _decode_query_request(await request.body())
+            except msgspec.DecodeError as e:  # includes ValidationError
+                raise HTTPException(status_code=422, detail=str(e))
+            try:
+                result = await run_query(body.query, body.top_k)
+            except Exception as e:
+                logger.error(f"Error processing query: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+            return Response(content=_encode_json(result), media_type="application/json")
+    else:
+        @app.post("/process", response_model=QueryResponse)
+        async def process_query(request: QueryRequest):
+            """Process query using the app's CAG technique"""
+            try:
+                return QueryResponse(**await run_query(request.query, request.top_k))
+            except Exception as e:
+                logger.error(f"Error processing query: {str(e)}")
+                raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
@@ -0,0 +1,161 @@
+"""
+Semantic cache for retrieval results keyed by query embedding.
+
+Embeddings are bucketed with random-projection LSH (one bit per hyperplane)
+in several independent tables, so a lookup only compares the query against
+the handful of cached queries that share a bucket with it in any table. Cached embeddings share one preallocated
+float32 matrix, scored in a single (Numba-compiled when available) pass.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import itertools
+import threading
+import time
+import logging
+
+import numpy as np
+
+from .similarity import ArrayLike, best_match, normalize_rows
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """LSH-bucketed cache returning results stored for a near-identical query embedding."""
+
+    def __init__(
+        self,
+        num_bits: int = 8,
+        num_tables: int = 8,
+        threshold: float = 0.95,
+        max_size: int = 2000,
+        ttl: float = 300,
+        seed: int = 0
+    ):
+        # At cosine 0.95 a bit agrees ~90% of the time: one 16-bit table pairs
+        # near-duplicates only ~18% of the time, eight 8-bit tables ~99%
+        self.num_bits = num_bits
+        self.num_tables = num_tables
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        # Unit embeddings, one row per entry (max_size + 1: put evicts after inserting)
+        self._matrix: Optional[np.ndarray] = None
+        self._free_rows: List[int] = []
+        # entry id -> (bucket key per table, matrix row, value, expires_at), oldest first
+        self._entries: "OrderedDict[int, Tuple[Tuple[Hashable, ...], int, Any, float]]" = OrderedDict()
+        self._buckets: Dict[Hashable, List[int]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket_keys(self, unit: np.ndarray, scope: Hashable) -> Tuple[Hashable, ...]:
+        if self._planes is None or self._planes.shape[1] != unit.shape[0]:
+            # Hyperplanes are drawn on first use, once the embedding size is known
+            self._planes = self._rng.standard_normal(
+                (self.num_tables * self.num_bits, unit.shape[0])
+            ).astype(np.float32)
+            self._matrix = np.empty((self.max_size + 1, unit.shape[0]), dtype=np.float32)
+            self._free_rows = list(range(self.max_size, -1, -1))
+            self._entries.clear()
+            self._buckets.clear()
+        bits = np.packbits((self._planes @ unit > 0).reshape(self.num_tables, self.num_bits), axis=1)
+        return tuple((table, scope, key.tobytes()) for table, key in enumerate(bits))
+
+    def _remove(self, entry_id: int):
+        buckets, row, _, _ = self._entries.pop(entry_id)
+        self._free_rows.append(row)
+        for bucket in buckets:
+            ids = self._buckets[bucket]
+            ids.remove(entry_id)
+            if not ids:
+                del self._buckets[bucket]
+
+    def get(self, embedding: ArrayLike, scope: Hashable = None) -> Optional[Any]:
+        """
+        Look up results cached for a similar query.
+
+        Args:
+            embedding: Query embedding (normalized here)
+            scope: Extra key the stored query must share (e.g. limit and filter)
+
+        Returns:
+            Cached value of the most similar query at or above the threshold, or None
+        """
+        unit = normalize_rows(embedding)
+        with self._lock:
+            buckets = self._bucket_keys(unit, scope)
+            now = time.monotonic()
+            # Entry ids grow with insertion, so sorting keeps candidates oldest first
+            candidates = sorted({
+                entry_id for bucket in buckets for entry_id in self._buckets.get(bucket, ())
+            })
+            live_ids, rows = [], []
+            for entry_id in candidates:
+                _, row, _, expires_at = self._entries[entry_id]
+                if expires_at <= now:
+                    self._remove(entry_id)
+                    continue
+                live_ids.append(entry_id)
+                rows.append(row)
+
+            pos, _ = best_match(unit, self._matrix, np.array(rows, dtype=np.intp), self.threshold)
+            if pos < 0:
+                self.misses += 1
+                return None
+
+            best_id = live_ids[pos]
+
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def put(self, embedding: ArrayLike, value: Any, scope: Hashable = None):
+        """
+        Store results for a query embedding, evicting the least recently used entry when full.
+
+        Args:
+            embedding: Query embedding (normalized here)
+            value: Value to cache
+            scope: Extra key lookups must match (e.g. limit and filter)
+        """
+        unit = normalize_rows(embedding)
+        with self._lock:
+            buckets = self._bucket_keys(unit, scope)
+            entry_id = next(self._ids)
+            row = self._free_rows.pop()
+            self._matrix[row] = unit
+            self._entries[entry_id] = (buckets, row, value, time.monotonic() + self.ttl)
+            for bucket in buckets:
+                self._buckets.setdefault(bucket, []).append(entry_id)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self):
+        """Drop all cached entries (e.g. after the underlying store changes)."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            if self._matrix is not None:
+                self._free_rows = list(range(self.max_size, -1, -1))
+        logger.info("Semantic cache invalidated")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "buckets": len(self._buckets),
+                "tables": self.num_tables,
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
@@ -0,0 +1,258 @@
+"""
+Vector similarity kernels used for re-ranking retrieved candidates.
+
+SimSIMD is used when installed (AVX2/AVX-512/NEON dispatch) and Numba
+compiles the top-k selection and best-match loops when available; otherwise
+the kernels fall back to NumPy.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import logging
+
+import numpy as np
+
+try:
+    import simsimd
+except ImportError:  # pragma: no cover - optional dependency
+    simsimd = None
+
+try:
+    import numba
+except ImportError:  # pragma: no cover - optional dependency
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[np.ndarray, Sequence[float], Sequence[Sequence[float]]]
+
+
+def kernel_info() -> Dict[str, Any]:
+    """Report which accelerated kernels are active (and SimSIMD's detected ISA)."""
+    info: Dict[str, Any] = {
+        "simsimd": simsimd is not None,
+        "numba": numba is not None,
+    }
+    if simsimd is not None:
+        info["simd_capabilities"] = {
+            name: enabled for name, enabled in simsimd.get_capabilities().items() if enabled
+        }
+    return info
+
+
+def empty_aligned(shape: Tuple[int, ...], dtype, alignment: int = 64) -> np.ndarray:
+    """
+    Allocate an uninitialized C-contiguous array whose data pointer is aligned to `alignment` bytes.
+
+    Gather into it (e.g. `np.take(..., out=...)`) so SIMD kernels read aligned rows
+    without an extra copy.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+    buf = np.empty(nbytes + alignment, dtype=np.uint8)
+    offset = -buf.ctypes.data % alignment
+    return buf[offset:offset + nbytes].view(dtype).reshape(shape)
+
+
+def as_float32(values: ArrayLike) -> np.ndarray:
+    """Return values as a C-contiguous float32 array (no copy if already one)."""
+    return np.ascontiguousarray(values, dtype=np.float32)
+
+
+def normalize_rows(values: ArrayLike) -> np.ndarray:
+    """
+    Scale vectors to unit L2 norm so cosine similarity reduces to a dot product.
+
+    Args:
+        values: Vector of shape (d,) or matrix of shape (n, d)
+
+    Returns:
+        Float32 array of the same shape with unit-length rows
+    """
+    arr = np.array(values, dtype=np.float32, order="C")
+    norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+    arr /= np.maximum(norms, 1e-12)
+    return arr
+
+
+def dot_similarity(query: ArrayLike, matrix: ArrayLike) -> np.ndarray:
+    """
+    Dot product between one query vector and each row of a matrix.
+
+    Equals cosine similarity when both inputs are unit-normalized.
+
+    Args:
+        query: Query vector of shape (d,)
+        matrix: Candidate matrix of shape (n, d)
+
+    Returns:
+        Similarity scores of shape (n,)
+    """
+    q = as_float32(query).reshape(1, -1)
+    m = as_float32(matrix)
+    if m.size == 0:
+        return np.empty(0, dtype=np.float32)
+
+    if simsimd is not None:
+        return np.asarray(simsimd.cdist(q, m, metric="inner"), dtype=np.float32).ravel()
+
+    return m @ q.ravel()
+
+
+def quantize_int8(unit_vectors: ArrayLike) -> np.ndarray:
+    """
+    Quantize unit-normalized vectors to int8 with a fixed scale of 127.
+
+    Args:
+        unit_vectors: Vector or matrix with components in [-1, 1]
+
+    Returns:
+        Int8 array of the same shape
+    """
+    scaled = np.rint(as_float32(unit_vectors) * 127.0)
+    return np.clip(scaled, -127, 127).astype(np.int8)
+
+
+def int8_cosine_similarity(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity between an int8 query and each row of an int8 matrix.
+
+    Args:
+        query: Int8 vector of shape (d,)
+        matrix: Int8 matrix of shape (n, d)
+
+    Returns:
+        Float32 similarity scores of shape (n,)
+    """
+    q = np.ascontiguousarray(query, dtype=np.int8).reshape(1, -1)
+    m = np.ascontiguousarray(matrix, dtype=np.int8)
+    if m.size == 0:
+        return np.empty(0, dtype=np.float32)
+
+    if simsimd is not None:
+        distances = np.asarray(simsimd.cdist(q, m, metric="cosine"), dtype=np.float32)
+        return 1.0 - distances.ravel()
+
+    q32 = q.ravel().astype(np.int32)
+    m32 = m.astype(np.int32)
+    norms = np.sqrt((m32 * m32).sum(axis=1) * float(q32 @ q32))
+    return ((m32 @ q32) / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _top_k_jit(scores, k, threshold):
+        """Single pass threshold + top-k via insertion into a k-slot buffer."""
+        idx = np.empty(k, dtype=np.intp)
+        vals = np.empty(k, dtype=scores.dtype)
+        m = 0
+        for i in range(scores.shape[0]):
+            s = scores[i]
+            if not s >= threshold:
+                continue
+            if m < k:
+                j = m
+                m += 1
+            elif s > vals[k - 1]:
+                j = k - 1
+            else:
+                continue
+            while j > 0 and vals[j - 1] < s:
+                vals[j] = vals[j - 1]
+                idx[j] = idx[j - 1]
+                j -= 1
+            vals[j] = s
+            idx[j] = i
+        return idx[:m]
+else:
+    _top_k_jit = None
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _best_row_jit(query, matrix, rows, threshold):
+        """Fused dot product + running max over the selected rows."""
+        best_pos = -1
+        best = threshold
+        for i in range(rows.shape[0]):
+            row = matrix[rows[i]]
+            s = 0.0
+            for j in range(query.shape[0]):
+                s += row[j] * query[j]
+            if s >= best:
+                best_pos = i
+                best = s
+        return best_pos, best
+else:
+    _best_row_jit = None
+
+
+def best_match(
+    query: np.ndarray,
+    matrix: np.ndarray,
+    rows: np.ndarray,
+    threshold: float
+) -> Tuple[int, float]:
+    """
+    Find which of the given matrix rows has the highest dot product with a query.
+
+    Uses a Numba-compiled loop when available, so only the selected rows are
+    read and no score array is materialized. Ties go to the later row.
+
+    Args:
+        query: Float32 vector of shape (d,)
+        matrix: Float32 matrix of shape (n, d)
+        rows: Row indices of `matrix` to consider
+        threshold: Minimum score for a match
+
+    Returns:
+        Tuple of (position in `rows`, score), or (-1, threshold) if no row reaches the threshold
+    """
+    if rows.shape[0] == 0:
+        return -1, threshold
+
+    if _best_row_jit is not None:
+        pos, score = _best_row_jit(query, matrix, rows, float(threshold))
+        return int(pos), float(score)
+
+    scores = matrix[rows] @ query
+    pos = scores.shape[0] - 1 - int(np.argmax(scores[::-1]))
+    if scores[pos] < threshold:
+        return -1, threshold
+    return pos, float(scores[pos])
+
+
+def top_k_indices(
+    scores: np.ndarray,
+    k: int,
+    threshold: Optional[float] = None
+) -> np.ndarray:
+    """
+    Indices of the k highest scores in descending order.
+
+    Uses a Numba-compiled single pass when available. Otherwise the threshold
+    mask is applied first and a partition (O(n)) runs only over passing
+    scores, sorting just the k winners. Ties keep index order.
+
+    Args:
+        scores: Score array of shape (n,)
+        k: Number of indices to keep
+        threshold: Optional minimum score; lower-scoring entries are dropped
+
+    Returns:
+        Index array of length <= k
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if _top_k_jit is not None:
+        return _top_k_jit(scores, k, -np.inf if threshold is None else threshold)
+
+    candidates = np.arange(n) if threshold is None else np.flatnonzero(scores >= threshold)
+    if candidates.size > k:
+        # Keep everything tied with the k-th best score so ties resolve by index
+        kth_score = -np.partition(-scores[candidates], k - 1)[k - 1]
+        candidates = candidates[scores[candidates] >= kth_score]
+    return candidates[np.lexsort((candidates, -scores[candidates]))][:k]
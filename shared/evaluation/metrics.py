@@ -2,23 +2,45 @@
 Evaluation metrics for CAG applications.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 import numpy as np
 from dataclasses import dataclass
+import contextlib
+from datetime import datetime, timezone
+from functools import lru_cache
+import itertools
 import logging
+import re
+import torch
 from rouge_score import rouge_scorer
-from bert_score import score as bert_score
-from sklearn.metrics import precision_recall_fscore_support
-import nltk
+from bert_score import BERTScorer
+from nltk.stem import porter
 from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
 
+try:
+    from sacrebleu.metrics import BLEU as SacreBLEU
+except ImportError:  # optional: C-backed BLEU, NLTK fallback otherwise
+    SacreBLEU = None
+
 logger = logging.getLogger(__name__)
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# Word runs and single punctuation marks; a compiled-regex stand-in for
+# nltk.word_tokenize (no Punkt model to load or run per string)
+_tokenize = re.compile(r"\w+|[^\w\s]").findall
+
+# rouge_score's tokenizer splits lowercased text on anything outside [a-z0-9];
+# no such run crosses a _tokenize boundary, so splitting its words is equivalent
+_rouge_split = re.compile(r"[^a-z0-9]+").split
+
+
+def _word_tokens(texts: List[str]) -> List[List[str]]:
+    """Lowercased _tokenize words per text, shared by BLEU and ROUGE."""
+    return [_tokenize(text.lower()) for text in texts]
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time to the second, e.g. 2024-01-01T12:00:00."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
 
 
 @dataclass
@@ -40,6 +62,7 @@ class MetricCalculator:
         self,
         predictions: List[str],
         references: List[str],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """Calculate metric score."""
@@ -52,11 +75,18 @@ class BLEUMetric(MetricCalculator):
     def __init__(self):
         super().__init__("BLEU")
         self.smoothing = SmoothingFunction()
+        if SacreBLEU is not None:
+            # effective_order keeps short single sentences from scoring zero
+            self._sentence_bleu = SacreBLEU(lowercase=True, effective_order=True)
+            self._corpus_bleu = SacreBLEU(lowercase=True)
 
     def calculate(
         self,
         predictions: List[str],
         references: List[str],
+        timestamp: Optional[str] = None,
+        pred_tokens: Optional[List[List[str]]] = None,
+        ref_tokens: Optional[List[List[str]]] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -65,51 +95,76 @@ class BLEUMetric(MetricCalculator):
         Args:
             predictions: List of predicted texts
             references: List of reference texts
+            timestamp: ISO timestamp for the result (defaults to now)
+            pred_tokens: Predictions already split by _word_tokens
+            ref_tokens: References already split by _word_tokens
 
         Returns:
             EvaluationResult with BLEU score
         """
-        scores = []
-        for pred, ref in zip(predictions, references):
-            pred_tokens = nltk.word_tokenize(pred.lower())
-            ref_tokens = [nltk.word_tokenize(ref.lower())]
-            
-            score = sentence_bleu(
-                ref_tokens,
-                pred_tokens,
-                smoothing_function=self.smoothing.method1
-            )
-            scores.append(score)
-
-        avg_score = np.mean(scores)
+        details = {}
+        if SacreBLEU is not None:
+            # sacrebleu reports 0-100; scale to 0-1 like the other metrics
+            scores = [
+                self._sentence_bleu.sentence_score(pred, [ref]).score / 100
+                for pred, ref in zip(predictions, references)
+            ]
+            details["corpus_bleu"] = self._corpus_bleu.corpus_score(
+                list(predictions), [list(references)]
+            ).score / 100
+        else:
+            if pred_tokens is None:
+                pred_tokens = _word_tokens(predictions)
+            if ref_tokens is None:
+                ref_tokens = _word_tokens(references)
+            scores = [
+                sentence_bleu([ref], pred, smoothing_function=self.smoothing.method1)
+                for pred, ref in zip(pred_tokens, ref_tokens)
+            ]
+
+        arr = np.asarray(scores, dtype=np.float64)
         
         return EvaluationResult(
             metric_name=self.name,
-            score=avg_score,
+            score=arr.mean(),
             details={
                 "individual_scores": scores,
-                "std": np.std(scores),
-                "min": np.min(scores),
-                "max": np.max(scores)
+                **details,
+                "std": arr.std(),
+                "min": arr.min(),
+                "max": arr.max()
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
+class CachedPorterStemmer:
+    """Porter stemmer that memoizes stems; evaluation texts repeat most of their vocabulary."""
+
+    def __init__(self, maxsize: int = 50000):
+        self.stem = lru_cache(maxsize=maxsize)(porter.PorterStemmer().stem)
+
+
 class ROUGEMetric(MetricCalculator):
     """ROUGE scores for summarization quality."""
 
     def __init__(self):
         super().__init__("ROUGE")
-        self.scorer = rouge_scorer.RougeScorer(
-            ['rouge1', 'rouge2', 'rougeL'],
-            use_stemmer=True
-        )
+        # Stemming dominates ROUGE scoring; memoize it
+        self._stemmer = CachedPorterStemmer()
+
+    def _rouge_tokens(self, words: List[str]) -> List[str]:
+        """rouge_score's stemmed tokens for a text, built from its _word_tokens words."""
+        stem = self._stemmer.stem
+        return [stem(t) if len(t) > 3 else t for word in words for t in _rouge_split(word) if t]
 
     def calculate(
         self,
         predictions: List[str],
         references: List[str],
+        timestamp: Optional[str] = None,
+        pred_tokens: Optional[List[List[str]]] = None,
+        ref_tokens: Optional[List[List[str]]] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -118,52 +173,135 @@ class ROUGEMetric(MetricCalculator):
         Args:
             predictions: List of predicted texts
             references: List of reference texts
+            timestamp: ISO timestamp for the result (defaults to now)
+            pred_tokens: Predictions already split by _word_tokens
+            ref_tokens: References already split by _word_tokens
 
         Returns:
             EvaluationResult with ROUGE scores
         """
-        rouge1_scores = []
-        rouge2_scores = []
-        rougeL_scores = []
-
-        for pred, ref in zip(predictions, references):
-            scores = self.scorer.score(ref, pred)
-            rouge1_scores.append(scores['rouge1'].fmeasure)
-            rouge2_scores.append(scores['rouge2'].fmeasure)
-            rougeL_scores.append(scores['rougeL'].fmeasure)
+        if pred_tokens is None:
+            pred_tokens = _word_tokens(predictions)
+        if ref_tokens is None:
+            ref_tokens = _word_tokens(references)
+
+        # One row per pair, columns rouge1 / rouge2 / rougeL; scored with
+        # rouge_score's own n-gram and LCS routines on the shared tokens
+        fmeasures = np.empty((min(len(pred_tokens), len(ref_tokens)), 3), dtype=np.float64)
+        for i, (pred, ref) in enumerate(zip(pred_tokens, ref_tokens)):
+            pred, ref = self._rouge_tokens(pred), self._rouge_tokens(ref)
+            fmeasures[i] = (
+                rouge_scorer._score_ngrams(rouge_scorer._create_ngrams(ref, 1), rouge_scorer._create_ngrams(pred, 1)).fmeasure,
+                rouge_scorer._score_ngrams(rouge_scorer._create_ngrams(ref, 2), rouge_scorer._create_ngrams(pred, 2)).fmeasure,
+                rouge_scorer._score_lcs(ref, pred).fmeasure
+            )
+        means = fmeasures.mean(axis=0)
+        stds = fmeasures.std(axis=0)
 
         return EvaluationResult(
             metric_name=self.name,
-            score=np.mean(rougeL_scores),  # Use ROUGE-L as primary score
+            score=means[2],  # Use ROUGE-L as primary score
             details={
                 "rouge1": {
-                    "mean": np.mean(rouge1_scores),
-                    "std": np.std(rouge1_scores)
+                    "mean": means[0],
+                    "std": stds[0]
                 },
                 "rouge2": {
-                    "mean": np.mean(rouge2_scores),
-                    "std": np.std(rouge2_scores)
+                    "mean": means[1],
+                    "std": stds[1]
                 },
                 "rougeL": {
-                    "mean": np.mean(rougeL_scores),
-                    "std": np.std(rougeL_scores)
+                    "mean": means[2],
+                    "std": stds[2]
                 }
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
 class BERTScoreMetric(MetricCalculator):
     """BERTScore for semantic similarity."""
 
-    def __init__(self, model_type: str = "microsoft/deberta-xlarge-mnli"):
+    def __init__(
+        self,
+        model_type: str = "microsoft/deberta-xlarge-mnli",
+        batch_size: int = 64,
+        device: Optional[str] = None,
+        mixed_precision: Optional[bool] = None
+    ):
         super().__init__("BERTScore")
         self.model_type = model_type
+        self.batch_size = batch_size
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        # Autocast the model pass to bf16 (fp16 on GPUs without bf16); CUDA only
+        on_cuda = self.device.startswith("cuda")
+        self.mixed_precision = on_cuda if mixed_precision is None else (mixed_precision and on_cuda)
+        self._autocast_dtype = None
+        if self.mixed_precision:
+            self._autocast_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        self._scorer: Optional[BERTScorer] = None
+
+    @property
+    def scorer(self) -> BERTScorer:
+        """Scorer holding the loaded model, built on first use and reused afterwards."""
+        if self._scorer is None:
+            self._scorer = BERTScorer(
+                model_type=self.model_type,
+                batch_size=self.batch_size,
+                device=self.device
+            )
+        return self._scorer
+
+    def score_pairs(
+        self,
+        predictions: List[str],
+        references: List[str]
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Score prediction/reference pairs without building a result.
+
+        Args:
+            predictions: List of predicted texts
+            references: List of reference texts
+
+        Returns:
+            Tuple of (precision, recall, f1) tensors, one entry per pair
+        """
+        # Score each distinct (prediction, reference) pair once; repeats share its scores
+        pair_index: Dict[Tuple[str, str], int] = {}
+        pair_ids = np.fromiter(
+            (pair_index.setdefault(pair, len(pair_index)) for pair in zip(predictions, references)),
+            dtype=np.int64, count=min(len(predictions), len(references))
+        )
+        unique_pairs = list(pair_index)
+
+        # bert_score length-sorts sentences for the model pass but matches pairs in
+        # input order; sorting pairs by length keeps each matching batch's padding small
+        order = np.argsort(
+            np.fromiter((len(p) + len(r) for p, r in unique_pairs), dtype=np.int64, count=len(unique_pairs)),
+            kind="stable"
+        )
+        autocast = (
+            torch.autocast(device_type="cuda", dtype=self._autocast_dtype)
+            if self.mixed_precision else contextlib.nullcontext()
+        )
+        with torch.inference_mode(), autocast:
+            # score() takes its own batch_size (default 64) rather than the constructor's
+            P, R, F1 = self.scorer.score(
+                [unique_pairs[i][0] for i in order],
+                [unique_pairs[i][1] for i in order],
+                verbose=False,
+                batch_size=self.batch_size
+            )
+            # Scored position of each input pair
+            gather = torch.as_tensor(np.argsort(order)[pair_ids])
+            return P[gather], R[gather], F1[gather]
 
     def calculate(
         self,
         predictions: List[str],
         references: List[str],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -172,17 +310,21 @@ class BERTScoreMetric(MetricCalculator):
         Args:
             predictions: List of predicted texts
             references: List of reference texts
+            timestamp: ISO timestamp for the result (defaults to now)
 
         Returns:
             EvaluationResult with BERTScore
         """
-        P, R, F1 = bert_score(
-            predictions,
-            references,
-            model_type=self.model_type,
-            verbose=False
-        )
+        return self.result_from_scores(*self.score_pairs(predictions, references), timestamp=timestamp)
 
+    def result_from_scores(
+        self,
+        P: torch.Tensor,
+        R: torch.Tensor,
+        F1: torch.Tensor,
+        timestamp: Optional[str] = None
+    ) -> EvaluationResult:
+        """Build the result from precomputed scores (e.g. one app's slice of a suite-wide batch)."""
         return EvaluationResult(
             metric_name=self.name,
             score=F1.mean().item(),
@@ -200,7 +342,7 @@ class BERTScoreMetric(MetricCalculator):
                     "std": F1.std().item()
                 }
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
@@ -213,6 +355,7 @@ class ContextRelevanceMetric(MetricCalculator):
     def calculate(
         self,
         context_scores: List[List[float]],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -220,34 +363,45 @@ class ContextRelevanceMetric(MetricCalculator):
 
         Args:
             context_scores: List of relevance scores for each query
+            timestamp: ISO timestamp for the result (defaults to now)
 
         Returns:
             EvaluationResult with context relevance metrics
         """
-        all_scores = [score for scores in context_scores for score in scores]
+        # Ragged score lists laid out as one NaN-padded (queries, max contexts) array
+        lens = np.fromiter((len(scores) for scores in context_scores), dtype=np.intp, count=len(context_scores))
+        padded = np.full((len(context_scores), lens.max(initial=0)), np.nan, dtype=np.float64)
+        for row, scores in zip(padded, context_scores):
+            row[:len(scores)] = scores
+        filled = ~np.isnan(padded)
+        all_scores = padded[filled]
         
-        if not all_scores:
+        if not all_scores.size:
             return EvaluationResult(
                 metric_name=self.name,
                 score=0.0,
                 details={},
-                timestamp=str(np.datetime64('now'))
+                timestamp=timestamp or _utc_timestamp()
             )
 
-        avg_top_score = np.mean([max(scores) if scores else 0 for scores in context_scores])
+        # Queries without contexts count as a top score of 0
+        top_scores = np.zeros(len(context_scores), dtype=np.float64)
+        nonempty = lens > 0
+        top_scores[nonempty] = np.nanmax(padded[nonempty], axis=1)
+        avg_top_score = top_scores.mean()
         
         return EvaluationResult(
             metric_name=self.name,
-            score=np.mean(all_scores),
+            score=all_scores.mean(),
             details={
                 "avg_top_score": avg_top_score,
-                "std": np.std(all_scores),
-                "min": np.min(all_scores),
-                "max": np.max(all_scores),
+                "std": all_scores.std(),
+                "min": all_scores.min(),
+                "max": all_scores.max(),
                 "num_queries": len(context_scores),
-                "avg_contexts_per_query": np.mean([len(scores) for scores in context_scores])
+                "avg_contexts_per_query": all_scores.size / len(context_scores)
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
@@ -260,6 +414,7 @@ class LatencyMetric(MetricCalculator):
     def calculate(
         self,
         latencies: List[float],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -267,24 +422,29 @@ class LatencyMetric(MetricCalculator):
 
         Args:
             latencies: List of latency values in milliseconds
+            timestamp: ISO timestamp for the result (defaults to now)
 
         Returns:
             EvaluationResult with latency metrics
         """
+        arr = np.asarray(latencies, dtype=np.float64)
+        mean = arr.mean()
+        p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+
         return EvaluationResult(
             metric_name=self.name,
-            score=np.mean(latencies),
+            score=mean,
             details={
-                "mean_ms": np.mean(latencies),
-                "median_ms": np.median(latencies),
-                "p50_ms": np.percentile(latencies, 50),
-                "p95_ms": np.percentile(latencies, 95),
-                "p99_ms": np.percentile(latencies, 99),
-                "std_ms": np.std(latencies),
-                "min_ms": np.min(latencies),
-                "max_ms": np.max(latencies)
+                "mean_ms": mean,
+                "median_ms": p50,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "std_ms": arr.std(),
+                "min_ms": arr.min(),
+                "max_ms": arr.max()
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
@@ -297,23 +457,33 @@ class TokenUsageMetric(MetricCalculator):
 
     def calculate(
         self,
-        token_usages: List[Dict[str, int]],
+        token_usages: Union[List[Dict[str, int]], np.ndarray],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """
         Calculate token usage metrics.
 
         Args:
-            token_usages: List of token usage dicts
+            token_usages: List of token usage dicts, or an (N, 3) array of
+                (total, prompt_tokens, completion_tokens) rows
+            timestamp: ISO timestamp for the result (defaults to now)
 
         Returns:
             EvaluationResult with token usage metrics
         """
-        total_tokens = sum(usage.get('total', 0) for usage in token_usages)
-        prompt_tokens = sum(usage.get('prompt_tokens', 0) for usage in token_usages)
-        completion_tokens = sum(usage.get('completion_tokens', 0) for usage in token_usages)
-
-        avg_total = total_tokens / len(token_usages) if token_usages else 0
+        if isinstance(token_usages, np.ndarray):
+            total_tokens, prompt_tokens, completion_tokens = (
+                int(n) for n in token_usages.reshape(-1, 3).sum(axis=0)
+            )
+        else:
+            total_tokens = prompt_tokens = completion_tokens = 0
+            for usage in token_usages:
+                total_tokens += usage.get('total', 0)
+                prompt_tokens += usage.get('prompt_tokens', 0)
+                completion_tokens += usage.get('completion_tokens', 0)
+
+        avg_total = total_tokens / len(token_usages) if len(token_usages) else 0
         estimated_cost = (total_tokens / 1000) * self.cost_per_1k_tokens
 
         return EvaluationResult(
@@ -327,10 +497,43 @@ class TokenUsageMetric(MetricCalculator):
                 "estimated_cost_usd": estimated_cost,
                 "num_requests": len(token_usages)
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
+def _encode_labels(predictions: List[Any], references: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Map labels to shared integer ids (equal labels get equal ids) in one pass."""
+    codes: Dict[Any, int] = {}
+    ids = np.fromiter(
+        (codes.setdefault(label, len(codes)) for label in itertools.chain(predictions, references)),
+        dtype=np.int64, count=len(predictions) + len(references)
+    )
+    return ids[:len(predictions)], ids[len(predictions):]
+
+
+def _weighted_prf(pred_ids: np.ndarray, ref_ids: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Support-weighted precision, recall and F1 from one confusion-matrix pass.
+
+    Matches sklearn's precision_recall_fscore_support(average='weighted',
+    zero_division=0) on integer label ids.
+    """
+    k = int(max(pred_ids.max(), ref_ids.max())) + 1
+    confusion = np.bincount(ref_ids * k + pred_ids, minlength=k * k).reshape(k, k)
+    tp = np.diag(confusion).astype(np.float64)
+    predicted = confusion.sum(axis=0)
+    support = confusion.sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        # 2PR / (P + R) == 2TP / (predicted + support), and 0 when TP is 0
+        f1 = np.where(tp > 0, 2 * tp / (predicted + support), 0.0)
+
+    weights = support / support.sum()
+    return float(precision @ weights), float(recall @ weights), float(f1 @ weights)
+
+
 class AccuracyMetric(MetricCalculator):
     """Measure classification accuracy."""
 
@@ -341,6 +544,7 @@ class AccuracyMetric(MetricCalculator):
         self,
         predictions: List[Any],
         references: List[Any],
+        timestamp: Optional[str] = None,
         **kwargs
     ) -> EvaluationResult:
         """
@@ -349,22 +553,20 @@ class AccuracyMetric(MetricCalculator):
         Args:
             predictions: List of predicted labels
             references: List of reference labels
+            timestamp: ISO timestamp for the result (defaults to now)
 
         Returns:
             EvaluationResult with accuracy metrics
         """
-        correct = sum(p == r for p, r in zip(predictions, references))
+        pred_ids, ref_ids = _encode_labels(predictions, references)
+        n = min(len(pred_ids), len(ref_ids))
+        correct = int(np.count_nonzero(pred_ids[:n] == ref_ids[:n]))
         accuracy = correct / len(predictions) if predictions else 0
 
         # Calculate precision, recall, F1 if applicable
-        try:
-            precision, recall, f1, _ = precision_recall_fscore_support(
-                references,
-                predictions,
-                average='weighted',
-                zero_division=0
-            )
-        except:
+        if predictions and len(predictions) == len(references):
+            precision, recall, f1 = _weighted_prf(pred_ids, ref_ids)
+        else:
             precision = recall = f1 = 0.0
 
         return EvaluationResult(
@@ -378,7 +580,7 @@ class AccuracyMetric(MetricCalculator):
                 "correct": correct,
                 "total": len(predictions)
             },
-            timestamp=str(np.datetime64('now'))
+            timestamp=timestamp or _utc_timestamp()
         )
 
 
@@ -401,11 +603,12 @@ class EvaluationSuite:
         predictions: Optional[List[str]] = None,
         references: Optional[List[str]] = None,
         context_scores: Optional[List[List[float]]] = None,
-        latencies: Optional[List[float]] = None,
-        token_usages: Optional[List[Dict[str, int]]] = None,
+        latencies: Optional[Union[List[float], np.ndarray]] = None,
+        token_usages: Optional[Union[List[Dict[str, int]], np.ndarray]] = None,
         pred_labels: Optional[List[Any]] = None,
         ref_labels: Optional[List[Any]] = None,
-        metrics_to_run: Optional[List[str]] = None
+        metrics_to_run: Optional[List[str]] = None,
+        precomputed: Optional[Dict[str, EvaluationResult]] = None
     ) -> Dict[str, EvaluationResult]:
         """
         Run evaluation suite.
@@ -414,50 +617,66 @@ class EvaluationSuite:
             predictions: Predicted texts
             references: Reference texts
             context_scores: Context relevance scores
-            latencies: Response latencies
-            token_usages: Token usage data
+            latencies: Response latencies (list or array)
+            token_usages: Token usage dicts, or an (N, 3) array of counts
             pred_labels: Predicted labels
             ref_labels: Reference labels
             metrics_to_run: Specific metrics to run (None = all applicable)
+            precomputed: Results already calculated elsewhere (e.g. batched
+                BERTScore); these metrics are not run again
 
         Returns:
             Dictionary of evaluation results
         """
-        results = {}
+        results = dict(precomputed or {})
+        # One timestamp for every result of this run
+        timestamp = _utc_timestamp()
 
         if metrics_to_run is None:
             metrics_to_run = list(self.metrics.keys())
+        if precomputed:
+            metrics_to_run = [m for m in metrics_to_run if m not in precomputed]
 
         # Text generation metrics
         if predictions and references:
+            # Tokenize once for both n-gram metrics
+            tokens = {}
+            if "bleu" in metrics_to_run or "rouge" in metrics_to_run:
+                tokens = {
+                    "pred_tokens": _word_tokens(predictions),
+                    "ref_tokens": _word_tokens(references)
+                }
             if "bleu" in metrics_to_run:
-                results["bleu"] = self.metrics["bleu"].calculate(predictions, references)
+                results["bleu"] = self.metrics["bleu"].calculate(predictions, references, timestamp=timestamp, **tokens)
             if "rouge" in metrics_to_run:
-                results["rouge"] = self.metrics["rouge"].calculate(predictions, references)
+                results["rouge"] = self.metrics["rouge"].calculate(predictions, references, timestamp=timestamp, **tokens)
             if "bert_score" in metrics_to_run:
-                results["bert_score"] = self.metrics["bert_score"].calculate(predictions, references)
+                results["bert_score"] = self.metrics["bert_score"].calculate(predictions, references, timestamp=timestamp)
 
         # Context relevance
         if context_scores and "context_relevance" in metrics_to_run:
             results["context_relevance"] = self.metrics["context_relevance"].calculate(
-                context_scores=context_scores
+                context_scores=context_scores,
+                timestamp=timestamp
             )
 
         # Latency
-        if latencies and "latency" in metrics_to_run:
-            results["latency"] = self.metrics["latency"].calculate(latencies=latencies)
+        if latencies is not None and len(latencies) and "latency" in metrics_to_run:
+            results["latency"] = self.metrics["latency"].calculate(latencies=latencies, timestamp=timestamp)
 
         # Token usage
-        if token_usages and "token_usage" in metrics_to_run:
+        if token_usages is not None and len(token_usages) and "token_usage" in metrics_to_run:
             results["token_usage"] = self.metrics["token_usage"].calculate(
-                token_usages=token_usages
+                token_usages=token_usages,
+                timestamp=timestamp
             )
 
         # Accuracy
         if pred_labels and ref_labels and "accuracy" in metrics_to_run:
             results["accuracy"] = self.metrics["accuracy"].calculate(
                 predictions=pred_labels,
-                references=ref_labels
+                references=ref_labels,
+                timestamp=timestamp
             )
 
         return results
@@ -5,15 +5,23 @@ Comprehensive evaluation runner for all CAG applications.
 import asyncio
 import json
 import argparse
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import sys
 import os
 
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional: faster dataset parsing and result writing
+    orjson = None
+
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
-from evaluation.metrics import EvaluationSuite
+from evaluation.metrics import EvaluationResult, EvaluationSuite
 from evaluation.test_datasets import TestDatasetLoader
 import logging
 
@@ -21,13 +29,38 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+# Aggregate score weights, in _AGGREGATE_METRICS order
+_AGGREGATE_METRICS = ("bleu", "rouge", "bert_score", "context_relevance", "latency", "token_usage")
+_AGGREGATE_WEIGHTS = np.array([0.15, 0.15, 0.25, 0.20, 0.15, 0.10])
+_LOWER_IS_BETTER = np.array([m in ("latency", "token_usage") for m in _AGGREGATE_METRICS])
+
+
+@lru_cache(maxsize=None)
+def _import_app_module(app_name: str):
+    """Import an app's backend client module once; None when the app has no client."""
+    try:
+        return __import__(f"{app_name}.backend.client", fromlist=["AppClient"])
+    except ImportError:
+        return None
+
+
 class ApplicationEvaluator:
     """Evaluator for a single CAG application."""
 
-    def __init__(self, app_name: str, app_config: Dict[str, Any]):
+    def __init__(
+        self,
+        app_name: str,
+        app_config: Dict[str, Any],
+        evaluation_suite: Optional[EvaluationSuite] = None,
+        max_concurrent_requests: int = 4
+    ):
         self.app_name = app_name
         self.app_config = app_config
-        self.evaluation_suite = EvaluationSuite()
+        self.evaluation_suite = evaluation_suite or EvaluationSuite()
+        # Test cases in flight against the app at once
+        self.max_concurrent_requests = max_concurrent_requests
+        # Built on first use and reused by later evaluation runs
+        self._app_client = None
 
     async def run_evaluation(self, test_dataset: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -39,42 +72,91 @@ class ApplicationEvaluator:
         Returns:
             Evaluation results
         """
+        collected = await self.collect_predictions(test_dataset)
+        # Metrics are CPU-bound; keep them off the event loop
+        return await asyncio.to_thread(self.evaluate_predictions, test_dataset, collected)
+
+    async def collect_predictions(self, test_dataset: List[Dict[str, Any]]) -> Dict[str, list]:
+        """
+        Query the app for every test case.
+
+        Args:
+            test_dataset: List of test cases
+
+        Returns:
+            Suite inputs (predictions, references, context_scores, latencies,
+            token_usages) for the successful test cases; latencies as a float64 array
+        """
         logger.info(f"Evaluating {self.app_name}...")
 
-        predictions = []
-        references = []
-        context_scores = []
-        latencies = []
-        token_usages = []
+        # Filled by test case index; `succeeded` marks the cases to keep
+        n = len(test_dataset)
+        predictions = [None] * n
+        references = [None] * n
+        context_scores = [None] * n
+        latencies = np.empty(n, dtype=np.float64)
+        token_usages = [None] * n
+        succeeded = np.zeros(n, dtype=bool)
 
         # Import app-specific client
         app_client = self._get_app_client()
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def predict(i: int, test_case: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Processing test case {i+1}/{len(test_dataset)}")
+                return await app_client.predict(test_case["query"])
 
-        for i, test_case in enumerate(test_dataset):
-            logger.info(f"Processing test case {i+1}/{len(test_dataset)}")
+        # Make predictions concurrently; results come back in test case order
+        outcomes = await asyncio.gather(
+            *(predict(i, test_case) for i, test_case in enumerate(test_dataset)),
+            return_exceptions=True
+        )
 
+        for i, (test_case, result) in enumerate(zip(test_dataset, outcomes)):
             try:
-                # Make prediction
-                result = await app_client.predict(test_case["query"])
+                if isinstance(result, BaseException):
+                    raise result
 
-                predictions.append(result["answer"])
-                references.append(test_case["expected_answer"])
-                context_scores.append([c["relevance_score"] for c in result.get("context_chunks", [])])
-                latencies.append(result["latency_ms"])
-                token_usages.append(result["token_usage"])
+                predictions[i] = result["answer"]
+                references[i] = test_case["expected_answer"]
+                context_scores[i] = [c["relevance_score"] for c in result.get("context_chunks", [])]
+                latencies[i] = result["latency_ms"]
+                token_usages[i] = result["token_usage"]
+                succeeded[i] = True
 
             except Exception as e:
                 logger.error(f"Error on test case {i}: {str(e)}")
                 continue
 
+        keep = np.flatnonzero(succeeded)
+        return {
+            "predictions": [predictions[i] for i in keep],
+            "references": [references[i] for i in keep],
+            "context_scores": [context_scores[i] for i in keep],
+            "latencies": latencies[succeeded],
+            "token_usages": [token_usages[i] for i in keep]
+        }
+
+    def evaluate_predictions(
+        self,
+        test_dataset: List[Dict[str, Any]],
+        collected: Dict[str, list],
+        precomputed: Optional[Dict[str, EvaluationResult]] = None
+    ) -> Dict[str, Any]:
+        """
+        Score collected predictions.
+
+        Args:
+            test_dataset: List of test cases the predictions came from
+            collected: Output of collect_predictions
+            precomputed: Metric results already calculated for this app
+
+        Returns:
+            Evaluation results
+        """
         # Run evaluation metrics
-        eval_results = self.evaluation_suite.evaluate(
-            predictions=predictions,
-            references=references,
-            context_scores=context_scores,
-            latencies=latencies,
-            token_usages=token_usages
-        )
+        eval_results = self.evaluation_suite.evaluate(**collected, precomputed=precomputed)
 
         # Calculate aggregate scores
         aggregate_score = self._calculate_aggregate_score(eval_results)
@@ -83,7 +165,7 @@ class ApplicationEvaluator:
             "app_name": self.app_name,
             "timestamp": datetime.now().isoformat(),
             "num_test_cases": len(test_dataset),
-            "num_successful": len(predictions),
+            "num_successful": len(collected["predictions"]),
             "aggregate_score": aggregate_score,
             "metrics": {
                 name: {
@@ -96,45 +178,28 @@ class ApplicationEvaluator:
 
     def _get_app_client(self):
         """Get application-specific client."""
+        if self._app_client is not None:
+            return self._app_client
+
         # Import dynamically based on app name
-        app_module = self.app_name.replace("_", "")
-        try:
-            module = __import__(f"{self.app_name}.backend.client", fromlist=["AppClient"])
-            return module.AppClient(self.app_config)
-        except ImportError:
+        module = _import_app_module(self.app_name)
+        if module is not None:
+            self._app_client = module.AppClient(self.app_config)
+        else:
             logger.warning(f"No client found for {self.app_name}, using mock client")
-            return MockAppClient()
+            self._app_client = MockAppClient()
+        return self._app_client
 
     def _calculate_aggregate_score(self, eval_results: Dict[str, Any]) -> float:
         """Calculate weighted aggregate score."""
-        weights = {
-            "bleu": 0.15,
-            "rouge": 0.15,
-            "bert_score": 0.25,
-            "context_relevance": 0.20,
-            "latency": 0.15,
-            "token_usage": 0.10
-        }
-
-        # Normalize latency (lower is better)
-        normalized_scores = {}
-        for metric, result in eval_results.items():
-            if metric == "latency":
-                # Normalize to 0-1 range (assuming 5000ms is worst case)
-                normalized_scores[metric] = max(0, 1 - (result.score / 5000))
-            elif metric == "token_usage":
-                # Normalize to 0-1 range (assuming 5000 tokens is worst case)
-                normalized_scores[metric] = max(0, 1 - (result.score / 5000))
-            else:
-                normalized_scores[metric] = result.score
-
-        # Calculate weighted sum
-        aggregate = sum(
-            normalized_scores.get(metric, 0) * weight
-            for metric, weight in weights.items()
+        scores = np.fromiter(
+            (eval_results[m].score if m in eval_results else np.nan for m in _AGGREGATE_METRICS),
+            dtype=np.float64, count=len(_AGGREGATE_METRICS)
         )
-
-        return aggregate
+        # Normalize latency and token usage to 0-1 (lower is better, 5000 is worst case)
+        scores = np.where(_LOWER_IS_BETTER, np.maximum(0, 1 - scores / 5000), scores)
+        # Metrics that did not run count as 0
+        return float(np.nan_to_num(scores) @ _AGGREGATE_WEIGHTS)
 
 
 class MockAppClient:
@@ -153,10 +218,14 @@ class MockAppClient:
 class EvaluationRunner:
     """Main evaluation runner for all applications."""
 
-    def __init__(self, output_dir: str = "./evaluation_results"):
+    def __init__(self, output_dir: str = "./evaluation_results", max_concurrent_apps: int = 4):
         self.output_dir = Path(output_dir)
+        # Apps queried at once (each also caps its own in-flight test cases)
+        self.max_concurrent_apps = max_concurrent_apps
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.dataset_loader = TestDatasetLoader()
+        # Shared by every app so models (BERTScore) load once per run
+        self.evaluation_suite = EvaluationSuite()
 
     async def run_all_evaluations(self) -> Dict[str, Any]:
         """
@@ -181,17 +250,52 @@ class EvaluationRunner:
         ]
 
         all_results = {}
+        collected_by_app = {}
+        semaphore = asyncio.Semaphore(self.max_concurrent_apps)
 
-        for app_name, app_config in apps:
-            try:
+        async def collect(app_name: str, app_config: Dict[str, Any]):
+            async with semaphore:
                 # Load test dataset for this app
                 test_dataset = self.dataset_loader.load_dataset(app_name)
 
                 # Create evaluator
-                evaluator = ApplicationEvaluator(app_name, app_config)
+                evaluator = ApplicationEvaluator(app_name, app_config, self.evaluation_suite)
+
+                # Query the app; BERTScore waits until every app has answered
+                collected = await evaluator.collect_predictions(test_dataset)
+
+            # Score the other metrics in a worker thread while remaining apps are still queried
+            partial = await asyncio.to_thread(
+                self.evaluation_suite.evaluate,
+                **collected,
+                metrics_to_run=[name for name in self.evaluation_suite.metrics if name != "bert_score"]
+            )
+            return evaluator, test_dataset, collected, partial
+
+        outcomes = await asyncio.gather(
+            *(collect(app_name, app_config) for app_name, app_config in apps),
+            return_exceptions=True
+        )
+
+        for (app_name, _), outcome in zip(apps, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error evaluating {app_name}: {str(outcome)}")
+                all_results[app_name] = {"error": str(outcome)}
+            else:
+                collected_by_app[app_name] = outcome
+
+        bert_results = await asyncio.to_thread(self._batch_bert_score, collected_by_app)
 
-                # Run evaluation
-                results = await evaluator.run_evaluation(test_dataset)
+        for app_name, _ in apps:
+            if app_name not in collected_by_app:
+                continue
+            evaluator, test_dataset, collected, partial = collected_by_app[app_name]
+            try:
+                # Run evaluation (only metrics not computed above)
+                results = await asyncio.to_thread(
+                    evaluator.evaluate_predictions,
+                    test_dataset, collected, {**partial, **bert_results.get(app_name, {})}
+                )
 
                 all_results[app_name] = results
 
@@ -202,6 +306,8 @@ class EvaluationRunner:
                 logger.error(f"Error evaluating {app_name}: {str(e)}")
                 all_results[app_name] = {"error": str(e)}
 
+        all_results = {app_name: all_results[app_name] for app_name, _ in apps}
+
         # Generate summary
         summary = self._generate_summary(all_results)
 
@@ -211,18 +317,51 @@ class EvaluationRunner:
         logger.info("Evaluation complete!")
         return summary
 
+    def _batch_bert_score(
+        self,
+        collected_by_app: Dict[str, Tuple[ApplicationEvaluator, List[Dict[str, Any]], Dict[str, list], Dict[str, EvaluationResult]]]
+    ) -> Dict[str, Dict[str, EvaluationResult]]:
+        """
+        Score every app's predictions with BERTScore in one pass and slice the scores back per app.
+
+        Returns:
+            Per-app {"bert_score": result}; empty if batching failed, in which
+            case each app is scored on its own
+        """
+        metric = self.evaluation_suite.metrics["bert_score"]
+        predictions, references = [], []
+        slices = {}
+        for app_name, (_, _, collected, _) in collected_by_app.items():
+            if collected["predictions"] and collected["references"]:
+                start = len(predictions)
+                predictions.extend(collected["predictions"])
+                references.extend(collected["references"])
+                slices[app_name] = (start, len(predictions))
+
+        if not predictions:
+            return {}
+
+        try:
+            P, R, F1 = metric.score_pairs(predictions, references)
+        except Exception as e:
+            logger.error(f"Batched BERTScore failed, scoring apps individually: {str(e)}")
+            return {}
+
+        return {
+            app_name: {"bert_score": metric.result_from_scores(P[start:end], R[start:end], F1[start:end])}
+            for app_name, (start, end) in slices.items()
+        }
+
     def _save_results(self, app_name: str, results: Dict[str, Any]):
         """Save results for individual app."""
         output_file = self.output_dir / f"{app_name}_results.json"
-        with open(output_file, 'w') as f:
-            json.dump(results, f, indent=2)
+        _write_json(output_file, results)
         logger.info(f"Saved results to {output_file}")
 
     def _save_summary(self, summary: Dict[str, Any]):
         """Save evaluation summary."""
         output_file = self.output_dir / "summary.json"
-        with open(output_file, 'w') as f:
-            json.dump(summary, f, indent=2)
+        _write_json(output_file, summary)
         logger.info(f"Saved summary to {output_file}")
 
     def _generate_summary(self, all_results: Dict[str, Any]) -> Dict[str, Any]:
@@ -272,6 +411,33 @@ class EvaluationRunner:
         return summary
 
 
+def _json_default(obj: Any) -> Any:
+    """Convert NumPy scalars and arrays for the stdlib json fallback."""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _write_json(path: Path, data: Any):
+    """Write data as indented JSON; NumPy values are serialized natively."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2, default=_json_default)
+
+
+@lru_cache(maxsize=None)
+def _read_dataset_file(path: str, mtime_ns: int) -> List[Dict[str, Any]]:
+    """Parse a dataset file once per modification time."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 class TestDatasetLoader:
     """Loader for test datasets."""
 
@@ -288,9 +454,12 @@ class TestDatasetLoader:
         # Load from file or generate synthetic data
         dataset_file = Path(f"./test_datasets/{app_name}.json")
 
-        if dataset_file.exists():
-            with open(dataset_file) as f:
-                return json.load(f)
+        try:
+            mtime_ns = dataset_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+        else:
+            return list(_read_dataset_file(str(dataset_file), mtime_ns))
 
         # Generate synthetic test data
         logger.warning(f"No dataset found for {app_name}, generating synthetic data")
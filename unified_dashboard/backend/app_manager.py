@@ -1,48 +1,192 @@
 import subprocess
+import atexit
 import sys
 import os
 import json
 import time
 import signal
+import select
+import shutil
+import threading
 import psutil
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional: faster config.json parsing and /apps encoding
+    orjson = None
+
 # Load config
 BASE_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT = BASE_DIR.parent.parent
+CONFIG_PATH = BASE_DIR / "config.json"
+
+CONFIG = {}
+_CONFIG_MTIME = None
+# App ids of the current config, for validating ids from requests
+_VALID_IDS = frozenset()
+# /apps entries built once per config load; requests only restamp "status"
+_APPS_LIST = []
+_APP_ENTRIES = {}
+# Launch environment per app, from os.environ as of the config load
+_APP_ENVS = {}
+
+def _app_env(app_info):
+    return {
+        **os.environ,
+        **app_info.get("env_vars", {}),
+        "PYTHONPATH": str(PROJECT_ROOT),  # Ensure shared modules are found
+        # For React/CRA to set port
+        "PORT": str(app_info["frontend_port"]),
+        # Prevent browser auto-open
+        "BROWSER": "none",
+    }
+
+def _refresh_config():
+    # Re-parse config.json only when it changed on disk (one stat per call),
+    # so edits apply without restarting the dashboard
+    global CONFIG, _CONFIG_MTIME, _VALID_IDS, _APPS_LIST, _APP_ENTRIES, _APP_ENVS
+    mtime = CONFIG_PATH.stat().st_mtime_ns
+    if mtime == _CONFIG_MTIME:
+        return
+    data = CONFIG_PATH.read_bytes()
+    config = (orjson.loads(data) if orjson is not None else json.loads(data))["apps"]
+    apps_list = [{**app, "status": "stopped"} for app in config.values()]
+    envs = {app_id: _app_env(app) for app_id, app in config.items()}
+    CONFIG, _APPS_LIST, _APP_ENTRIES, _APP_ENVS = config, apps_list, dict(zip(config, apps_list)), envs
+    _VALID_IDS = frozenset(config)
+    _CONFIG_MTIME = mtime
+
+_refresh_config()
 
-with open(BASE_DIR / "config.json", "r") as f:
-    CONFIG = json.load(f)["apps"]
+# Start each app process as the leader of a new process group, so stopping it
+# reaches its children too
+if os.name == "nt":
+    _NEW_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _NEW_GROUP = {"start_new_session": True}
 
 # Store running processes: { app_id: { "backend": Popen, "frontend": Popen } }
 RUNNING_APPS = {}
+# Guards changes to RUNNING_APPS; readers copy it under the lock
+_LOCK = threading.Lock()
+
+# Last /apps payload: (apps list it was built from, their statuses, JSON bytes)
+_APPS_JSON = (None, None, b"")
+
+# Entries whose processes have exited carry "exited": set from the event loop
+# once watch_exits() is active, otherwise by _drain_exits() on status checks
+_EXIT_WATCH = False
+# Loop watching per-process pidfds, when that is the mechanism in use
+_EXIT_LOOP = None
+# Without the watch, status checks within STATUS_TTL of a drain reuse its result
+_LAST_DRAIN = 0.0
+STATUS_TTL = 0.25
 
 def get_app_config(app_id: str):
+    _refresh_config()
     return CONFIG.get(app_id)
 
+def is_valid_app(app_id: str):
+    _refresh_config()
+    return app_id in _VALID_IDS
+
 def get_all_apps():
-    # Add status to config
-    apps_list = []
-    for app_id, data in CONFIG.items():
-        status = "stopped"
-        if app_id in RUNNING_APPS:
-            # Check if processes are actually alive
-            if is_app_running(app_id):
-                status = "running"
-            else:
-                # Cleanup if they died unexpectedly
-                stop_app(app_id) 
-        
-        app_data = data.copy()
-        app_data["status"] = status
-        apps_list.append(app_data)
+    _refresh_config()
+    apps_list, entries = _APPS_LIST, _APP_ENTRIES
+    if not _EXIT_WATCH:
+        _drain_exits()
+    with _LOCK:
+        running_apps = dict(RUNNING_APPS)
+    # Add status to config; apps that died read as stopped (whatever is left
+    # of them is cleaned up by their next start or stop, not by this read)
+    for app_id, app_data in entries.items():
+        procs = running_apps.get(app_id)
+        app_data["status"] = "running" if procs is not None and "exited" not in procs else "stopped"
     return apps_list
 
+def watch_exits(loop):
+    # Flag app processes as they exit so status checks become dict lookups
+    # instead of polling; POSIX only. On Linux each process gets a pidfd read
+    # by the loop, which works on uvloop too (it refuses SIGCHLD handlers);
+    # elsewhere a SIGCHLD handler
+    global _EXIT_WATCH, _EXIT_LOOP
+    if os.name == "nt":
+        return
+    if hasattr(os, "pidfd_open"):
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except OSError:
+            pass  # kernels older than 5.3
+        else:
+            _EXIT_LOOP = loop
+            _EXIT_WATCH = True
+            return
+    try:
+        loop.add_signal_handler(signal.SIGCHLD, _on_child_exit)
+    except (ValueError, RuntimeError) as e:
+        print(f"Cannot watch app exits ({e}); polling app status instead")
+        return
+    _EXIT_WATCH = True
+    _on_child_exit()
+
+def _watch_procs(procs):
+    # Runs on _EXIT_LOOP
+    for proc in _app_procs(procs):
+        try:
+            fd = os.pidfd_open(proc.pid)
+        except OSError:
+            # Already exited and reaped
+            procs["exited"] = True
+            continue
+        _EXIT_LOOP.add_reader(fd, _on_pidfd_exit, fd, proc, procs)
+
+def _on_pidfd_exit(fd, proc, procs):
+    _EXIT_LOOP.remove_reader(fd)
+    os.close(fd)
+    proc.poll()  # reap it
+    procs["exited"] = True
+
+def _on_child_exit():
+    for procs in list(RUNNING_APPS.values()):
+        if "exited" not in procs and not _procs_alive(procs):
+            procs["exited"] = True
+
+def get_all_apps_json():
+    # get_all_apps() serialized; the bytes are reused until a status or the config changes
+    global _APPS_JSON
+    apps = get_all_apps()
+    statuses = tuple(app["status"] for app in apps)
+    cached_apps, cached_statuses, payload = _APPS_JSON
+    if cached_apps is not apps or cached_statuses != statuses:
+        payload = orjson.dumps(apps) if orjson is not None else json.dumps(apps).encode()
+        _APPS_JSON = (apps, statuses, payload)
+    return payload
+
 def is_app_running(app_id: str):
-    if app_id not in RUNNING_APPS:
-        return False
-    
-    procs = RUNNING_APPS[app_id]
+    if not _EXIT_WATCH:
+        _drain_exits()
+    procs = RUNNING_APPS.get(app_id)
+    return procs is not None and "exited" not in procs
+
+def _drain_exits():
+    # Dashboards poll every second or two; reuse a fresh drain instead of re-checking
+    global _LAST_DRAIN
+    now = time.monotonic()
+    if now - _LAST_DRAIN < STATUS_TTL:
+        return
+    _LAST_DRAIN = now
+    # One waitid(P_ALL, WNOWAIT) answers whether any child is waiting to be
+    # reaped without reaping it; only then poll (and reap) the app processes
+    if hasattr(os, "waitid"):
+        try:
+            if os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+                return
+        except ChildProcessError:
+            return
+    _on_child_exit()
+
+def _procs_alive(procs):
     backend = procs.get("backend")
     frontend = procs.get("frontend")
     
@@ -55,24 +199,30 @@ def is_app_running(app_id: str):
     return True
 
 def start_app(app_id: str):
+    # Unknown ids are turned away before taking the lock or polling processes
+    if not is_valid_app(app_id):
+        return {"success": False, "message": "App not found"}
+    # Held across the spawn so concurrent starts cannot launch an app twice
+    with _LOCK:
+        return _start_app(app_id)
+
+def _start_app(app_id: str):
     if is_app_running(app_id):
         return {"success": False, "message": "App already running"}
     
-    app_info = get_app_config(app_id)
-    if not app_info:
-        return {"success": False, "message": "App not found"}
+    app_info = CONFIG[app_id]
+    
+    # Whatever survived a crash (e.g. the frontend of a dead backend) holds the ports
+    stale = RUNNING_APPS.pop(app_id, None)
+    if stale:
+        _kill_procs(_app_procs(stale))
         
     app_dir = PROJECT_ROOT / app_info["folder"]
     
-    # Environment Setup
-    env = os.environ.copy()
-    env.update(app_info.get("env_vars", {}))
-    env["PYTHONPATH"] = str(PROJECT_ROOT) # Ensure shared modules are found
-    # For React/CRA to set port
-    env["PORT"] = str(app_info["frontend_port"])
-    # Prevent browser auto-open
-    env["BROWSER"] = "none"
+    # Environment Setup (built with the config; Popen only reads it)
+    env = _APP_ENVS[app_id]
 
+    backend_proc = frontend_proc = None
     try:
         # 1. Start Backend
         print(f"Starting Backend for {app_info['name']} on port {app_info['backend_port']}...")
@@ -81,66 +231,158 @@ def start_app(app_id: str):
             "main:app", 
             "--host", "0.0.0.0", 
             "--port", str(app_info['backend_port']),
-            "--reload"
         ]
+        # The file watcher doubles the processes per app; opt in with "dev_reload"
+        if app_info.get("dev_reload", False):
+            backend_cmd.append("--reload")
         
         backend_proc = subprocess.Popen(
             backend_cmd, 
             cwd=str(app_dir / "backend"),
             env=env,
             # We could redirect stdout/stderr to capture logs
+            **_NEW_GROUP
         )
         
         # 2. Start Frontend
         print(f"Starting Frontend for {app_info['name']} on port {app_info['frontend_port']}...")
         # Note: 'npm start' usually runs react-scripts start. 
         # We need to ensure it sees the PORT env var.
-        # Window shell=True is often needed for npm.
-        frontend_cmd = ["npm", "start"]
+        # Resolved on PATH (finds the npm.cmd shim on Windows), so no shell is needed
+        frontend_cmd = [shutil.which("npm") or "npm", "start"]
         frontend_proc = subprocess.Popen(
             frontend_cmd, 
             cwd=str(app_dir / "frontend"),
             env=env,
-            shell=True
+            **_NEW_GROUP
         )
         
         RUNNING_APPS[app_id] = {
             "backend": backend_proc,
             "frontend": frontend_proc
         }
+        if _EXIT_LOOP is not None:
+            _EXIT_LOOP.call_soon_threadsafe(_watch_procs, RUNNING_APPS[app_id])
+        elif _EXIT_WATCH:
+            # A process that died before it was registered sent its SIGCHLD too early
+            _on_child_exit()
         
         return {"success": True, "message": f"Started {app_info['name']}"}
         
     except Exception as e:
         print(f"Error starting app {app_id}: {e}")
         # Cleanup if half-started
-        stop_app(app_id)
+        _kill_procs([p for p in (backend_proc, frontend_proc) if p])
         return {"success": False, "message": str(e)}
 
 def stop_app(app_id: str):
-    if app_id not in RUNNING_APPS:
-        return {"success": False, "message": "App not running"}
-    
-    procs = RUNNING_APPS[app_id]
-    
-    _kill_proc(procs.get("backend"))
-    _kill_proc(procs.get("frontend"))
-    
-    del RUNNING_APPS[app_id]
-    return {"success": True, "message": "App stopped"}
+    return stop_apps([app_id])[app_id]
 
-def _kill_proc(proc):
-    if not proc:
-        return
+def stop_apps(app_ids):
+    # Stop several apps at once; their processes share one grace period
+    results = {}
+    procs = []
+    with _LOCK:
+        for app_id in dict.fromkeys(app_ids):
+            app_procs = RUNNING_APPS.pop(app_id, None)
+            if app_procs is None:
+                results[app_id] = {"success": False, "message": "App not running"}
+                continue
+            procs += _app_procs(app_procs)
+            results[app_id] = {"success": True, "message": "App stopped"}
     
-    # Simple terminate
-    proc.terminate()
-    try:
-        proc.wait(timeout=2)
-    except subprocess.TimeoutExpired:
+    _kill_procs(procs)
+    return results
+
+def stop_all_apps():
+    return stop_apps(list(RUNNING_APPS))
+
+# App processes lead their own sessions, so the dashboard's Ctrl+C or SIGTERM
+# does not reach them; stop them on the way out if the shutdown hook did not
+atexit.register(stop_all_apps)
+
+def _app_procs(procs):
+    return [p for p in (procs.get("backend"), procs.get("frontend")) if p]
+
+def _kill_procs(procs, timeout=2):
+    # Ask every group to exit first (uvicorn's reloader worker, npm's node child),
+    # then wait out a single grace period and kill whatever is left
+    for proc in procs:
+        if os.name == "nt":
+            proc.terminate()
+        else:
+            _signal_group(proc.pid, signal.SIGTERM)
+    for proc in _wait_exits(procs, timeout):
         _kill_process_tree(proc.pid)
+        proc.wait()
+
+def _wait_exits(procs, timeout):
+    # Block on process exit notifications (pidfd on Linux, kqueue on macOS/BSD)
+    # instead of Popen.wait's waitpid + sleep polling; returns the processes
+    # still alive at the deadline. Exited ones are reaped.
+    pending = [p for p in procs if p.poll() is None]
+    deadline = time.monotonic() + timeout
+    try:
+        if pending and hasattr(os, "pidfd_open"):
+            return _wait_exits_pidfd(pending, deadline)
+        if pending and hasattr(select, "kqueue"):
+            return _wait_exits_kqueue(pending, deadline)
+    except OSError:
+        # e.g. pidfd_open on kernels older than 5.3
+        pass
+    survivors = []
+    for proc in pending:
+        try:
+            proc.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            survivors.append(proc)
+    return survivors
+
+def _wait_exits_pidfd(pending, deadline):
+    by_fd = {}
+    try:
+        poller = select.poll()
+        for proc in pending:
+            fd = os.pidfd_open(proc.pid)
+            by_fd[fd] = proc
+            poller.register(fd, select.POLLIN)
+        while by_fd and (remaining := deadline - time.monotonic()) > 0:
+            for fd, _ in poller.poll(remaining * 1000):
+                poller.unregister(fd)
+                os.close(fd)
+                by_fd.pop(fd).wait()
+    finally:
+        for fd in by_fd:
+            os.close(fd)
+    return list(by_fd.values())
+
+def _wait_exits_kqueue(pending, deadline):
+    by_pid = {proc.pid: proc for proc in pending}
+    kq = select.kqueue()
+    try:
+        kq.control([
+            select.kevent(
+                pid,
+                filter=select.KQ_FILTER_PROC,
+                flags=select.KQ_EV_ADD | select.KQ_EV_ONESHOT,
+                fflags=select.KQ_NOTE_EXIT
+            )
+            for pid in by_pid
+        ], 0)
+        while by_pid and (remaining := deadline - time.monotonic()) > 0:
+            for event in kq.control(None, len(by_pid), remaining):
+                proc = by_pid.pop(event.ident, None)
+                if proc:
+                    proc.wait()
+    finally:
+        kq.close()
+    return list(by_pid.values())
 
 def _kill_process_tree(pid):
+    if os.name != "nt":
+        # Each app process leads its own group, so one killpg reaches every descendant
+        _signal_group(pid, signal.SIGKILL)
+        return
     try:
         parent = psutil.Process(pid)
         for child in parent.children(recursive=True):
@@ -148,3 +390,9 @@ def _kill_process_tree(pid):
         parent.kill()
     except psutil.NoSuchProcess:
         pass
+
+def _signal_group(pgid, sig):
+    try:
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        pass
@@ -1,52 +1,137 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import JSONResponse
 import app_manager
 import uvicorn
+import asyncio
+import logging
 import os
 
-app = FastAPI(title="Unified Dashboard API")
+try:
+    import orjson
+except ImportError:  # optional: faster JSON responses
+    orjson = None
 
-# Enable CORS for frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # For local dev, allow all. In prod, lock down.
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+
+class ORJSONResponse(JSONResponse):
+    # Local equivalent of fastapi.responses.ORJSONResponse, which newer FastAPI deprecates
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
+app = FastAPI(
+    title="Unified Dashboard API",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse
 )
 
-class AppResponse(BaseModel):
-    id: str
-    name: str
-    description: str
-    status: str
-    frontend_port: int
-    backend_port: int
+class FastCORS:
+    # Allow-all CORS (what CORSMiddleware does with "*" origins, methods and
+    # headers plus credentials) as plain ASGI with the fixed headers prebuilt
+    _CORS_HEADERS = [(b"access-control-allow-credentials", b"true"), (b"vary", b"Origin")]
+    _PREFLIGHT_HEADERS = _CORS_HEADERS + [
+        (b"access-control-allow-methods", b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"),
+        (b"access-control-max-age", b"600"),
+        (b"content-type", b"text/plain; charset=utf-8"),
+        (b"content-length", b"2"),
+    ]
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin")
+        if origin is None:
+            return await self.app(scope, receive, send)
+
+        # Credentialed requests need the caller's origin echoed back, not "*"
+        allow_origin = (b"access-control-allow-origin", origin)
+        if scope["method"] == "OPTIONS" and b"access-control-request-method" in headers:
+            preflight_headers = [allow_origin, *self._PREFLIGHT_HEADERS]
+            requested = headers.get(b"access-control-request-headers")
+            if requested:
+                preflight_headers.append((b"access-control-allow-headers", requested))
+            await send({"type": "http.response.start", "status": 200, "headers": preflight_headers})
+            await send({"type": "http.response.body", "body": b"OK"})
+            return
+
+        cors_headers = [allow_origin, *self._CORS_HEADERS]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                # New list: responses may share theirs between requests
+                message = {**message, "headers": [*message.get("headers", ()), *cors_headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+# Enable CORS for frontend (for local dev, allow all. In prod, lock down.)
+app.add_middleware(FastCORS)
+
+@app.on_event("startup")
+async def watch_app_exits():
+    app_manager.watch_exits(asyncio.get_running_loop())
+
+@app.on_event("shutdown")
+async def stop_running_apps():
+    # Apps run in their own sessions and would outlive the dashboard holding their ports
+    await asyncio.to_thread(app_manager.stop_all_apps)
+
+# app_manager polls, spawns and waits on processes; run it in worker threads
+# so the event loop keeps serving other requests meanwhile
 
 @app.get("/apps")
-def list_apps():
-    apps = app_manager.get_all_apps()
-    # Convert dict values to list if needed, but get_all_apps returns a list
-    return apps
+async def list_apps():
+    # Pre-encoded JSON, rebuilt only when an app's status changes
+    apps_json = await asyncio.to_thread(app_manager.get_all_apps_json)
+    return Response(content=apps_json, media_type="application/json")
+
+def _check_app_id(app_id: str):
+    # Answered on the event loop; only known apps get a worker thread
+    if not app_manager.is_valid_app(app_id):
+        raise HTTPException(status_code=404, detail="App not found")
 
 @app.post("/apps/{app_id}/start")
-def start_app(app_id: str):
-    result = app_manager.start_app(app_id)
+async def start_app(app_id: str):
+    _check_app_id(app_id)
+    result = await asyncio.to_thread(app_manager.start_app, app_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
 @app.post("/apps/{app_id}/stop")
-def stop_app(app_id: str):
-    result = app_manager.stop_app(app_id)
+async def stop_app(app_id: str):
+    _check_app_id(app_id)
+    result = await asyncio.to_thread(app_manager.stop_app, app_id)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
     return result
 
+_HEALTH_BODY = b'{"status":"ok"}'
+
 @app.get("/health")
-def health_check():
-    return {"status": "ok"}
+async def health_check():
+    # Fresh Response around constant bytes: middleware may edit a response's header list
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+class _SkipHealthChecks(logging.Filter):
+    # uvicorn access records carry (client, method, path, http version, status)
+    def filter(self, record):
+        return not (isinstance(record.args, tuple) and len(record.args) > 2 and record.args[2] == "/health")
+
+# Probes hit /health constantly; keep them out of the access log
+logging.getLogger("uvicorn.access").addFilter(_SkipHealthChecks())
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    # loop/http "auto" already pick uvloop and httptools when installed
+    # (uvicorn[standard]); uvloop does not exist on Windows, so neither is forced
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=os.getenv("DASHBOARD_RELOAD", "0") == "1",
+        loop="auto",
+        http="auto"
+    )